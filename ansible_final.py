@@ -1,42 +1,76 @@
 # ansible_final.py
+import io
 import os
+import gzip
+import shutil
 import subprocess
 import tempfile
 import requests
+from contextlib import contextmanager
 from dotenv import load_dotenv
 load_dotenv()
 
-WEBEX_TOKEN   = os.environ.get("WEBEX_TOKEN", "")
-WEBEX_ROOM_ID = os.environ.get("WEBEX_ROOM_ID", "")
-STUDENT_ID    = os.environ.get("STUDENT_ID", "66070315").strip()
+import netmiko_final
+from webex_client import get_client
+import snapshot_store
+from state_cache import CACHE
+import deadline
+import health
+import tenant
+
 ROUTER_NAME   = os.environ.get("ROUTER_NAME", "CSR-1000V").strip()
+# "subprocess" = รัน ansible-playbook ทุกครั้ง (เดิม) | "inprocess" = ใช้ session SSH ที่ pool ไว้ใน netmiko_final
+ANSIBLE_BACKEND = os.environ.get("ANSIBLE_BACKEND", "subprocess").strip().lower()
+# config ที่ใหญ่กว่านี้ (bytes) จะ gzip ก่อนส่ง, 0 = ไม่ gzip
+GZIP_THRESHOLD = int(os.environ.get("SHOWRUN_GZIP_BYTES", 256 * 1024))
+SPOOL_BYTES    = 1024 * 1024
+CHUNK_BYTES    = 64 * 1024
+# ถ้า config ไม่เปลี่ยนจาก snapshot ล่าสุด ไม่ต้องอัปโหลดซ้ำ
+SKIP_UNCHANGED = os.environ.get("SHOWRUN_SKIP_UNCHANGED", "1").strip() not in ("0", "false", "no")
+WEBEX_TEXT_LIMIT = 7000   # ข้อความ Webex ยาวกว่านี้ส่งเป็นไฟล์แทน
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ANS_DIR  = os.path.join(BASE_DIR, "ansible")
 HOSTS    = os.path.join(ANS_DIR, "hosts")
 PB_SHOW  = os.path.join(ANS_DIR, "playbook_showrun.yml")   # <-- ใช้ไฟล์แยกสำหรับ showrun
 
-def showrun():
-    """
-    ดึง 'show running-config' จาก IP ที่กำหนดใน ENV (ROUTER_IP หรือ SHOWRUN_IP)
-    แล้วบันทึกเป็นไฟล์ ansible/show_run_{STUDENT_ID}_{ROUTER_NAME}.txt
-    จากนั้นอัปโหลดไฟล์ขึ้น Webex
-    """
-    ip = os.getenv("ROUTER_IP") or os.getenv("SHOWRUN_IP") or ""
-    if not ip:
-        return "Error: No IP specified"
-
-    # ENV พื้นฐาน
+def _credentials() -> tuple[str, str, str]:
     user    = os.environ.get("ROUTER_USERNAME") or os.environ.get("ROUTER_USER") or "admin"
     pw      = os.environ.get("ROUTER_PASSWORD") or os.environ.get("ROUTER_PASS") or "cisco"
     enablep = os.environ.get("ROUTER_ENABLE", "")
+    return user, pw, enablep
+
+def _run_playbook(router_ip: str, play: str, **kwargs) -> subprocess.CompletedProcess:
+    """เขียน playbook ชั่วคราว รัน ansible-playbook กับ inventory ad-hoc "<ip>," แล้วลบไฟล์ทิ้ง"""
+    trial = health.guard(router_ip, "cli")   # SSH ของ router ล่มอยู่ → ไม่ต้องรอ ansible connect timeout
+    try:
+        with tempfile.NamedTemporaryFile("w", delete=False, suffix=".yml") as f:
+            f.write(play)
+            tmp_play = f.name
+        try:
+            # run() kill ansible-playbook ให้เองเมื่อ timeout
+            result = subprocess.run(
+                ["ansible-playbook", "-i", f"{router_ip},", tmp_play],
+                capture_output=True, text=True, timeout=deadline.cap(300), **kwargs
+            )
+        except subprocess.TimeoutExpired as e:
+            health.failure(router_ip, "cli", e)
+            raise deadline.DeadlineExceeded(deadline.current()[1] if deadline.current() else 300)
+        finally:
+            os.unlink(tmp_play)
+        # exit code 4 = host unreachable
+        if result.returncode == 4:
+            health.failure(router_ip, "cli", "ansible: host unreachable")
+        else:
+            health.success(router_ip, "cli")
+        return result
+    finally:
+        if trial:
+            health.release(router_ip, "cli")
 
-    # ตำแหน่งไฟล์ปลายทาง (ให้ตรงกับที่โค้ดหลักจะไปเปิดใช้งาน)
-    base_dir    = os.path.dirname(os.path.abspath(__file__))
-    ansible_dir = os.path.join(base_dir, "ansible")
-    os.makedirs(ansible_dir, exist_ok=True)
-    out_filename = f"show_run_{STUDENT_ID}_{ROUTER_NAME}.txt"
-    out_path     = os.path.join(ansible_dir, out_filename)
+# ---------------- backend: subprocess (ansible-playbook) ----------------
+def _fetch_subprocess(ip: str, out_path: str) -> bool:
+    user, pw, enablep = _credentials()
 
     # ad-hoc playbook: ใช้ network_cli + cisco.ios.ios_command
     playbook = f"""---
@@ -74,57 +108,16 @@ def showrun():
         dest: "{out_path}"
         mode: "0644"
 """
+    # บังคับ ENV ให้ ansible ไม่เช็ค host key
+    env = os.environ.copy()
+    env.setdefault("ANSIBLE_HOST_KEY_CHECKING", "False")
 
-    try:
-        # เขียน playbook ชั่วคราว
-        with tempfile.NamedTemporaryFile("w", delete=False, suffix=".yml") as f:
-            f.write(playbook)
-            tmp_play = f.name
+    result = _run_playbook(ip, playbook, cwd=os.path.dirname(out_path), env=env)
+    print((result.stdout or "") + "\n" + (result.stderr or ""))
+    return result.returncode == 0
 
-        # บังคับ ENV ให้ ansible ไม่เช็ค host key
-        env = os.environ.copy()
-        env.setdefault("ANSIBLE_HOST_KEY_CHECKING", "False")
-
-        # เรียก ansible-playbook ด้วย ad-hoc inventory "<ip>,"
-        cmd = ["ansible-playbook", "-i", f"{ip},", tmp_play]
-        result = subprocess.run(cmd, cwd=ansible_dir, capture_output=True, text=True, timeout=300, env=env)
-        print((result.stdout or "") + "\n" + (result.stderr or ""))
-
-        if result.returncode != 0:
-            return "Error: Ansible Error"
-
-        if not os.path.exists(out_path):
-            return f"Error: File {out_filename} not found"
-
-        # อัปโหลดไฟล์ขึ้น Webex
-        url = "https://webexapis.com/v1/messages"
-        headers = {"Authorization": f"Bearer {WEBEX_TOKEN}"}
-        with open(out_path, "rb") as f:
-            files = {
-                "roomId": (None, WEBEX_ROOM_ID),
-                "text": (None, "show running config"),
-                "files": (out_filename, f, "text/plain"),
-            }
-            resp = requests.post(url, headers=headers, files=files)
-
-        return ("Received message: sent running-config file completed"
-                if resp.status_code == 200
-                else f"Error sending file to Webex (HTTP {resp.status_code})")
-    except Exception as e:
-        return f"Error (showrun): {e}"
-
-
-
-def set_motd(router_ip: str, text: str) -> bool:
-    """
-    ตั้งค่า banner MOTD ด้วย Ansible collection cisco.ios (ad-hoc playbook)
-    - inventory ad-hoc "<ip>,"
-    - ใช้ block scalar (|-) รองรับเครื่องหมายคำพูด/หลายบรรทัด
-    - รองรับ enable password ถ้าตั้ง ROUTER_ENABLE ไว้
-    """
-    user    = os.environ.get("ROUTER_USERNAME") or os.environ.get("ROUTER_USER") or "admin"
-    pw      = os.environ.get("ROUTER_PASSWORD") or os.environ.get("ROUTER_PASS") or "cisco"
-    enablep = os.environ.get("ROUTER_ENABLE", "")
+def _set_motd_subprocess(router_ip: str, text: str) -> bool:
+    user, pw, enablep = _credentials()
 
     indented = "\n".join(("          " + line) for line in text.splitlines()) if text else "          "
     play = f"""---
@@ -150,19 +143,151 @@ def set_motd(router_ip: str, text: str) -> bool:
         text: |-
 {indented}
 """
+    r = _run_playbook(router_ip, play)
+    if r.returncode != 0:
+        print("[ansible motd] rc=", r.returncode)
+        print(r.stdout)
+        print(r.stderr)
+    return r.returncode == 0
+
+# ---------------- backend: inprocess (pooled Netmiko session) ----------------
+def _fetch_inprocess(ip: str):
+    config = netmiko_final.show_running_config(ip)
+    if not config or not config.rstrip().endswith("end"):
+        return None
+    return io.BytesIO(config.encode("utf-8"))
+
+def _set_motd_inprocess(router_ip: str, text: str) -> bool:
+    return netmiko_final.set_banner_motd(router_ip, text)
+
+_MOTD_BACKENDS = {
+    "subprocess": _set_motd_subprocess,
+    "inprocess":  _set_motd_inprocess,
+}
+
+@contextmanager
+def running_config_stream(ip: str, backend: str = ""):
+    """
+    with running_config_stream(ip) as f: ...
+    f = binary stream ของ running-config (None ถ้าดึงไม่สำเร็จ)
+    - inprocess: อยู่ใน memory ไม่มีไฟล์
+    - subprocess: ansible เขียนลงไฟล์ชื่อไม่ซ้ำต่อ request แล้วลบทิ้งเมื่อออกจาก with
+    """
+    if (backend or ANSIBLE_BACKEND) == "inprocess":
+        yield _fetch_inprocess(ip)
+        return
+
+    os.makedirs(ANS_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix=f".show_run_{tenant.current().student_id}_", suffix=".txt", dir=ANS_DIR)
+    os.close(fd)
     try:
-        with tempfile.NamedTemporaryFile("w", delete=False, suffix=".yml") as f:
-            f.write(play)
-            tmp_play = f.name
-        r = subprocess.run(
-            ["ansible-playbook", "-i", f"{router_ip},", tmp_play],
-            capture_output=True, text=True, timeout=300
-        )
-        if r.returncode != 0:
-            print("[ansible motd] rc=", r.returncode)
-            print(r.stdout)
-            print(r.stderr)
-        return r.returncode == 0
+        if _fetch_subprocess(ip, path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                yield f
+        else:
+            yield None
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+def _stream_size(f) -> int:
+    pos = f.tell()
+    f.seek(0, os.SEEK_END)
+    size = f.tell() - pos
+    f.seek(pos)
+    return size
+
+def _gzip_stream(f):
+    """บีบอัดแบบทีละ chunk ลง SpooledTemporaryFile (ใหญ่เกิน SPOOL_BYTES ค่อยลงดิสก์) memory คงที่"""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    with gzip.GzipFile(fileobj=spool, mode="wb") as gz:
+        shutil.copyfileobj(f, gz, CHUNK_BYTES)
+    spool.seek(0)
+    return spool
+
+def upload_config(f, filename: str, text: str = "show running config") -> requests.Response:
+    """ส่ง stream ขึ้น Webex เป็น multipart แบบ streaming (MultipartEncoder อ่านทีละ chunk ไม่โหลดทั้งไฟล์)"""
+    ctype = "text/plain"
+    if GZIP_THRESHOLD and _stream_size(f) > GZIP_THRESHOLD:
+        f = _gzip_stream(f)
+        filename, ctype = f"{filename}.gz", "application/gzip"
+    return get_client().post_file(tenant.current().room_id, text, f, filename, ctype)
+
+def showrun(ip: str = ""):
+    """
+    ดึง 'show running-config' จาก ip ที่ส่งมา (หรือจาก ENV ROUTER_IP / SHOWRUN_IP ถ้าไม่ได้ส่ง)
+    แล้วอัปโหลดขึ้น Webex เป็นไฟล์ show_run_{STUDENT_ID}_{ROUTER_NAME}.txt
+    (ไฟล์ใหญ่กว่า SHOWRUN_GZIP_BYTES จะส่งเป็น .txt.gz)
+    """
+    ip = ip or os.getenv("ROUTER_IP") or os.getenv("SHOWRUN_IP") or ""
+    if not ip:
+        return "Error: No IP specified"
+
+    out_filename = f"show_run_{tenant.current().student_id}_{ROUTER_NAME}.txt"
+    try:
+        with running_config_stream(ip) as f:
+            if f is None:
+                return "Error: Ansible Error"
+            entry, _ = snapshot_store.save(ip, f)
+            # ข้ามเฉพาะเมื่อ config เดียวกันนี้เคยถูกส่งเป็นไฟล์เข้าห้องนี้แล้วจริง (snapshot จาก showrun diff ไม่นับ)
+            sent = snapshot_store.last_uploaded(tenant.current().room_id, ip)
+            if SKIP_UNCHANGED and sent and sent["hash"] == entry["hash"]:
+                return (f"No change: running-config of {ip} is the same as the file sent at {sent['ts']} "
+                        f"(snapshot {entry['hash'][:12]})")
+            f.seek(0)
+            resp = upload_config(f, out_filename)
+
+        if resp.status_code != 200:
+            return f"Error sending file to Webex (HTTP {resp.status_code})"
+        snapshot_store.mark_uploaded(tenant.current().room_id, ip, entry)
+        return "Received message: sent running-config file completed"
+    except Exception as e:
+        return f"Error (showrun): {e}"
+
+
+
+def showrun_diff(ip: str, n: int = 1):
+    """
+    /SID <ip> showrun diff [n] — ส่งเฉพาะ unified diff เทียบกับ snapshot ก่อนหน้าลำดับที่ n
+    diff สั้นคืนเป็นข้อความ, diff ยาวอัปโหลดเป็นไฟล์เองแล้วคืน None
+    """
+    try:
+        with running_config_stream(ip) as f:
+            if f is None:
+                return "Error: Ansible Error"
+            text, base, entry = snapshot_store.diff(ip, f, n)
+    except LookupError as e:
+        return f"Error: {e}"
+    except Exception as e:
+        return f"Error (showrun diff): {e}"
+
+    if not text:
+        return f"No change: running-config of {ip} is the same as snapshot from {base['ts']}"
+    if len(text) <= WEBEX_TEXT_LIMIT:
+        return text
+    resp = upload_config(snapshot_store.as_stream(text), f"showrun_diff_{tenant.current().student_id}_{ip}.diff",
+                         text=f"running-config diff of {ip} since {base['ts']}")
+    return None if resp.status_code == 200 else f"Error sending file to Webex (HTTP {resp.status_code})"
+
+
+
+def set_motd(router_ip: str, text: str, backend: str = "") -> bool:
+    """
+    ตั้งค่า banner MOTD
+    - subprocess: Ansible collection cisco.ios (ad-hoc playbook, inventory "<ip>,")
+      ใช้ block scalar (|-) รองรับเครื่องหมายคำพูด/หลายบรรทัด และ enable password ถ้าตั้ง ROUTER_ENABLE ไว้
+    - inprocess: ส่ง 'banner motd' ผ่าน session Netmiko ที่ pool ไว้
+    """
+    set_fn = _MOTD_BACKENDS.get(backend or ANSIBLE_BACKEND, _set_motd_subprocess)
+    try:
+        ok = set_fn(router_ip, text)
+        CACHE.invalidate(router_ip, "motd")
+        return ok
+    except deadline.DeadlineExceeded:
+        CACHE.invalidate(router_ip, "motd")
+        raise
+    except health.CircuitOpen:
+        raise
     except Exception as e:
         print("ansible motd error:", e)
         return False
@@ -0,0 +1,145 @@
+# auto_transport.py
+# method "auto": เลือก RESTCONF / NETCONF ต่อ router จาก latency (EWMA) + อัตรา error ล่าสุด
+# ตัวที่เร็วกว่าและ circuit ยังไม่เปิดได้ก่อน ถ้าล้มระดับ transport จะสลับไปอีกตัวทันที
+import os
+import time
+import threading
+
+import restconf_final
+import netconf_final
+import netmiko_final
+import netconf_subscriber
+import health
+from deadline import DeadlineExceeded
+from state_cache import CACHE
+import tenant
+
+AUTO_EWMA_ALPHA     = float(os.environ.get("AUTO_EWMA_ALPHA", 0.3))
+AUTO_ERROR_PENALTY  = float(os.environ.get("AUTO_ERROR_PENALTY", 4))     # score = latency * (1 + penalty * error_rate)
+AUTO_EXPLORE_SECONDS = float(os.environ.get("AUTO_EXPLORE_SECONDS", 60))  # ตัวที่ไม่ได้ใช้นานกว่านี้ ลองวัดใหม่ได้
+AUTO_EXPLORE_EVERY  = int(os.environ.get("AUTO_EXPLORE_EVERY", 20))       # ลองวัดใหม่ได้ไม่เกิน 1 ครั้งต่อกี่คำสั่ง (ต่อ router)
+AUTO_PREFERENCE = [t.strip() for t in os.environ.get("AUTO_PREFERENCE", "restconf,netconf").split(",") if t.strip()]
+# gigabit_status: "auto" = interfaces-state ผ่าน API ก่อน แล้วค่อย CLI | "cli" = show ip interface brief อย่างเดียว
+GI_STATUS_SOURCE = os.environ.get("GI_STATUS_SOURCE", "auto").strip().lower()
+
+TRANSPORTS = {
+    "restconf": restconf_final.run_command,
+    "netconf": netconf_final.run_command,
+}
+
+class _Stats:
+    __slots__ = ("latency", "error_rate", "n", "errors", "last_used")
+
+    def __init__(self):
+        self.latency = None      # EWMA วินาที (None = ยังไม่เคยวัด)
+        self.error_rate = 0.0    # EWMA 0..1
+        self.n = 0
+        self.errors = 0
+        self.last_used = 0.0
+
+    def score(self) -> float:
+        return self.latency * (1 + AUTO_ERROR_PENALTY * self.error_rate)
+
+_stats = {}
+_picks = {}   # router -> จำนวนครั้งที่เรียก choose (นับรอบของการลองวัดใหม่)
+_lock = threading.Lock()
+
+def _get(router: str, transport: str) -> _Stats:
+    # เรียกภายใต้ _lock
+    st = _stats.get((router, transport))
+    if st is None:
+        st = _stats[(router, transport)] = _Stats()
+    return st
+
+def record(router: str, transport: str, ok: bool, latency: float = None) -> None:
+    a = AUTO_EWMA_ALPHA
+    with _lock:
+        st = _get(router, transport)
+        st.n += 1
+        st.last_used = time.monotonic()
+        st.error_rate = (1 - a) * st.error_rate + a * (0.0 if ok else 1.0)
+        if not ok:
+            st.errors += 1
+        elif latency is not None:
+            st.latency = latency if st.latency is None else (1 - a) * st.latency + a * latency
+
+def choose(router: str) -> list[str]:
+    """
+    ลำดับ transport ที่จะลอง: ตัวที่ยังไม่เคยวัดก่อน แล้วเรียงตาม score (ใช้ EWMA เดิมแม้จะเก่า); circuit เปิด = ท้ายสุด
+    ทุก AUTO_EXPLORE_EVERY ครั้ง ถ้าตัวอันดับสองไม่ได้ใช้นานกว่า AUTO_EXPLORE_SECONDS ให้ลองตัวนั้นก่อน 1 ครั้ง (วัดใหม่)
+    """
+    order = [t for t in AUTO_PREFERENCE if t in TRANSPORTS] + [t for t in TRANSPORTS if t not in AUTO_PREFERENCE]
+    now = time.monotonic()
+    def _key(t):
+        st = _stats.get((router, t))
+        if st is None or st.latency is None:
+            return (0, order.index(t))
+        return (1, st.score())
+    with _lock:
+        ranked = sorted(order, key=_key)
+        n = _picks[router] = _picks.get(router, 0) + 1
+        if AUTO_EXPLORE_EVERY > 0 and n % AUTO_EXPLORE_EVERY == 0 and len(ranked) > 1:
+            st = _stats.get((router, ranked[1]))
+            if st is not None and st.latency is not None and now - st.last_used > AUTO_EXPLORE_SECONDS:
+                ranked[0], ranked[1] = ranked[1], ranked[0]
+    healthy = [t for t in ranked if health.is_available(router, t)]
+    return healthy + [t for t in ranked if t not in healthy]
+
+def run(cmd: str, router_ip: str, refresh: bool = False) -> tuple[str, str]:
+    """รันคำสั่งด้วย transport ที่ดีที่สุดตอนนี้ คืน (ผลลัพธ์, transport ที่ใช้)"""
+    last_exc = None
+    for transport in choose(router_ip):
+        # status ที่ตอบจาก cache ไม่ได้วัดความเร็วของ transport → ไม่เก็บ latency
+        cached = cmd == "status" and not refresh and CACHE.contains(router_ip, f"status:{tenant.current().if_name_cfg}")
+        t0 = time.perf_counter()
+        try:
+            result = TRANSPORTS[transport](cmd, router_ip, refresh)
+        except DeadlineExceeded:
+            record(router_ip, transport, False)
+            CACHE.invalidate(router_ip)
+            raise   # หมดเวลาแล้ว ไม่มีงบให้ลองอีกตัว
+        except Exception as e:
+            if not isinstance(e, health.CircuitOpen):
+                record(router_ip, transport, False)
+            print(f"[auto] {transport} failed on {router_ip}: {str(e)[:120]}; trying next transport")
+            last_exc = e
+            continue
+        record(router_ip, transport, True, None if cached else time.perf_counter() - t0)
+        return result, transport
+    raise last_exc if last_exc else RuntimeError("no transport available")
+
+GI_STATUS = {
+    "restconf": restconf_final.gigabit_status,
+    "netconf": netconf_final.gigabit_status,
+}
+
+def gigabit_status(router_ip: str) -> str:
+    """
+    สรุปสถานะ Gi/Lo: ตารางสดจาก netconf_subscriber ก่อน, ไม่มีก็ลอง API ที่ reachable ตามลำดับ choose() (1 request, ข้อมูลแบบ structured)
+    ถ้าทุกตัวไม่ได้ (circuit เปิด / router ไม่เปิด API) ใช้ CLI แบบเดิม
+    """
+    live = netconf_subscriber.gigabit_status(router_ip)   # ตารางจาก subscription ยังสด → ไม่ต้องถาม router
+    if live:
+        return live
+    if GI_STATUS_SOURCE != "cli":
+        for transport in choose(router_ip):
+            if not health.is_available(router_ip, transport):
+                continue
+            try:
+                return GI_STATUS[transport](router_ip)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                print(f"[auto] gigabit_status via {transport} failed on {router_ip}: {str(e)[:120]}")
+    return netmiko_final.gigabit_status(router_ip)
+
+def summary_text() -> str:
+    with _lock:
+        items = sorted(_stats.items())
+    if not items:
+        return "Auto: no samples yet"
+    lines = ["Auto (latency ewma, error rate, n):"]
+    for (router, transport), st in items:
+        lat = f"{st.latency * 1000:.1f}ms" if st.latency is not None else "-"
+        lines.append(f"{router} {transport}: {lat}, {st.error_rate:.0%}, {st.n}")
+    return "\n".join(lines)
@@ -0,0 +1,45 @@
+# bench/bench_ansible_backends.py
+# เทียบเวลา showrun / set_motd ระหว่าง backend subprocess (ansible-playbook) กับ inprocess (Netmiko pool)
+#   python bench/bench_ansible_backends.py 10.0.15.61 --runs 5
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ansible_final  # noqa: E402
+
+def _time(fn, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        ok = fn()
+        out.append(time.perf_counter() - t0)
+        if not ok:
+            print("  run failed")
+    return out
+
+def _fetch(ip: str, backend: str) -> bool:
+    with ansible_final.running_config_stream(ip, backend) as f:
+        return f is not None and len(f.read()) > 0
+
+def _report(name: str, samples: list[float]) -> None:
+    print(f"{name:<28} first={samples[0]:7.3f}s  mean={statistics.mean(samples):7.3f}s  "
+          f"min={min(samples):7.3f}s  max={max(samples):7.3f}s")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("ip")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--motd", default="", help="ถ้าใส่ จะวัด set_motd ด้วย (เปลี่ยน config จริงบน router)")
+    a = ap.parse_args()
+
+    for backend in ("subprocess", "inprocess"):
+        _report(f"showrun [{backend}]", _time(lambda: _fetch(a.ip, backend), a.runs))
+        if a.motd:
+            _report(f"set_motd [{backend}]",
+                    _time(lambda: ansible_final.set_motd(a.ip, a.motd, backend), a.runs))
+
+if __name__ == "__main__":
+    main()
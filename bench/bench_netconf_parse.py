@@ -0,0 +1,143 @@
+# bench/bench_netconf_parse.py
+# เทียบการอ่าน reply ของ NETCONF: แบบเดิม (xmltodict.parse + ค้น substring) กับ netconf_xml (lxml XPath ที่ compile ไว้)
+# บน reply จำลองที่มี interface หลายตัว — วัดเวลา CPU ต่อครั้ง และหน่วยความจำที่จองเพิ่ม (tracemalloc)
+#   python bench/bench_netconf_parse.py --sizes 10,100,1000 --iterations 200
+#
+# "lxml (ncclient tree)" = ทางที่ใช้จริง: ncclient parse reply เป็น lxml tree อยู่แล้ว เราแค่รัน XPath บน tree นั้น
+# "lxml (parse+xpath)"   = parse จาก string เองด้วย (เทียบแบบไม่ได้ tree ฟรี)
+# tracemalloc นับเฉพาะ heap ของ Python — tree ของ libxml2 ไม่อยู่ในตัวเลข (แต่ ncclient สร้างไว้อยู่แล้วทั้งสองแบบ)
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import xmltodict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import netconf_xml  # noqa: E402
+from netconf_xml import NC, IF  # noqa: E402
+
+TARGET = "Loopback66070315"
+
+def make_reply(n: int) -> str:
+    """<rpc-reply> ที่มี interface n ตัว ทั้ง interfaces (config) และ interfaces-state; TARGET อยู่ท้ายสุด"""
+    names = [f"GigabitEthernet{i}" for i in range(1, n)] + [TARGET]
+    cfg = "".join(
+        f"<interface><name>{name}</name><description>port {i}</description>"
+        f'<type xmlns:ianaift="urn:ietf:params:xml:ns:yang:iana-if-type">ianaift:ethernetCsmacd</type>'
+        f"<enabled>{'false' if i % 7 == 0 else 'true'}</enabled>"
+        f'<ipv4 xmlns="urn:ietf:params:xml:ns:yang:ietf-ip"><address><ip>10.{i // 250}.{i % 250}.1</ip>'
+        f"<netmask>255.255.255.0</netmask></address></ipv4></interface>"
+        for i, name in enumerate(names))
+    state = "".join(
+        f"<interface><name>{name}</name><admin-status>{'down' if i % 7 == 0 else 'up'}</admin-status>"
+        f"<oper-status>{'down' if i % 5 == 0 else 'up'}</oper-status></interface>"
+        for i, name in enumerate(names))
+    return (f'<rpc-reply xmlns="{NC}" message-id="101"><data>'
+            f'<interfaces xmlns="{IF}">{cfg}</interfaces>'
+            f'<interfaces-state xmlns="{IF}">{state}</interfaces-state>'
+            f"</data></rpc-reply>")
+
+OK_REPLY = f'<rpc-reply xmlns="{NC}" message-id="102"><ok/></rpc-reply>'
+
+# ---------------- แบบเดิม (เหมือน netconf_final ก่อนเปลี่ยน) ----------------
+def _as_list(v):
+    return v if isinstance(v, list) else [v] if v else []
+
+def old_has_interface(xml: str) -> bool:
+    d = xmltodict.parse(xml)
+    return TARGET in xml and d is not None
+
+def old_status(xml: str):
+    if TARGET not in xml:
+        return None
+    data = (xmltodict.parse(xml).get("rpc-reply") or {}).get("data") or {}
+    cfg = next(it for it in _as_list(data["interfaces"]["interface"]) if it.get("name") == TARGET)
+    st = next(it for it in _as_list(data["interfaces-state"]["interface"]) if it.get("name") == TARGET)
+    return str(cfg.get("enabled", "false")).lower() == "true", st.get("oper-status", "down")
+
+def old_state_rows(xml: str):
+    data = (xmltodict.parse(xml).get("rpc-reply") or {}).get("data") or {}
+    return [(it.get("name", ""), it.get("admin-status"), it.get("oper-status"))
+            for it in _as_list((data.get("interfaces-state") or {}).get("interface"))]
+
+def old_names(xml: str):
+    data = (xmltodict.parse(xml).get("rpc-reply") or {}).get("data") or {}
+    return {it.get("name", "") for it in _as_list((data.get("interfaces") or {}).get("interface"))}
+
+def old_ok(xml: str) -> bool:
+    return "<ok/>" in xml
+
+# ---------------- netconf_xml ----------------
+def new_status(reply):
+    exists, enabled, oper = netconf_xml.interface_status(reply, TARGET)
+    return (enabled, oper or "down") if exists else None
+
+OPS = {
+    # op: (แบบเดิม, netconf_xml) — ทั้งสองรับ reply ของ interface n ตัว (ok รับ OK_REPLY)
+    "has_interface": (old_has_interface, lambda r: netconf_xml.has_interface(r, TARGET)),
+    "status":        (old_status, new_status),
+    "gigabit_rows":  (old_state_rows, netconf_xml.state_rows),
+    "list_names":    (old_names, netconf_xml.interface_names),
+    "edit_ok":       (old_ok, netconf_xml.is_ok),
+}
+
+def _time_per_call(fn, arg, iterations: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.process_time()
+        for _ in range(iterations):
+            fn(arg)
+        best = min(best, (time.process_time() - t0) / iterations)
+    return best
+
+def _alloc_peak(fn, arg) -> int:
+    """bytes สูงสุดที่ Python heap จองเพิ่มระหว่างเรียก fn ครั้งเดียว"""
+    fn(arg)   # warm-up (cache ของ XPath / import)
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - base
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10,100,1000", help="จำนวน interface ใน reply")
+    ap.add_argument("--iterations", type=int, default=200)
+    ap.add_argument("--ops", default=",".join(OPS))
+    args = ap.parse_args()
+
+    print(f"{'op':<14}{'ifaces':>7}  {'variant':<22}{'us/call':>10}{'speedup':>9}{'peak KiB':>10}")
+    for n in (int(s) for s in args.sizes.split(",") if s.strip()):
+        xml = make_reply(n)
+        tree = netconf_xml.root(xml)
+        ok_tree = netconf_xml.root(OK_REPLY)
+        for op in (o.strip() for o in args.ops.split(",") if o.strip()):
+            old, new = OPS[op]
+            src, parsed = (OK_REPLY, ok_tree) if op == "edit_ok" else (xml, tree)
+            assert _normal(old(src)) == _normal(new(parsed)), f"{op}: results differ"
+            iters = max(1, args.iterations * 10 // max(n, 10)) if op != "edit_ok" else args.iterations * 10
+            variants = [
+                ("old (xmltodict/substr)", old, src),
+                ("lxml (ncclient tree)", new, parsed),
+                ("lxml (parse+xpath)", new, src),
+            ]
+            base_t = None
+            for name, fn, arg in variants:
+                t = _time_per_call(fn, arg, iters)
+                base_t = base_t or t
+                peak = _alloc_peak(fn, arg)
+                print(f"{op:<14}{n:>7}  {name:<22}{t * 1e6:>10.1f}{base_t / t:>8.1f}x{peak / 1024:>10.1f}")
+        print()
+    return 0
+
+def _normal(v):
+    """ผลของแบบเดิมกับแบบใหม่ต้องตรงกัน (ไม่สนชนิด list/tuple และ None ของ leaf ที่ไม่มี)"""
+    if isinstance(v, list):
+        return [tuple(x or "" for x in row) for row in v]
+    return v
+
+if __name__ == "__main__":
+    sys.exit(main())
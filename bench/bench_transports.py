@@ -0,0 +1,195 @@
+# bench/bench_transports.py
+# micro-benchmark ของ restconf_final / netconf_final / netmiko_final กับ router จำลองบนเครื่อง (ไม่ต้องมี lab)
+#   python bench/bench_transports.py --iterations 50 --latency-ms 5 --fail-rate 0.02
+#   python bench/bench_transports.py --save baseline.json
+#   python bench/bench_transports.py --compare baseline.json --tolerance 0.25   (exit 1 ถ้าช้าลงเกิน)
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from fake_device import FakeDevice, Faults          # noqa: E402
+from fake_restconf import FakeRestconfServer        # noqa: E402
+from fake_netconf import FakeNetconfServer          # noqa: E402
+from fake_cli import FakeCliServer                  # noqa: E402
+
+ROUTER = "127.0.0.1"
+
+def _percentile(ordered: list[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}   # (transport, op) -> [(seconds, ok)]
+        self.wall = {}      # transport -> seconds
+        self._lock = threading.Lock()
+
+    def run(self, transport: str, op: str, fn, ok) -> None:
+        t0 = time.perf_counter()
+        try:
+            good = bool(ok(fn()))
+        except Exception:
+            good = False
+        dt = time.perf_counter() - t0
+        with self._lock:
+            self.samples.setdefault((transport, op), []).append((dt, good))
+
+    def summary(self) -> dict:
+        out = {}
+        for (transport, op), rows in sorted(self.samples.items()):
+            lat = sorted(dt for dt, _ in rows)
+            fails = sum(1 for _, good in rows if not good)
+            out[f"{transport}.{op}"] = {
+                "n": len(rows), "fail": fails,
+                "p50_ms": _percentile(lat, 50) * 1000, "p90_ms": _percentile(lat, 90) * 1000,
+                "p99_ms": _percentile(lat, 99) * 1000, "max_ms": lat[-1] * 1000,
+                "ops_per_s": len(rows) / sum(lat) if sum(lat) else 0.0,
+            }
+        for transport, wall in self.wall.items():
+            n = sum(len(r) for (t, _), r in self.samples.items() if t == transport)
+            out[f"{transport}.total"] = {"n": n, "wall_s": wall, "ops_per_s": n / wall if wall else 0.0}
+        return out
+
+def _cycle(mod):
+    """create → status → disable → status → enable → delete (ผลที่คาดหวังของแต่ละขั้น)"""
+    return [
+        ("create",  lambda: mod.handle_command("create", ROUTER),  lambda r: "successfully" in r),
+        ("status",  lambda: mod.handle_command("status", ROUTER, True), lambda r: r.endswith("is enabled")),
+        ("disable", lambda: mod.handle_command("disable", ROUTER), lambda r: "successfully" in r),
+        ("status",  lambda: mod.handle_command("status", ROUTER, True), lambda r: r.endswith("is disabled")),
+        ("enable",  lambda: mod.handle_command("enable", ROUTER),  lambda r: "successfully" in r),
+        ("delete",  lambda: mod.handle_command("delete", ROUTER),  lambda r: "successfully" in r),
+    ]
+
+def _cli_ops(mod):
+    return [
+        ("gigabit_status", lambda: mod.gigabit_status(ROUTER), lambda r: "->" in r),
+        ("read_motd", lambda: mod.read_motd(ROUTER, refresh=True), lambda r: r == "bench"),
+        ("show_running_config", lambda: mod.show_running_config(ROUTER), lambda r: r.rstrip().endswith("end")),
+    ]
+
+def _reads(transport: str, mod):
+    if transport == "cli":
+        return [op for op in _cli_ops(mod)]
+    return [("status", lambda: mod.handle_command("status", ROUTER, True), lambda r: "loopback" in r)]
+
+def bench_transport(rec: Recorder, transport: str, mod, iterations: int, concurrency: int) -> None:
+    t0 = time.perf_counter()
+    # 1) ลำดับการเขียน (ทีละคำสั่ง เพราะแก้ interface ตัวเดียวกัน)
+    if transport != "cli":
+        for _ in range(iterations):
+            for op, fn, ok in _cycle(mod):
+                rec.run(transport, op, fn, ok)
+    # 2) อ่านพร้อมกันหลาย thread
+    def _worker():
+        for _ in range(iterations):
+            for op, fn, ok in _reads(transport, mod):
+                rec.run(transport, f"{op}@c{concurrency}" if transport != "cli" else op, fn, ok)
+    threads = [threading.Thread(target=_worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    rec.wall[transport] = time.perf_counter() - t0
+
+def _print(summary: dict) -> None:
+    print(f"{'operation':<32}{'n':>6}{'fail':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'ops/s':>10}")
+    for name, st in summary.items():
+        if name.endswith(".total"):
+            print(f"{name:<32}{st['n']:>6}{'':>6}{'':>10}{'':>10}{'':>10}{'':>10}{st['ops_per_s']:>10.1f}"
+                  f"   (wall {st['wall_s']:.2f}s)")
+            continue
+        print(f"{name:<32}{st['n']:>6}{st['fail']:>6}{st['p50_ms']:>10.2f}{st['p90_ms']:>10.2f}"
+              f"{st['p99_ms']:>10.2f}{st['max_ms']:>10.2f}{st['ops_per_s']:>10.1f}")
+
+def _compare(summary: dict, baseline_path: str, tolerance: float) -> int:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    regressions = []
+    for name, st in summary.items():
+        old = base.get(name, {})
+        if "p50_ms" in st and old.get("p50_ms") and st["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {old['p50_ms']:.2f}ms -> {st['p50_ms']:.2f}ms")
+    for line in regressions:
+        print("REGRESSION", line)
+    return 1 if regressions else 0
+
+def _print_connections(transports, modules) -> None:
+    """connection ถูกใช้ซ้ำแค่ไหน (RESTCONF keep-alive / pool session ของ NETCONF และ CLI)"""
+    print()
+    if "restconf" in transports:
+        for router, st in sorted(modules["restconf"].connection_stats().items()):
+            print(f"restconf {router}: {st['requests']} requests over {st['connections']} connections "
+                  f"({st['reused']} reused)")
+    for t in ("netconf", "cli"):
+        if t in transports:
+            st = modules[t].POOL.stats()
+            print(f"{t}: {st['created']} sessions opened, {st['reused']} reused, {st['evicted']} evicted")
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--iterations", type=int, default=20)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--transports", default="restconf,netconf,cli")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="หน่วงทุก request/RPC/คำสั่งของ router จำลอง")
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="โอกาสที่ router จำลองตอบ error (0-1)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--save", help="บันทึกผลเป็น JSON (ใช้เป็น baseline)")
+    ap.add_argument("--compare", help="เทียบกับ baseline JSON")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    a = ap.parse_args()
+
+    faults = Faults(a.latency_ms / 1000, a.jitter_ms / 1000, a.fail_rate, a.seed)
+    device = FakeDevice(faults=faults)
+    device.motd = "bench"
+    transports = [t.strip() for t in a.transports.split(",") if t.strip()]
+
+    servers = []
+    if "restconf" in transports:
+        servers.append(FakeRestconfServer(device).start())
+        os.environ["RESTCONF_PORT"] = str(servers[-1].port)
+    if "netconf" in transports:
+        servers.append(FakeNetconfServer(device).start())
+        os.environ["NETCONF_PORT"] = str(servers[-1].port)
+    if "cli" in transports:
+        servers.append(FakeCliServer(device).start())
+        os.environ["SSH_PORT"] = str(servers[-1].port)
+    # วัดตัว transport จริง ไม่ใช่ state cache
+    os.environ["STATE_CACHE_TTL"] = "0"
+
+    # import หลังตั้ง ENV เพราะโมดูลอ่าน port ตอน import
+    import restconf_final
+    import netconf_final
+    import netmiko_final
+    modules = {"restconf": restconf_final, "netconf": netconf_final, "cli": netmiko_final}
+
+    rec = Recorder()
+    try:
+        for t in transports:
+            bench_transport(rec, t, modules[t], a.iterations, a.concurrency)
+    finally:
+        for srv in servers:
+            srv.stop()
+
+    summary = rec.summary()
+    _print(summary)
+    _print_connections(transports, modules)
+    if a.save:
+        with open(a.save, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=1)
+    if a.compare:
+        return _compare(summary, a.compare, a.tolerance)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
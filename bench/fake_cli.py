@@ -0,0 +1,173 @@
+# bench/fake_cli.py
+# SSH CLI จำลองแบบ IOS (prompt, echo, terminal length/width, show ip interface brief, banner motd)
+import socket
+import threading
+
+import paramiko
+
+from fake_device import FakeDevice
+
+class _Server(paramiko.ServerInterface):
+    def __init__(self):
+        self.shell = threading.Event()
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell.set()
+        return True
+
+class CliSession:
+    def __init__(self, device: FakeDevice, chan):
+        self.device = device
+        self.chan = chan
+        self.config_mode = False
+        self.banner_delim = None
+        self.banner_lines = []
+
+    def prompt(self) -> str:
+        return f"{self.device.hostname}(config)#" if self.config_mode else f"{self.device.hostname}#"
+
+    def send(self, text: str) -> None:
+        self.chan.sendall(text.replace("\n", "\r\n").encode())
+
+    def run(self) -> None:
+        self.send(f"\n{self.prompt()}")
+        buf = ""
+        while True:
+            data = self.chan.recv(4096)
+            if not data:
+                return
+            text = data.decode(errors="replace")
+            for ch in text:
+                if ch in "\r\n":
+                    if ch == "\n" and buf == "" and getattr(self, "_last_cr", False):
+                        self._last_cr = False
+                        continue
+                    self._last_cr = ch == "\r"
+                    line, buf = buf, ""
+                    self.send("\n")
+                    out = self.execute(line.strip())
+                    if out is None:
+                        return
+                    self.send(f"{out}\n{self.prompt()}" if out else self.prompt())
+                else:
+                    self._last_cr = False
+                    buf += ch
+                    self.chan.sendall(ch.encode())   # echo เหมือน terminal จริง (netmiko cmd_verify)
+
+    def execute(self, line: str):
+        dev = self.device
+        if self.banner_delim is not None:
+            return self._banner_line(line)
+        if not line:
+            return ""
+        dev.faults.delay()
+        if dev.faults.should_fail():
+            return "% Error: injected failure"
+        low = line.lower()
+        if low in ("exit", "quit", "logout") and not self.config_mode:
+            return None
+        if low.startswith(("terminal length", "terminal width", "terminal no")):
+            return ""
+        if low in ("configure terminal", "conf t"):
+            self.config_mode = True
+            return "Enter configuration commands, one per line.  End with CNTL/Z."
+        if low in ("end", "exit") and self.config_mode:
+            self.config_mode = False
+            return ""
+        if self.config_mode and low.startswith("banner motd"):
+            rest = line[len("banner motd"):].strip()
+            if not rest:
+                return "% Incomplete command."
+            self.banner_delim, self.banner_lines = rest[0], []
+            return self._banner_line(rest[1:])
+        if low == "show ip interface brief":
+            return dev.ip_interface_brief()
+        if low == "show running-config":
+            return dev.running_config()
+        if low == "show running-config | section banner":
+            return f"banner motd ^C{dev.motd}^C" if dev.motd else ""
+        if low == "show banner motd":
+            return dev.motd
+        if low.startswith("show version"):
+            return "Cisco IOS XE Software, Version 16.09.05 (fake)"
+        if self.config_mode:
+            return ""
+        return "% Invalid input detected at '^' marker."
+
+    def _banner_line(self, text: str) -> str:
+        if self.banner_delim in text:
+            self.banner_lines.append(text.split(self.banner_delim, 1)[0])
+            with self.device.lock:
+                self.device.motd = "\n".join(l for l in self.banner_lines).strip("\n")
+                self.device.version += 1
+            self.banner_delim = None
+        else:
+            self.banner_lines.append(text)
+        return ""
+
+class FakeCliServer:
+    """with FakeCliServer(device) as srv: ... srv.port"""
+
+    def __init__(self, device: FakeDevice, host: str = "127.0.0.1", port: int = 0):
+        self.device = device
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(32)
+        self.port = self.sock.getsockname()[1]
+        self._stopped = threading.Event()
+        self.logins = 0
+
+    def start(self) -> "FakeCliServer":
+        threading.Thread(target=self._accept_loop, name="fake-cli", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _accept_loop(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client) -> None:
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        iface = _Server()
+        try:
+            transport.start_server(server=iface)
+            chan = transport.accept(20)
+            if chan is None or not iface.shell.wait(10):
+                return
+            self.logins += 1
+            CliSession(self.device, chan).run()
+        except (EOFError, OSError, paramiko.SSHException):
+            pass
+        finally:
+            transport.close()
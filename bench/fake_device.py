@@ -0,0 +1,125 @@
+# bench/fake_device.py
+# สถานะของ router จำลอง (ใช้ร่วมกันระหว่าง fake RESTCONF / NETCONF / CLI) + การฉีด latency และ failure
+import time
+import random
+import threading
+
+class Faults:
+    """latency (วินาที) ก่อนตอบทุก request และโอกาสตอบ error (0.0 - 1.0)"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, fail_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> None:
+        if self.latency or self.jitter:
+            with self._lock:
+                extra = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+            time.sleep(self.latency + extra)
+
+    def should_fail(self) -> bool:
+        if not self.fail_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.fail_rate
+
+class FakeDevice:
+    def __init__(self, hostname: str = "CSR1kv-fake", gigabit: int = 4, loopbacks: int = 0,
+                 faults: Faults = None):
+        self.hostname = hostname
+        self.faults = faults or Faults()
+        self.lock = threading.RLock()
+        self.motd = ""
+        self.version = 1           # เพิ่มทุกครั้งที่ config เปลี่ยน (ใช้ทำ ETag)
+        self.interfaces = {}       # name -> dict
+        self._watchers = []        # fn() ถูกเรียกทุกครั้งที่สถานะ interface เปลี่ยน (fake NETCONF ใช้ส่ง push-update)
+        for i in range(1, gigabit + 1):
+            self.interfaces[f"GigabitEthernet{i}"] = {
+                "type": "iana-if-type:ethernetCsmacd",
+                "enabled": i != gigabit,           # ตัวสุดท้าย admin down ไว้ให้มีทั้งสองแบบ
+                "oper": "up" if i != gigabit else "down",
+                "description": "",
+                "ipv4": [{"ip": f"10.0.15.{60 + i}", "netmask": "255.255.255.0"}] if i == 1 else [],
+            }
+        for i in range(loopbacks):
+            self.add_interface(f"Loopback{i}", "iana-if-type:softwareLoopback", True, "", [])
+
+    # ---------------- model ----------------
+    def watch(self, fn) -> None:
+        self._watchers.append(fn)
+
+    def _changed(self) -> None:
+        self.version += 1
+        for fn in self._watchers:
+            fn()
+
+    def add_interface(self, name: str, if_type: str, enabled: bool, description: str, ipv4: list) -> None:
+        with self.lock:
+            self.interfaces[name] = {
+                "type": if_type or "iana-if-type:softwareLoopback",
+                "enabled": enabled,
+                "oper": "up" if enabled else "down",
+                "description": description or "",
+                "ipv4": ipv4 or [],
+            }
+            self._changed()
+
+    def delete_interface(self, name: str) -> bool:
+        with self.lock:
+            if self.interfaces.pop(name, None) is None:
+                return False
+            self._changed()
+            return True
+
+    def set_enabled(self, name: str, enabled: bool) -> bool:
+        with self.lock:
+            iface = self.interfaces.get(name)
+            if iface is None:
+                return False
+            iface["enabled"] = enabled
+            # loopback ขึ้นทันทีเมื่อ no shutdown, gigabit ตัวที่ไม่มีสายยังคง down
+            if iface["type"].endswith("softwareLoopback") or enabled is False:
+                iface["oper"] = "up" if enabled else "down"
+            self._changed()
+            return True
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {k: dict(v) for k, v in self.interfaces.items()}
+
+    # ---------------- CLI renderings ----------------
+    def ip_interface_brief(self) -> str:
+        rows = ["Interface              IP-Address      OK? Method Status                Protocol"]
+        for name, it in self.snapshot().items():
+            ip = it["ipv4"][0]["ip"] if it["ipv4"] else "unassigned"
+            status = "up" if it["enabled"] else "administratively down"
+            if it["enabled"] and it["oper"] != "up":
+                status = "down"
+            proto = "up" if it["oper"] == "up" else "down"
+            rows.append(f"{name:<23}{ip:<16}YES NVRAM  {status:<22}{proto}")
+        return "\n".join(rows)
+
+    def running_config(self) -> str:
+        lines = ["!", "version 16.9", f"hostname {self.hostname}", "!"]
+        for name, it in self.snapshot().items():
+            lines.append(f"interface {name}")
+            if it["description"]:
+                lines.append(f" description {it['description']}")
+            if it["ipv4"]:
+                for a in it["ipv4"]:
+                    lines.append(f" ip address {a['ip']} {a['netmask']}")
+            else:
+                lines.append(" no ip address")
+            if not it["enabled"]:
+                lines.append(" shutdown")
+            lines.append("!")
+        if self.motd:
+            lines.append(f"banner motd ^C{self.motd}^C")
+            lines.append("!")
+        lines.append("end")
+        body = "\n".join(lines)
+        return (f"Building configuration...\n\nCurrent configuration : {len(body)} bytes\n"
+                f"!\n! Last configuration change at {time.strftime('%H:%M:%S')} UTC\n{body}")
@@ -0,0 +1,319 @@
+# bench/fake_netconf.py
+# NETCONF server จำลองบน SSH (subsystem "netconf", base:1.0 framing ]]>]]>)
+# ตอบ get / get-config / edit-config / close-session จากสถานะใน FakeDevice
+# + establish-subscription (YANG-push แบบ IOS-XE): ส่ง push-update ของ interfaces-state ทุก period และทันทีที่สถานะเปลี่ยน
+import time
+import socket
+import datetime
+import threading
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+import paramiko
+
+from fake_device import FakeDevice
+
+NC = "urn:ietf:params:xml:ns:netconf:base:1.0"
+IF = "urn:ietf:params:xml:ns:yang:ietf-interfaces"
+IP = "urn:ietf:params:xml:ns:yang:ietf-ip"
+IANA = "urn:ietf:params:xml:ns:yang:iana-if-type"
+NOTIF = "urn:ietf:params:xml:ns:netconf:notification:1.0"
+EN = "urn:ietf:params:xml:ns:yang:ietf-event-notifications"
+YP = "urn:ietf:params:xml:ns:yang:ietf-yang-push"
+EOM = b"]]>]]>"
+
+HELLO = f"""<?xml version="1.0" encoding="UTF-8"?>
+<hello xmlns="{NC}">
+  <capabilities>
+    <capability>urn:ietf:params:netconf:base:1.0</capability>
+    <capability>urn:ietf:params:netconf:capability:notification:1.0</capability>
+    <capability>{IF}?module=ietf-interfaces&amp;revision=2014-05-08</capability>
+  </capabilities>
+  <session-id>{{session_id}}</session-id>
+</hello>"""
+
+def _q(ns: str, tag: str) -> str:
+    return f"{{{ns}}}{tag}"
+
+def _child(el, local: str):
+    """หา child ตาม local name (client บางตัวส่ง <config>/<filter> แบบไม่มี namespace)"""
+    for c in el:
+        if c.tag.split("}")[-1] == local:
+            return c
+    return None
+
+class RpcFailure(Exception):
+    def __init__(self, tag: str, message: str = ""):
+        super().__init__(message or tag)
+        self.tag = tag
+
+class _Server(paramiko.ServerInterface):
+    def __init__(self):
+        self.subsystem = threading.Event()
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_subsystem_request(self, channel, name):
+        if name != "netconf":
+            return False
+        self.subsystem.set()
+        return True
+
+class NetconfSession:
+    """หนึ่ง client = หนึ่ง session; send() ใช้ได้จาก thread อื่น (เช่นส่ง notification)"""
+
+    def __init__(self, server: "FakeNetconfServer", chan, session_id: int):
+        self.server = server
+        self.device = server.device
+        self.chan = chan
+        self.session_id = session_id
+        self.subscribed = threading.Event()
+        self.subscription_id = 0
+        self.period = 0.0          # วินาทีระหว่าง push-update (จาก <period> หน่วย centisecond)
+        self.next_push = 0.0
+        self._send_lock = threading.Lock()
+        self._buf = b""
+
+    def send(self, xml: str) -> None:
+        with self._send_lock:
+            self.chan.sendall(xml.encode() + EOM)
+
+    def _read_message(self):
+        while EOM not in self._buf:
+            data = self.chan.recv(65536)
+            if not data:
+                return None
+            self._buf += data
+        msg, self._buf = self._buf.split(EOM, 1)
+        return msg
+
+    def run(self) -> None:
+        self.send(HELLO.format(session_id=self.session_id))
+        if self._read_message() is None:   # hello ของ client
+            return
+        while True:
+            raw = self._read_message()
+            if raw is None:
+                return
+            try:
+                rpc = ET.fromstring(raw)
+            except ET.ParseError:
+                continue
+            mid = rpc.get("message-id", "")
+            op = next(iter(rpc), None)
+            if op is None:
+                continue
+            name = op.tag.split("}")[-1]
+            self.device.faults.delay()
+            try:
+                if self.device.faults.should_fail():
+                    raise RpcFailure("operation-failed", "injected failure")
+                body = self.server.handle(self, name, op)
+            except RpcFailure as e:
+                body = (f"<rpc-error><error-type>application</error-type><error-tag>{e.tag}</error-tag>"
+                        f"<error-severity>error</error-severity><error-message>{escape(str(e))}</error-message>"
+                        f"</rpc-error>")
+            self.send(f'<rpc-reply xmlns="{NC}" message-id="{mid}">{body}</rpc-reply>')
+            if name == "close-session":
+                return
+
+class FakeNetconfServer:
+    """with FakeNetconfServer(device) as srv: ... srv.port"""
+
+    def __init__(self, device: FakeDevice, host: str = "127.0.0.1", port: int = 0):
+        self.device = device
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(32)
+        self.port = self.sock.getsockname()[1]
+        self.sessions = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._changed = threading.Event()
+        self.handshakes = 0
+        self.pushes = 0
+        device.watch(self._changed.set)
+
+    # ---------------- lifecycle ----------------
+    def start(self) -> "FakeNetconfServer":
+        threading.Thread(target=self._accept_loop, name="fake-netconf", daemon=True).start()
+        threading.Thread(target=self._push_loop, name="fake-netconf-push", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def drop_subscriptions(self) -> int:
+        """ตัด session ที่ subscribe อยู่ทั้งหมด (จำลอง subscription หลุด) คืนจำนวนที่ตัด"""
+        with self._lock:
+            subs = [s for s in self.sessions if s.subscribed.is_set()]
+        for s in subs:
+            s.subscribed.clear()
+            s.chan.get_transport().close()   # ตัดทั้ง SSH เหมือน TCP หลุด
+        return len(subs)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _accept_loop(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client) -> None:
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        iface = _Server()
+        try:
+            transport.start_server(server=iface)
+            chan = transport.accept(20)
+            if chan is None or not iface.subsystem.wait(10):
+                return
+            with self._lock:
+                sid = self._next_id
+                self._next_id += 1
+                self.handshakes += 1
+            sess = NetconfSession(self, chan, sid)
+            with self._lock:
+                self.sessions.append(sess)
+            try:
+                sess.run()
+            finally:
+                with self._lock:
+                    self.sessions.remove(sess)
+        except (EOFError, OSError, paramiko.SSHException):
+            pass
+        finally:
+            transport.close()
+
+    # ---------------- RPC handlers ----------------
+    def handle(self, sess: NetconfSession, name: str, op) -> str:
+        if name in ("get", "get-config"):
+            return f"<data>{self._render(_child(op, 'filter'), with_state=(name == 'get'))}</data>"
+        if name == "edit-config":
+            self._edit(_child(op, "config"))
+            return "<ok/>"
+        if name == "close-session":
+            return "<ok/>"
+        if name == "establish-subscription":
+            return self._subscribe(sess, op)
+        return self.handle_extra(sess, name, op)
+
+    def handle_extra(self, sess: NetconfSession, name: str, op) -> str:
+        raise RpcFailure("operation-not-supported", f"{name} not supported")
+
+    # ---------------- YANG-push ----------------
+    def _subscribe(self, sess: NetconfSession, op) -> str:
+        period = _child(op, "period")
+        with self._lock:
+            sid = self._next_id * 1000 + len(self.sessions)
+        sess.subscription_id = sid
+        sess.period = int(period.text) / 100 if period is not None and (period.text or "").isdigit() else 10.0
+        sess.next_push = time.monotonic() + sess.period
+        sess.subscribed.set()
+        return (f'<subscription-result xmlns="{EN}" xmlns:notif-bis="{EN}">notif-bis:ok</subscription-result>'
+                f'<subscription-id xmlns="{EN}">{sid}</subscription-id>')
+
+    def _push_loop(self) -> None:
+        while not self._stopped.is_set():
+            changed = self._changed.wait(0.05)
+            self._changed.clear()
+            now = time.monotonic()
+            with self._lock:
+                subs = [s for s in self.sessions if s.subscribed.is_set()]
+            content = None
+            for s in subs:
+                if not changed and now < s.next_push:
+                    continue
+                content = content or self._render(None, with_state=True, cfg=False)
+                s.next_push = now + s.period
+                event_time = datetime.datetime.now(datetime.timezone.utc).isoformat()
+                try:
+                    s.send(f'<notification xmlns="{NOTIF}"><eventTime>{event_time}</eventTime>'
+                           f'<push-update xmlns="{YP}"><subscription-id>{s.subscription_id}</subscription-id>'
+                           f"<datastore-contents-xml>{content}</datastore-contents-xml></push-update></notification>")
+                    self.pushes += 1
+                except (OSError, EOFError):
+                    s.subscribed.clear()
+
+    def _render(self, filt, with_state: bool, cfg: bool = True) -> str:
+        want_cfg, want_state, names = cfg, with_state, None
+        if filt is not None and len(filt):
+            want_cfg = filt.find(_q(IF, "interfaces")) is not None
+            want_state = with_state and filt.find(_q(IF, "interfaces-state")) is not None
+            names = {n.text for n in filt.iter(_q(IF, "name")) if n.text} or None
+
+        ifaces = {n: it for n, it in self.device.snapshot().items() if names is None or n in names}
+        out = []
+        if want_cfg:
+            out.append(f'<interfaces xmlns="{IF}">')
+            for n, it in ifaces.items():
+                addr = "".join(f"<address><ip>{a['ip']}</ip><netmask>{a['netmask']}</netmask></address>"
+                               for a in it["ipv4"])
+                desc = f"<description>{escape(it['description'])}</description>" if it["description"] else ""
+                if_type = it["type"].split(":")[-1]
+                out.append(f"<interface><name>{n}</name>{desc}"
+                           f'<type xmlns:ianaift="{IANA}">ianaift:{if_type}</type>'
+                           f"<enabled>{'true' if it['enabled'] else 'false'}</enabled>"
+                           f'<ipv4 xmlns="{IP}">{addr}</ipv4></interface>')
+            out.append("</interfaces>")
+        if want_state:
+            out.append(f'<interfaces-state xmlns="{IF}">')
+            for n, it in ifaces.items():
+                out.append(f"<interface><name>{n}</name>"
+                           f"<admin-status>{'up' if it['enabled'] else 'down'}</admin-status>"
+                           f"<oper-status>{it['oper']}</oper-status></interface>")
+            out.append("</interfaces-state>")
+        return "".join(out)
+
+    def _edit(self, config) -> None:
+        if config is None:
+            raise RpcFailure("missing-element", "config")
+        dev = self.device
+        edits = [(iface, iface.findtext(_q(IF, "name")),
+                  iface.get(_q(NC, "operation")) or iface.get("operation") or "merge")
+                 for iface in config.iter(_q(IF, "interface"))]
+        with dev.lock:
+            # ตรวจทั้ง edit-config ก่อน แล้วค่อยแก้ (error = ไม่มีอะไรเปลี่ยน เหมือน router จริง)
+            for _, name, operation in edits:
+                exists = name in dev.interfaces
+                if operation == "create" and exists:
+                    raise RpcFailure("data-exists", name)
+                if operation == "delete" and not exists:
+                    raise RpcFailure("data-missing", name)
+            for iface, name, operation in edits:
+                exists = name in dev.interfaces
+                if operation in ("delete", "remove"):
+                    if not exists:
+                        continue
+                    dev.delete_interface(name)
+                    continue
+                enabled = iface.findtext(_q(IF, "enabled"))
+                if not exists:
+                    if_type = (iface.findtext(_q(IF, "type")) or "softwareLoopback").split(":")[-1]
+                    ipv4 = [{"ip": a.findtext(_q(IP, "ip")), "netmask": a.findtext(_q(IP, "netmask"))}
+                            for a in iface.iter(_q(IP, "address"))]
+                    dev.add_interface(name, f"iana-if-type:{if_type}", enabled != "false",
+                                      iface.findtext(_q(IF, "description")) or "", ipv4)
+                elif enabled is not None:
+                    dev.set_enabled(name, enabled == "true")
@@ -0,0 +1,276 @@
+# bench/fake_restconf.py
+# RESTCONF server จำลอง (HTTPS, keep-alive) ที่รองรับ path ietf-interfaces ที่ restconf_final ใช้
+import os
+import ssl
+import json
+import datetime
+import tempfile
+import threading
+from urllib.parse import unquote, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fake_device import FakeDevice
+
+DATA = "/restconf/data"
+CFG = f"{DATA}/ietf-interfaces:interfaces"
+STATE = f"{DATA}/ietf-interfaces:interfaces-state"
+CTYPE = "application/yang-data+json"
+
+def _self_signed_cert(directory: str) -> tuple[str, str]:
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "fake-restconf")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name)
+            .public_key(key.public_key()).serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=30))
+            .sign(key, hashes.SHA256()))
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                  serialization.NoEncryption()))
+    return cert_path, key_path
+
+def _cfg_json(name: str, it: dict) -> dict:
+    out = {"name": name, "type": it["type"], "enabled": it["enabled"]}
+    if it["description"]:
+        out["description"] = it["description"]
+    if it["ipv4"]:
+        out["ietf-ip:ipv4"] = {"address": it["ipv4"]}
+    return out
+
+def _state_json(name: str, it: dict) -> dict:
+    return {"name": name, "type": it["type"],
+            "admin-status": "up" if it["enabled"] else "down",
+            "oper-status": it["oper"]}
+
+def _parse_iface(body: dict) -> dict:
+    it = body.get("ietf-interfaces:interface", body)
+    if isinstance(it, list):
+        it = it[0]
+    return it
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive เหมือน router จริง
+    disable_nagle_algorithm = True  # header กับ body ส่งแยก write ไม่ให้ติด delayed ACK
+    device: FakeDevice = None
+
+    def log_message(self, fmt, *args):
+        pass
+
+    # ---------------- helpers ----------------
+    def _etag(self) -> str:
+        return f'"{self.device.version}"'
+
+    def _send(self, code: int, body: dict = None) -> None:
+        raw = json.dumps(body).encode() if body is not None else b""
+        self.send_response(code)
+        self.send_header("ETag", self._etag())
+        if raw:
+            self.send_header("Content-Type", CTYPE)
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        if raw:
+            self.wfile.write(raw)
+
+    def _body(self) -> dict:
+        n = int(self.headers.get("Content-Length", 0) or 0)
+        if not n:
+            return {}
+        try:
+            return json.loads(self.rfile.read(n))
+        except ValueError:
+            return {}
+
+    def _route(self):
+        path = unquote(urlsplit(self.path).path)
+        for root, kind in ((STATE, "state"), (CFG, "cfg")):
+            if path == root:
+                return kind, None
+            if path.startswith(f"{root}/interface="):
+                return kind, path[len(f"{root}/interface="):]
+        return None, None
+
+    def _pre(self) -> bool:
+        """latency/failure injection + ตรวจ precondition; คืน False ถ้าตอบไปแล้ว"""
+        self.device.faults.delay()
+        if self.device.faults.should_fail():
+            self._send(503, {"errors": {"error": [{"error-tag": "resource-denied"}]}})
+            return False
+        return True
+
+    def _precondition_failed(self, exists: bool) -> bool:
+        if_match = self.headers.get("If-Match")
+        if if_match and if_match != self._etag():
+            self._send(412)
+            return True
+        if self.headers.get("If-None-Match") == "*" and exists:
+            self._send(412)
+            return True
+        return False
+
+    # ---------------- verbs ----------------
+    def do_GET(self):
+        if not self._pre():
+            return
+        kind, name = self._route()
+        ifaces = self.device.snapshot()
+        render = _state_json if kind == "state" else _cfg_json
+        if kind is None:
+            return self._send(404)
+        if name is None:
+            key = "ietf-interfaces:interfaces-state" if kind == "state" else "ietf-interfaces:interfaces"
+            return self._send(200, {key: {"interface": [render(n, it) for n, it in ifaces.items()]}})
+        if name not in ifaces:
+            return self._send(404)
+        return self._send(200, {"ietf-interfaces:interface": render(name, ifaces[name])})
+
+    def do_POST(self):
+        if not self._pre():
+            return
+        kind, name = self._route()
+        if kind != "cfg" or name is not None:
+            return self._send(405)
+        it = _parse_iface(self._body())
+        with self.device.lock:
+            if it.get("name") in self.device.interfaces:
+                return self._send(409)
+            self._create(it)
+        self._send(201)
+
+    def do_PUT(self):
+        if not self._pre():
+            return
+        kind, name = self._route()
+        if kind != "cfg" or name is None:
+            return self._send(405)
+        it = _parse_iface(self._body())
+        with self.device.lock:
+            exists = name in self.device.interfaces
+            if self._precondition_failed(exists):
+                return
+            it["name"] = name
+            self._create(it)
+        self._send(204 if exists else 201)
+
+    def do_PATCH(self):
+        if not self._pre():
+            return
+        kind, name = self._route()
+        if kind != "cfg":
+            return self._send(405)
+        body = self._body()
+        if "yang-patch" in (self.headers.get("Content-Type") or ""):
+            return self._yang_patch(body)
+        with self.device.lock:
+            if name is None:
+                # merge ทั้ง collection (bulk) — สร้างตัวที่ยังไม่มี, แก้ตัวที่มี
+                items = body.get("ietf-interfaces:interfaces", {}).get("interface", [])
+                if self._precondition_failed(True):
+                    return
+                for it in items:
+                    self._merge(it)
+                return self._send(204)
+            if name not in self.device.interfaces:
+                return self._send(404)
+            if self._precondition_failed(True):
+                return
+            it = _parse_iface(body)
+            it["name"] = name
+            self._merge(it)
+        self._send(204)
+
+    def do_DELETE(self):
+        if not self._pre():
+            return
+        kind, name = self._route()
+        if kind != "cfg" or name is None:
+            return self._send(405)
+        with self.device.lock:
+            if name not in self.device.interfaces:
+                return self._send(404)
+            if self._precondition_failed(True):
+                return
+            self.device.delete_interface(name)
+        self._send(204)
+
+    def _yang_patch(self, body: dict) -> None:
+        """RFC 8072 แบบย่อ: edit create/merge/delete/remove บน /interface=<name> ทั้งชุดแบบ atomic"""
+        patch = body.get("ietf-yang-patch:yang-patch", {})
+        edits = patch.get("edit", [])
+        with self.device.lock:
+            for e in edits:
+                name = unquote(e.get("target", "")).rpartition("interface=")[2]
+                exists = name in self.device.interfaces
+                tag = {"create": "data-exists" if exists else "",
+                       "delete": "" if exists else "data-missing"}.get(e.get("operation"), "")
+                if tag:
+                    return self._send(409, {"ietf-yang-patch:yang-patch-status": {
+                        "patch-id": patch.get("patch-id", ""),
+                        "edit-status": {"edit": [{"edit-id": e.get("edit-id"),
+                                                  "errors": {"error": [{"error-tag": tag}]}}]}}})
+            for e in edits:
+                name = unquote(e.get("target", "")).rpartition("interface=")[2]
+                if e.get("operation") in ("delete", "remove"):
+                    if name in self.device.interfaces:
+                        self.device.delete_interface(name)
+                    continue
+                it = _parse_iface(e.get("value", {}))
+                it["name"] = name
+                self._merge(it)
+        self._send(200, {"ietf-yang-patch:yang-patch-status": {"patch-id": patch.get("patch-id", ""), "ok": [None]}})
+
+    # ---------------- model updates ----------------
+    def _create(self, it: dict) -> None:
+        self.device.add_interface(it.get("name", ""), it.get("type", ""), bool(it.get("enabled", True)),
+                                  it.get("description", ""),
+                                  (it.get("ietf-ip:ipv4") or {}).get("address", []))
+
+    def _merge(self, it: dict) -> None:
+        name = it.get("name", "")
+        if name not in self.device.interfaces:
+            self._create(it)
+            return
+        if "enabled" in it:
+            self.device.set_enabled(name, bool(it["enabled"]))
+        if "description" in it:
+            self.device.interfaces[name]["description"] = it["description"]
+
+class FakeRestconfServer:
+    """with FakeRestconfServer(device) as srv: ... srv.port"""
+
+    def __init__(self, device: FakeDevice, host: str = "127.0.0.1", port: int = 0):
+        handler = type("Handler", (_Handler,), {"device": device})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._tmp = tempfile.TemporaryDirectory()
+        cert, key = _self_signed_cert(self._tmp.name)
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(cert, key)
+        self.httpd.socket = ctx.wrap_socket(self.httpd.socket, server_side=True)
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def start(self) -> "FakeRestconfServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-restconf", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._tmp.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,117 @@
+# bulk_loopback.py
+# "/SID <ip> create 10-50" / "/SID <ip> delete all-student": สร้าง/ลบ loopback หลายตัวใน transaction เดียวต่อ router
+# อ่าน 1 ครั้ง (ตัวไหนมีอยู่แล้ว) + เขียน 1 ครั้ง (RESTCONF PATCH บน collection หรือ NETCONF edit-config เดียว)
+import os
+import time
+
+import restconf_final
+import netconf_final
+import auto_transport
+import health
+from health import CircuitOpen
+from deadline import DeadlineExceeded
+from state_cache import CACHE
+import tenant
+
+BULK_MAX = int(os.environ.get("BULK_MAX", 100))   # จำนวน loopback สูงสุดต่อคำสั่ง
+ALL_STUDENT = "all-student"
+
+MODULES = {"restconf": restconf_final, "netconf": netconf_final}
+LABELS = {"restconf": "Restconf", "netconf": "Netconf"}
+
+def parse_range(spec: str) -> list[int]:
+    """"10-50" หรือ "10,12,20-25" → [10, 11, ...] (1..254, ไม่ซ้ำ) ผิดรูปแบบ → ValueError"""
+    nums = set()
+    for part in spec.split(","):
+        lo, sep, hi = part.strip().partition("-")
+        if not lo.isdigit() or (sep and not hi.isdigit()):
+            raise ValueError(f"bad range '{part.strip()}'")
+        a, b = int(lo), int(hi) if sep else int(lo)
+        if a > b or a < 1 or b > 254:
+            raise ValueError(f"range '{part.strip()}' must be within 1-254")
+        nums.update(range(a, b + 1))
+    if len(nums) > BULK_MAX:
+        raise ValueError(f"at most {BULK_MAX} loopbacks per command")
+    return sorted(nums)
+
+def _apply(mod, op: str, router_ip: str, nums: list[int]):
+    """อ่านครั้งเดียว + เขียนครั้งเดียว คืน (ok, error, [(n, ผล)])"""
+    t = tenant.current()
+    existing = mod.list_interfaces(router_ip)   # {name: description}
+    # ชื่อ bulk ซ้ำกันได้ระหว่าง SID ที่ 3 ตัวท้ายเหมือนกัน → ของเราต้อง description ตรงด้วย
+    mine = lambda n: existing.get(t.bulk_name(n)) == t.bulk_description(n)
+    if op == "create":
+        todo = [n for n in nums if t.bulk_name(n) not in existing]
+        ok, err = mod.bulk_edit(router_ip, create=[{
+            "name": t.bulk_name(n),
+            "description": t.bulk_description(n),
+            "ip": t.bulk_ip(n),
+            "netmask": "255.255.255.255",
+        } for n in todo]) if todo else (True, "")
+        done = "created"
+    else:
+        if nums is None:   # all-student = bulk loopback ของคนนี้ที่มีอยู่จริงเท่านั้น
+            nums = sorted(n for n in map(t.bulk_index, existing) if n is not None and mine(n))
+        todo = [n for n in nums if mine(n)]
+        ok, err = mod.bulk_edit(router_ip, delete=[t.bulk_name(n) for n in todo]) if todo else (True, "")
+        done = "deleted"
+    def _skipped(n):
+        if t.bulk_name(n) in existing and not mine(n):
+            return "used by another student"
+        return "exists" if op == "create" else "not found"
+    results = [(n, (done if ok else "failed") if n in todo else _skipped(n)) for n in nums]
+    return ok, err, results
+
+def _attempt(op: str, router_ip: str, nums, method: str):
+    """ลอง transport ตามลำดับ (auto = ตาม auto_transport.choose + failover) คืน (transport, ok, error, results)"""
+    auto = method == "auto"
+    last_exc = None
+    for transport in (auto_transport.choose(router_ip) if auto else [method]):
+        t0 = time.perf_counter()
+        try:
+            ok, err, results = _apply(MODULES[transport], op, router_ip, nums)
+        except DeadlineExceeded:
+            if auto:
+                auto_transport.record(router_ip, transport, False)
+            raise
+        except Exception as e:
+            if not auto:
+                raise
+            if not isinstance(e, health.CircuitOpen):
+                auto_transport.record(router_ip, transport, False)
+            print(f"[bulk] {transport} failed on {router_ip}: {str(e)[:120]}; trying next transport")
+            last_exc = e
+            continue
+        finally:
+            CACHE.invalidate(router_ip)
+        if auto:
+            auto_transport.record(router_ip, transport, True, time.perf_counter() - t0)
+        return transport, ok, err, results
+    raise last_exc if last_exc else RuntimeError("no transport available")
+
+def run(op: str, router_ip: str, spec: str, method: str) -> str:
+    t = tenant.current()
+    try:
+        nums = None if op == "delete" and spec.lower() == ALL_STUDENT else parse_range(spec)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    t0 = time.perf_counter()
+    try:
+        transport, ok, err, results = _attempt(op, router_ip, nums, method)
+    except (DeadlineExceeded, CircuitOpen):
+        raise
+    except Exception as e:
+        return f"Error: Bulk {op} on {router_ip} failed: {str(e)[:200]}"
+    elapsed = time.perf_counter() - t0
+
+    counts = {}
+    for _, r in results:
+        counts[r] = counts.get(r, 0) + 1
+    head = (f"Bulk {op} {spec} on {router_ip} using {LABELS[transport]}: "
+            + (", ".join(f"{c} {r}" for r, c in counts.items()) or "nothing to do")
+            + f" ({elapsed:.2f}s)")
+    if not ok:
+        head += f"\nNothing changed (transaction rejected): {err}"
+    lines = [f"{t.bulk_name(n)} {t.bulk_ip(n)}/32: {r}" for n, r in results]
+    return "\n".join([head] + lines)
@@ -0,0 +1,63 @@
+# deadline.py
+# เวลาที่เหลือของคำสั่งหนึ่ง ๆ (ต่อ thread) — transport ใช้จำกัด timeout / retry / backoff ไม่ให้เกินงบ
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+COMMAND_TIMEOUT = float(os.environ.get("COMMAND_TIMEOUT", 30))     # คำสั่ง interface / motd / gi-status
+SHOWRUN_TIMEOUT = float(os.environ.get("SHOWRUN_TIMEOUT", 180))    # showrun (ansible + upload)
+MOTD_SET_TIMEOUT = float(os.environ.get("MOTD_SET_TIMEOUT", 180))  # motd <text> (ansible-playbook)
+
+class DeadlineExceeded(Exception):
+    def __init__(self, budget: float = None):
+        self.budget = budget
+        super().__init__(f"timed out after {budget:g}s" if budget else "timed out")
+
+_local = threading.local()
+
+def current():
+    """คืน (deadline แบบ monotonic, งบทั้งหมด) ของ thread นี้ หรือ None ถ้าไม่มี"""
+    return getattr(_local, "deadline", None)
+
+@contextmanager
+def bind(dl):
+    """ใช้ deadline เดิมต่อใน thread อื่น (เช่น worker ของ executor)"""
+    saved = current()
+    _local.deadline = dl
+    try:
+        yield
+    finally:
+        _local.deadline = saved
+
+@contextmanager
+def within(seconds: float):
+    """ตั้ง deadline ใหม่ภายใน with — ถ้ามี deadline ที่สั้นกว่าอยู่แล้วจะใช้อันเดิม"""
+    dl = (time.monotonic() + seconds, seconds)
+    outer = current()
+    if outer is not None and outer[0] <= dl[0]:
+        dl = outer
+    with bind(dl):
+        yield
+
+def remaining():
+    """วินาทีที่เหลือ (None = ไม่มี deadline)"""
+    dl = current()
+    return None if dl is None else dl[0] - time.monotonic()
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+def check() -> None:
+    if expired():
+        raise DeadlineExceeded(current()[1])
+
+def cap(timeout: float) -> float:
+    """timeout ที่ไม่เกินเวลาที่เหลือ; หมดเวลาแล้ว → DeadlineExceeded"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded(current()[1])
+    return min(timeout, left) if timeout is not None else left
@@ -0,0 +1,131 @@
+# executor.py
+# worker pool สำหรับรันคำสั่งต่อ router: router ต่างกันรันขนานกันได้, router เดียวกันรันทีละคำสั่งตามลำดับ
+import os
+import time
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import deadline
+
+EXECUTOR_WORKERS   = int(os.environ.get("EXECUTOR_WORKERS", 5))
+EXECUTOR_MAX_QUEUE = int(os.environ.get("EXECUTOR_MAX_QUEUE", 20))   # ต่อ router
+# watchdog ตอบ "timed out" ให้เองถ้างานยังไม่จบหลัง deadline + grace (เช่น ค้างใน call ที่คุม timeout ไม่ได้)
+WATCHDOG_GRACE     = float(os.environ.get("EXECUTOR_WATCHDOG_GRACE", 2))
+
+class QueueFull(Exception):
+    pass
+
+class _Job:
+    __slots__ = ("fn", "on_done", "enqueued", "deadline", "timer", "delivered", "lock")
+
+    def __init__(self, fn, on_done, timeout=None):
+        self.fn = fn
+        self.on_done = on_done
+        self.enqueued = time.time()
+        # deadline เริ่มนับตั้งแต่เข้าคิว: เวลารอคิวก็นับรวมในงบของคำสั่ง
+        self.deadline = (time.monotonic() + timeout, timeout) if timeout else None
+        self.timer = None
+        self.delivered = False
+        self.lock = threading.Lock()
+
+    def deliver(self, result) -> bool:
+        """ส่งผลให้ on_done ครั้งเดียว (ผลจริงหรือ timeout จาก watchdog แล้วแต่อันไหนมาก่อน)"""
+        with self.lock:
+            if self.delivered:
+                return False
+            self.delivered = True
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.on_done is not None:
+            self.on_done(result)
+        return True
+
+class CommandExecutor:
+    """
+    submit(key, fn, on_done, timeout) — key คือ router IP
+    - งานของ key เดียวกันเข้าคิว deque ของตัวเอง และส่งเข้า pool ทีละงาน
+    - on_done(result) ถูกเรียกทันทีที่งานนั้นเสร็จ (บน worker thread)
+    - timeout: fn รันภายใต้ deadline.bind(...) ให้ transport คุม timeout/retry เอง;
+      ถ้ายังไม่จบหลัง timeout + WATCHDOG_GRACE จะเรียก on_done("Error: timed out ...") แทน
+      (router นั้นยังถือว่าไม่ว่างจนกว่า fn จะคืนจริง ไม่รันงานถัดไปซ้อน)
+    """
+
+    def __init__(self, max_workers: int = EXECUTOR_WORKERS, max_queue: int = EXECUTOR_MAX_QUEUE):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cmd")
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._pending = defaultdict(deque)
+        self._busy = set()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._timed_out = 0
+
+    def submit(self, key: str, fn, on_done=None, timeout: float = None) -> None:
+        with self._lock:
+            if len(self._pending[key]) >= self._max_queue:
+                raise QueueFull(key)
+            job = _Job(fn, on_done, timeout)
+            if timeout:
+                job.timer = threading.Timer(timeout + WATCHDOG_GRACE, self._expire, (key, job))
+                job.timer.daemon = True
+                job.timer.start()
+            self._pending[key].append(job)
+            self._queued += 1
+            if key not in self._busy:
+                self._busy.add(key)
+                self._start_next(key)
+
+    def _start_next(self, key: str) -> None:
+        # เรียกภายใต้ self._lock เท่านั้น
+        job = self._pending[key].popleft()
+        if not self._pending[key]:
+            del self._pending[key]
+        self._queued -= 1
+        self._in_flight += 1
+        self._pool.submit(self._run, key, job)
+
+    def _expire(self, key: str, job: _Job) -> None:
+        try:
+            if job.deliver(f"Error: {deadline.DeadlineExceeded(job.deadline[1])}"):
+                with self._lock:
+                    self._timed_out += 1
+                print(f"[executor] watchdog: job for {key} still running after {job.deadline[1]:g}s")
+        except Exception as e:
+            print(f"[executor] on_done failed for {key}: {e}")
+
+    def _run(self, key: str, job: _Job) -> None:
+        try:
+            with deadline.bind(job.deadline):
+                # หมดเวลาตั้งแต่ยังอยู่ในคิว → ไม่รันเลย (ผู้ใช้ได้ "timed out" ไปแล้ว ห้ามไปแก้ config ทีหลัง)
+                deadline.check()
+                result = job.fn()
+        except Exception as e:
+            result = f"Error: {e}"
+        try:
+            job.deliver(result)
+        except Exception as e:
+            print(f"[executor] on_done failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                if self._pending.get(key):
+                    self._start_next(key)
+                else:
+                    self._busy.discard(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self._max_workers,
+                "queued": self._queued,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "timed_out": self._timed_out,
+                "per_router": {k: len(v) for k, v in self._pending.items()},
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
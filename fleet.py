@@ -0,0 +1,60 @@
+# fleet.py
+# รันคำสั่งเดียวกันกับ router ทุกตัวพร้อมกัน แล้วรวมผลเป็นข้อความเดียว
+import os
+import time
+import threading
+
+BASE_DIR      = os.path.dirname(os.path.abspath(__file__))
+HOSTS         = os.path.join(BASE_DIR, "ansible", "hosts")
+FLEET_GROUP   = os.environ.get("FLEET_GROUP", "iosxe").strip()
+FLEET_TIMEOUT = float(os.environ.get("FLEET_TIMEOUT", 60))
+
+def load_inventory(path: str = HOSTS, group: str = FLEET_GROUP) -> list[str]:
+    """อ่าน host ของ [group] จากไฟล์ inventory แบบ INI (ansible/hosts)"""
+    hosts, current = [], None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith(("#", ";")):
+                    continue
+                if line.startswith("[") and line.endswith("]"):
+                    current = line[1:-1]
+                    continue
+                if current == group:
+                    hosts.append(line.split()[0])
+    except OSError:
+        return []
+    return hosts
+
+class Gather:
+    """
+    รวมผลของ /SID all ... ที่ส่งเข้า EXECUTOR เป็นงานแยกต่อ router (ใช้คิวต่อ router / worker pool เดียวกับคำสั่งอื่น)
+    done(ip, ok, result) ถูกเรียกเมื่องานของ router นั้นจบ (ผลจริง / timeout จาก watchdog / คิวเต็ม)
+    on_complete(results, elapsed) ถูกเรียกครั้งเดียวเมื่อ router ตัวสุดท้ายได้ผล; results = {ip: (ok, result)}
+    """
+
+    def __init__(self, ips, on_complete):
+        self._waiting = set(ips)
+        self._results = {}
+        self._on_complete = on_complete
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def done(self, ip: str, ok: bool, result) -> None:
+        with self._lock:
+            if ip not in self._waiting:
+                return
+            self._waiting.discard(ip)
+            self._results[ip] = (ok, result)
+            if self._waiting:
+                return
+        self._on_complete(self._results, time.perf_counter() - self._t0)
+
+def format_results(title: str, results: dict, elapsed: float) -> str:
+    ok = sum(1 for good, _ in results.values() if good)
+    lines = [f"{title}: {ok}/{len(results)} routers ok ({elapsed:.2f}s)"]
+    for ip in sorted(results):
+        _, text = results[ip]
+        lines.append(f"{ip}: {text if text else '-'}")
+    return "\n".join(lines)
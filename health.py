@@ -0,0 +1,183 @@
+# health.py
+# circuit breaker ต่อ (router, transport) + probe TCP เบื้องหลัง
+# router ที่ล่มจะตอบ error ทันทีแทนการรอ connect timeout + retry ทุกคำสั่ง
+import os
+import time
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+HEALTH_FAIL_THRESHOLD = int(os.environ.get("HEALTH_FAIL_THRESHOLD", 3))       # ล้มติดกันกี่ครั้งถึงเปิด circuit
+HEALTH_OPEN_SECONDS   = float(os.environ.get("HEALTH_OPEN_SECONDS", 30))      # เปิดค้างนานเท่าไรก่อนให้ลอง 1 ครั้ง
+HEALTH_PROBE_INTERVAL = float(os.environ.get("HEALTH_PROBE_INTERVAL", 10))    # 0 = ไม่ probe
+HEALTH_PROBE_TIMEOUT  = float(os.environ.get("HEALTH_PROBE_TIMEOUT", 1))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+# transport -> port (แต่ละโมดูลลงทะเบียนเองตอน import)
+PORTS = {}
+
+class CircuitOpen(Exception):
+    def __init__(self, router: str, transport: str, retry_in: float):
+        self.router = router
+        self.transport = transport
+        super().__init__(f"router {router} is unreachable via {transport} "
+                         f"(circuit open, retry in {max(retry_in, 0):.0f}s)")
+
+class Breaker:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0          # ล้มติดกัน
+        self.opened_at = 0.0
+        self.trial = False         # half-open: มีคำสั่งทดลองอยู่แล้ว
+        self.ok = 0
+        self.failed = 0
+        self.last_error = ""
+        self.last_probe = None     # True/False/None (ยังไม่เคย probe)
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.trial = False
+
+    def retry_in(self) -> float:
+        return self.opened_at + HEALTH_OPEN_SECONDS - time.monotonic()
+
+_breakers = {}
+_lock = threading.Lock()
+
+def register(transport: str, port: int) -> None:
+    PORTS[transport] = port
+
+def _get(router: str, transport: str) -> Breaker:
+    # เรียกภายใต้ _lock
+    b = _breakers.get((router, transport))
+    if b is None:
+        b = _breakers[(router, transport)] = Breaker()
+    return b
+
+def guard(router: str, transport: str) -> bool:
+    """
+    เรียกก่อนคุยกับ router: circuit เปิดอยู่ → CircuitOpen ทันที
+    คืน True ถ้าคำสั่งนี้เป็นคำสั่งทดลองของ half-open → ผู้เรียกต้อง release() ใน finally
+    """
+    with _lock:
+        b = _get(router, transport)
+        if b.state == CLOSED:
+            return False
+        if b.state == OPEN and b.retry_in() <= 0:
+            b.state = HALF_OPEN
+        if b.state == HALF_OPEN and not b.trial:
+            b.trial = True     # ปล่อยผ่าน 1 คำสั่งเพื่อทดสอบ
+            return True
+        raise CircuitOpen(router, transport, b.retry_in())
+
+def release(router: str, transport: str) -> None:
+    """
+    คำสั่งทดลองจบโดยไม่ได้ success/failure (error อื่น เช่น rpc-error, login ไม่ผ่าน)
+    → ปล่อย trial ให้คำสั่งถัดไปทดลองแทน ไม่งั้น half-open ค้างปฏิเสธทุกคำสั่งจนกว่า probe จะปิดให้
+    """
+    with _lock:
+        b = _get(router, transport)
+        if b.state == HALF_OPEN:
+            b.trial = False
+
+def success(router: str, transport: str) -> None:
+    with _lock:
+        b = _get(router, transport)
+        b.ok += 1
+        b.failures = 0
+        b.state = CLOSED
+        b.trial = False
+
+def failure(router: str, transport: str, error=None) -> None:
+    with _lock:
+        b = _get(router, transport)
+        b.failed += 1
+        b.failures += 1
+        b.last_error = str(error or "")[:120]
+        if b.state == HALF_OPEN or b.failures >= HEALTH_FAIL_THRESHOLD:
+            if b.state != OPEN:
+                print(f"[health] circuit open: {router} {transport} ({b.failures} failures: {b.last_error})")
+            b._open()
+
+def is_available(router: str, transport: str) -> bool:
+    with _lock:
+        b = _breakers.get((router, transport))
+        return b is None or b.state == CLOSED or (b.state == OPEN and b.retry_in() <= 0)
+
+# ---------------- background probe ----------------
+def probe(router: str, port: int, timeout: float = HEALTH_PROBE_TIMEOUT) -> bool:
+    try:
+        with socket.create_connection((router, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+def _probe_once(router: str, transport: str, port: int) -> None:
+    up = probe(router, port)
+    with _lock:
+        b = _get(router, transport)
+        b.last_probe = up
+        if up and b.state != CLOSED:
+            # port กลับมาตอบแล้ว → ปิด circuit ให้คำสั่งถัดไปลองได้เลย
+            print(f"[health] circuit closed by probe: {router} {transport}")
+            b.state = CLOSED
+            b.failures = 0
+            b.trial = False
+    if not up:
+        failure(router, transport, f"tcp/{port} probe failed")
+
+def probe_all(routers) -> None:
+    jobs = [(r, t, p) for r in routers for t, p in PORTS.items()]
+    if not jobs:
+        return
+    with ThreadPoolExecutor(max_workers=min(len(jobs), 16), thread_name_prefix="probe") as pool:
+        list(pool.map(lambda j: _probe_once(*j), jobs))
+
+def start_probe(routers, interval: float = HEALTH_PROBE_INTERVAL):
+    if interval <= 0:
+        return None
+    routers = sorted(routers)
+    def _loop():
+        while True:
+            try:
+                probe_all(routers)
+            except Exception as e:
+                print(f"[health] probe error: {e}")
+            time.sleep(interval)
+    t = threading.Thread(target=_loop, name="health-probe", daemon=True)
+    t.start()
+    return t
+
+# ---------------- report ----------------
+def snapshot() -> dict:
+    """{router: {transport: {...}}}"""
+    out = {}
+    with _lock:
+        for (router, transport), b in _breakers.items():
+            out.setdefault(router, {})[transport] = {
+                "state": b.state, "failures": b.failures, "ok": b.ok, "failed": b.failed,
+                "last_error": b.last_error, "last_probe": b.last_probe,
+                "retry_in": max(b.retry_in(), 0) if b.state == OPEN else 0,
+            }
+    return out
+
+def summary_text(routers=()) -> str:
+    snap = snapshot()
+    lines = []
+    for router in sorted(set(routers) | set(snap)):
+        parts = []
+        for transport in sorted(set(PORTS) | set(snap.get(router, {}))):
+            st = snap.get(router, {}).get(transport)
+            if st is None:
+                parts.append(f"{transport} unknown")
+                continue
+            probe_txt = {True: "probe ok", False: "probe failed", None: "not probed"}[st["last_probe"]]
+            text = f"{transport} {st['state']}"
+            if st["state"] == OPEN:
+                text += f" (retry in {st['retry_in']:.0f}s)"
+            text += f" [{st['ok']} ok/{st['failed']} fail, {probe_txt}]"
+            parts.append(text)
+        lines.append(f"{router}: " + ", ".join(parts))
+    return "Health:\n" + "\n".join(lines) if lines else "Health: no routers"
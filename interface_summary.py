@@ -0,0 +1,31 @@
+# interface_summary.py
+# ข้อความสรุปของ gigabit_status — ใช้ร่วมกันทั้ง CLI (show ip interface brief) และ RESTCONF/NETCONF (interfaces-state)
+PREFIXES = (("GigabitEthernet", "Gi"), ("Loopback", "Lo"))
+UP, DOWN, ADMIN_DOWN = "up", "down", "administratively down"
+
+def state(admin: str, oper: str) -> str:
+    """admin-status/oper-status (ietf-interfaces) → up | down | administratively down"""
+    if (admin or "").lower() == "down":
+        return ADMIN_DOWN
+    return UP if (oper or "").lower() == "up" else DOWN
+
+def wanted(name: str) -> bool:
+    return name.startswith(tuple(p for p, _ in PREFIXES))
+
+def summarize(rows) -> str:
+    """
+    rows = [(ชื่อ interface, state)] ตามลำดับของ router
+      -> "GigabitEthernet1 up, GigabitEthernet2 administratively down, Loopback66070315 up
+          -> Gi: 1 up, 0 down, 1 admin-down | Lo: 1 up, 0 down, 0 admin-down"
+    """
+    counts = {short: {UP: 0, DOWN: 0, ADMIN_DOWN: 0} for _, short in PREFIXES}
+    lines_out = []
+    for name, st in rows:
+        for prefix, short in PREFIXES:
+            if name.startswith(prefix):
+                counts[short][st] += 1
+                lines_out.append(f"{name} {st}")
+                break
+    summary = " | ".join(f"{short}: {c[UP]} up, {c[DOWN]} down, {c[ADMIN_DOWN]} admin-down"
+                         for short, c in counts.items())
+    return f"{', '.join(lines_out)} -> {summary}"
@@ -6,8 +6,8 @@
 
 import os
 import time
-import json
-import requests
+import threading
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -15,36 +15,66 @@ import restconf_final
 import netconf_final
 import netmiko_final
 import ansible_final
+import webhook_server
+import fleet
+import auto_transport
+import bulk_loopback
+import netconf_subscriber
+import job_queue
+import metrics
+import deadline
+import health
+import tenant
+from message_cursor import MessageCursor
+from webex_client import get_client
+from executor import CommandExecutor, QueueFull
+from state_cache import CACHE
 
-ACCESS_TOKEN = os.environ.get("WEBEX_TOKEN", "")
-STUDENT_ID = os.environ.get("STUDENT_ID", "").strip()
-if not STUDENT_ID:
-    raise RuntimeError("Missing STUDENT_ID in environment variables.")
-
-roomIdToGetMessages = os.environ.get("WEBEX_ROOM_ID", "")
-if not roomIdToGetMessages:
-    raise RuntimeError("Missing WEBEX_ROOM_ID in environment variables.")
+# (roomId, student ID) -> Tenant — จาก STUDENT_ROOMS หรือ STUDENT_ID + WEBEX_ROOM_ID คู่เดียว
+TENANTS = {t.key: t for t in tenant.load_tenants()}
+if not TENANTS:
+    raise RuntimeError("Missing STUDENT_ID / WEBEX_ROOM_ID (or STUDENT_ROOMS) in environment variables.")
+ROOMS = sorted({room for room, _ in TENANTS})
 
 # ============================ CONFIG ============================
 ALLOWED_IPS = {"10.0.15.61", "10.0.15.62", "10.0.15.63", "10.0.15.64", "10.0.15.65"}
-CURRENT_METHOD = None   # "restconf" | "netconf"
+METHODS = {}   # tenant.key -> "restconf" | "netconf" | "auto" (แต่ละคนเลือกของตัวเอง)
+INGEST_MODE = os.environ.get("INGEST_MODE", "poll").strip().lower()   # "poll" | "webhook"
+POLL_INTERVAL = float(os.environ.get("POLL_INTERVAL", 1))
+POLL_PAGE_SIZE = int(os.environ.get("POLL_PAGE_SIZE", 50))
+LATENCY_WINDOW = int(os.environ.get("LATENCY_WINDOW", 200))
+WEBEX = get_client()
+FRESH_FLAG = "--fresh"
+EXECUTOR = CommandExecutor()
+# router สำหรับคำสั่ง "/SID all ..." = group [iosxe] ใน ansible/hosts ที่อยู่ใน ALLOWED_IPS
+FLEET_IPS = sorted(set(fleet.load_inventory()) & ALLOWED_IPS) or sorted(ALLOWED_IPS)
 # ===============================================================
 
-def set_method(m):
-    global CURRENT_METHOD
-    if m not in ("restconf", "netconf"):
+LABELS = {"restconf": "Restconf", "netconf": "Netconf", "auto": "Auto"}
+
+def set_method(m, t: tenant.Tenant):
+    if m not in LABELS:
         return "Error: No method specified"
-    CURRENT_METHOD = m
-    return "Ok: Restconf" if m == "restconf" else "Ok: Netconf"
+    METHODS[t.key] = m
+    return f"Ok: {LABELS[m]}"
 
 def dispatch_command(method: str, router_ip: str, cmd: str, args: list[str]) -> str:
-    """ส่งต่อคำสั่งไปยังโมดูลตาม method (ส่วนที่ 1)"""
-    label = "Restconf" if method == "restconf" else "Netconf"
+    """ส่งต่อคำสั่งไปยังโมดูลตาม method (ส่วนที่ 1); method "auto" ให้ auto_transport เลือกแล้วบอกตัวที่ใช้จริง"""
+    refresh = FRESH_FLAG in args   # "/SID <ip> status --fresh" = ไม่ใช้ค่าใน cache
 
-    if method == "restconf":
-        base = restconf_final.handle_command(cmd, router_ip)
+    if cmd == "status" and not refresh and method in ("netconf", "auto"):
+        # ตารางจาก NETCONF subscription ยังสด → ตอบได้เลยไม่ต้องถาม router
+        live = netconf_subscriber.status(router_ip)
+        if live:
+            return f"{live} (checked by {LABELS['netconf']})"
+
+    if method == "auto":
+        base, method = auto_transport.run(cmd, router_ip, refresh)
+    elif method == "restconf":
+        base = restconf_final.handle_command(cmd, router_ip, refresh)
     else:
-        base = netconf_final.handle_command(cmd, router_ip)
+        base = netconf_final.handle_command(cmd, router_ip, refresh)
+    label = LABELS[method]
 
     if cmd in ("create", "delete", "enable", "disable"):
         if "successfully" in base:
@@ -58,43 +88,153 @@ def dispatch_command(method: str, router_ip: str, cmd: str, args: list[str]) ->
 
 
 # ===============================================================
-# MAIN LOOP
+# MESSAGE HANDLING
 # ===============================================================
-while True:
-    time.sleep(1)
-    getParameters = {"roomId": roomIdToGetMessages, "max": 1}
-    getHTTPHeader = {"Authorization": f"Bearer {ACCESS_TOKEN}"}
-
-    r = requests.get("https://webexapis.com/v1/messages",
-                     params=getParameters, headers=getHTTPHeader)
-    if r.status_code != 200:
-        continue
-
-    data = r.json()
-    items = data.get("items", [])
-    if not items:
-        continue
+def _motd_job(ip: str, args: list[str]):
+    if args and args != [FRESH_FLAG]:
+        ok = ansible_final.set_motd(ip, " ".join(args))
+        return "Ok: success" if ok else "Error: failed to configure MOTD"
+    motd = netmiko_final.read_motd(ip, refresh=bool(args))
+    return motd if motd else "Error: No MOTD Configured"
 
-    message = items[0].get("text", "") or ""
-    print("Received message:", message)
+def _gigabit_job(ip: str):
+    result = auto_transport.gigabit_status(ip)   # interfaces-state ผ่าน API ถ้าได้, ไม่งั้น CLI
+    return result or "Error: gi-status failed"
+
+def _showrun_job(ip: str, args: list[str]):
+    if args and args[0].lower() == "diff":
+        n = int(args[1]) if len(args) > 1 and args[1].isdigit() else 1
+        return ansible_final.showrun_diff(ip, n)
+    result = ansible_final.showrun(ip)   # ฟังก์ชันนี้จะโพสต์ไฟล์ + "show running config" เอง
+    # โพสต์เองแล้วถ้าสำเร็จ; กรณีอื่น (error / config ไม่เปลี่ยน) ตอบกลับเป็นข้อความ
+    return None if result.startswith("Received message:") else result
+
+# งานยาวที่เก็บลง job_queue (มีเลข job, รันต่อได้หลังรีสตาร์ต): kind -> fn(ip, args)
+DURABLE = {"showrun": _showrun_job, "motd": _motd_job}
+# งบเวลาของงานใน DURABLE ตาม kind (ไม่ใช่ชื่อคำสั่ง: "motd" อ่านเฉย ๆ ใช้ COMMAND_TIMEOUT แต่ตั้ง MOTD ผ่าน ansible นานกว่ามาก)
+DURABLE_TIMEOUTS = {"showrun": deadline.SHOWRUN_TIMEOUT, "motd": deadline.MOTD_SET_TIMEOUT}
+
+def _fleet_fn(cmd: str, args: list[str], method):
+    """/SID all ...: คืน (title, fn(ip)) — fn รันแยกต่อ router บน EXECUTOR (ดู _submit_fleet)"""
+    if cmd == "status":
+        return "status", lambda ip: dispatch_command(method, ip, "status", [])
+    if cmd in ("gigabit_status", "gi-status", "gigabit"):
+        return "gigabit_status", _gigabit_job
+    return ("motd" if not args else "motd set"), lambda ip: _motd_job(ip, args)
+
+def _cache_stats() -> str:
+    st = CACHE.stats()
+    return (f"Cache: {st['hits']} hits, {st['misses']} misses ({st['hit_ratio']:.0%}), "
+            f"{st['size']} entries, {st['evictions']} evicted, ttl={st['ttl']:g}s")
+
+def _connection_stats() -> str:
+    """การใช้ connection ซ้ำ: keep-alive ของ RESTCONF ต่อ router + pool session ของ NETCONF / SSH"""
+    lines = ["Connections:"]
+    for router, st in sorted(restconf_final.connection_stats().items()):
+        lines.append(f"restconf {router}: {st['requests']} requests over {st['connections']} connections "
+                     f"({st['reused']} reused)")
+    for name, pool in (("netconf", netconf_final.POOL), ("cli", netmiko_final.POOL)):
+        st = pool.stats()
+        lines.append(f"{name}: {st['created']} sessions opened, {st['reused']} reused, {st['evicted']} evicted")
+    return "\n".join(lines)
+
+def _queue_stats() -> str:
+    st = EXECUTOR.stats()
+    return (f"Queue: {st['queued']} queued, {st['in_flight']} in flight, {st['completed']} done, "
+            f"{st['timed_out']} timed out ({st['workers']} workers)")
+
+KNOWN_COMMANDS = {"create", "delete", "enable", "disable", "status", "motd", "showrun", "show-run",
+                  "gigabit_status", "gi-status", "gigabit", "restconf", "netconf", "auto",
+                  "queue", "cache", "stats", "health", "jobs"}
+
+def command_label(message: str) -> str:
+    """ชื่อคำสั่งสำหรับ label ของ metrics (ไม่เอา IP / ข้อความอิสระมาเป็น label)"""
+    tokens = [tok.lower() for tok in message.split()[1:]]
+    if tokens and (tokens[0] == "all" or tokens[0].count(".") == 3):
+        prefix = "all " if tokens[0] == "all" else ""
+        tokens = tokens[1:]
+    else:
+        prefix = ""
+    if not tokens:
+        return ""
+    return prefix + (tokens[0] if tokens[0] in KNOWN_COMMANDS else "other")
 
-    if not message.startswith(f"/{STUDENT_ID}"):
-        continue
+def timeout_for(command: str) -> float:
+    """งบเวลาของคำสั่ง (นับตั้งแต่เข้าคิว) — หมดแล้วผู้ใช้ได้ "Error: timed out ..." แทนการรอเงียบ"""
+    if command in ("showrun", "show-run"):
+        return deadline.SHOWRUN_TIMEOUT
+    if command.startswith("all "):
+        return fleet.FLEET_TIMEOUT
+    return deadline.COMMAND_TIMEOUT
 
-    tail = message[len(f"/{STUDENT_ID}"):].strip()
+def find_tenant(message: str, room_id: str):
+    """ข้อความ "/SID ..." ในห้อง room_id เป็นของ tenant ไหน (None = ไม่ใช่คำสั่งของเรา)"""
+    if not message.startswith("/"):
+        return None
+    parts = message[1:].split(None, 1)   # "/" หรือ "/ " → ว่าง
+    return TENANTS.get((room_id, parts[0])) if parts else None
+
+def handle_message(message: str, t: tenant.Tenant):
+    """
+    แปลงข้อความ "/SID ..." ของ tenant t เป็นคำสั่ง
+    คืน (reply, job): reply = ข้อความตอบทันที (None = ไม่ต้องโพสต์)
+                      job = (router_ip, fn) สำหรับงานที่ต้องคุยกับ router → ส่งเข้า EXECUTOR
+                            หรือ (router_ip, (kind, args)) สำหรับงานยาวใน DURABLE → บันทึกลง job_queue ก่อน
+                            หรือ ("all", (title, fn(ip))) สำหรับคำสั่ง fleet → งานละ router
+                      (fn รันภายใต้ tenant.bind(t) จึงได้ชื่อ/IP loopback ของคนนั้น)
+    """
+    if not message.startswith(f"/{t.student_id}"):
+        return None, None
+
+    tail = message[len(f"/{t.student_id}"):].strip()
     if not tail:
-        continue
+        return None, None
+    current_method = METHODS.get(t.key)
 
     tokens = tail.split()
     reply = None  # ถ้า None จะไม่ส่งโพสต์ซ้ำ (เช่น showrun ที่ส่งไฟล์ในฟังก์ชันแล้ว)
+    job = None
 
     # --- /SID showrun (ไม่มี IP) ---
     if len(tokens) == 1 and tokens[0].lower() == "showrun":
         reply = "Error: No IP specified"
 
-    # --- /SID restconf | netconf ---
-    elif len(tokens) == 1 and tokens[0].lower() in ("restconf", "netconf"):
-        reply = set_method(tokens[0].lower())
+    # --- /SID restconf | netconf | auto ---
+    elif len(tokens) == 1 and tokens[0].lower() in LABELS:
+        reply = set_method(tokens[0].lower(), t)
+
+    # --- /SID queue ---
+    elif len(tokens) == 1 and tokens[0].lower() == "queue":
+        reply = _queue_stats()
+
+    # --- /SID cache ---
+    elif len(tokens) == 1 and tokens[0].lower() == "cache":
+        reply = _cache_stats()
+
+    # --- /SID stats ---
+    elif len(tokens) == 1 and tokens[0].lower() == "stats":
+        reply = f"{metrics.summary_text()}\n{_connection_stats()}"
+
+    # --- /SID jobs ---
+    elif len(tokens) == 1 and tokens[0].lower() == "jobs":
+        reply = job_queue.summary_text(job_queue.JOBS.active(t.room_id, t.student_id))
+
+    # --- /SID health ---
+    elif len(tokens) == 1 and tokens[0].lower() == "health":
+        reply = f"{health.summary_text(ALLOWED_IPS)}\n{auto_transport.summary_text()}"
+        if netconf_subscriber.NETCONF_SUBSCRIBE:
+            reply += f"\n{netconf_subscriber.summary_text()}"
+
+    # --- /SID all <status|gigabit_status|motd [text]> ---
+    elif tokens[0].lower() == "all":
+        cmd = tokens[1].lower() if len(tokens) > 1 else ""
+        args = tokens[2:]
+        if cmd not in ("status", "motd", "gigabit_status", "gi-status", "gigabit"):
+            reply = "Error: No command found."
+        elif cmd == "status" and current_method is None:
+            reply = "Error: No method specified"
+        else:
+            job = ("all", _fleet_fn(cmd, args, current_method))
 
     # --- /SID <IP> ---
     elif len(tokens) == 1 and tokens[0].count(".") == 3:
@@ -108,45 +248,260 @@ while True:
 
         # ✅ MOTD — ใช้ได้กับทุก IP (ตามข้อสอบ)
         if cmd == "motd":
-            if args:
-                ok = ansible_final.set_motd(ip, " ".join(args))
-                reply = "Ok: success" if ok else "Error: failed to configure MOTD"
+            if args and args != [FRESH_FLAG]:
+                job = (ip, ("motd", args))   # ตั้ง MOTD ผ่าน ansible ใช้เวลานาน → job queue
             else:
-                motd = netmiko_final.read_motd(ip)
-                reply = motd if motd else "Error: No MOTD Configured"
+                job = (ip, lambda: _motd_job(ip, args))
 
         # จากนี้ไป: ต้องเป็น IP target เท่านั้น
         elif cmd in ("gigabit_status", "gi-status", "gigabit"):
             if ip not in ALLOWED_IPS:
                 reply = "Error: No IP specified"
             else:
-                result = netmiko_final.gigabit_status(ip)
-                reply = result or "Error: gi-status failed"
+                job = (ip, lambda: _gigabit_job(ip))
 
         elif cmd in ("showrun", "show-run"):
             if ip not in ALLOWED_IPS:
                 reply = "Error: No IP specified"
             else:
-                os.environ["ROUTER_IP"] = ip
-                _ = ansible_final.showrun()   # ฟังก์ชันนี้จะโพสต์ไฟล์ + "show running config" เอง
-                reply = None
+                if args and args[0].lower() == "diff":
+                    job = (ip, lambda: _showrun_job(ip, args))
+                else:
+                    job = (ip, ("showrun", args))
 
         else:
             if ip not in ALLOWED_IPS:
                 reply = "Error: No IP specified"
-            elif CURRENT_METHOD is None:
+            elif current_method is None:
                 reply = "Error: No method specified"
+            elif cmd in ("create", "delete") and args and args[0] != FRESH_FLAG:
+                # /SID <ip> create 10-50 | delete all-student → loopback หลายตัวใน transaction เดียว
+                method = current_method
+                job = (ip, lambda: bulk_loopback.run(cmd, ip, args[0], method))
             else:
-                reply = dispatch_command(CURRENT_METHOD, ip, cmd, args)
+                method = current_method   # จับค่า ณ ตอนรับคำสั่ง ไม่ใช่ตอน worker รัน
+                job = (ip, lambda: dispatch_command(method, ip, cmd, args))
 
     else:
         reply = "Error: No IP specified"
 
-    if reply is not None:
-        postData = {"roomId": roomIdToGetMessages, "text": reply}
-        rr = requests.post("https://webexapis.com/v1/messages",
-                           data=json.dumps(postData),
-                           headers={"Authorization": f"Bearer {ACCESS_TOKEN}",
-                                    "Content-Type": "application/json"})
-        if rr.status_code != 200:
-            print(f"Error sending message: {rr.status_code}")
+    return reply, job
+
+
+def post_reply(reply: str, room_id: str, on_sent=None, **labels) -> None:
+    """ส่งผ่านคิวเบื้องหลังของ webex_client (rate limit + retry 429) ไม่บล็อก worker; labels = command/router ของ reply_post"""
+    WEBEX.send_async(room_id, reply, on_sent, labels)
+
+
+# ===============================================================
+# LATENCY REPORT
+# ===============================================================
+LATENCIES = {"poll": [], "webhook": []}
+_LAT_LOCK = threading.Lock()   # worker หลายตัวรายงานพร้อมกันได้
+
+def _parse_created(created: str):
+    """แปลง timestamp ของ Webex ("2025-10-24T17:42:41.123Z") เป็น epoch seconds"""
+    if not created:
+        return None
+    try:
+        return datetime.fromisoformat(created.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+def _report_latency(mode: str, created_ts, received_ts: float) -> None:
+    done = time.time()
+    # e2e วัดจากเวลาที่ Webex สร้างข้อความ (ถ้ามี) ไม่งั้นนับจากตอนที่รับเข้ามา
+    start = created_ts if created_ts is not None else received_ts
+    e2e = done - start
+    with _LAT_LOCK:
+        samples = LATENCIES[mode]
+        samples.append(e2e)
+        del samples[:-LATENCY_WINDOW]
+        ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"[latency] mode={mode} e2e={e2e:.3f}s local={done - received_ts:.3f}s "
+          f"p50={p50:.3f}s p95={p95:.3f}s n={len(samples)}")
+
+def process_message(message: str, mode: str, room_id: str, created: str = "", received_ts: float = None) -> None:
+    received_ts = received_ts or time.time()
+    print("Received message:", message)
+    t = find_tenant(message, room_id)
+    if t is None:
+        return
+    command = command_label(message)
+    with metrics.timed("parse", command=command):
+        reply, job = handle_message(message, t)
+
+    def _sent(_):
+        _report_latency(mode, _parse_created(created), received_ts)
+
+    if job is None:
+        if reply is not None:
+            post_reply(reply, room_id, _sent, command=command)
+        return
+
+    # งานที่คุยกับ router → ส่งเข้า worker pool แล้วโพสต์ผลกลับห้องเดิมทันทีที่งานนั้นเสร็จ
+    router_ip, fn = job
+    def _on_done(result):
+        if result is None:
+            return
+        post_reply(result, room_id, _sent, command=command, router=router_ip)
+    if router_ip == "all":
+        title, per_router = fn
+        _submit_fleet(t, command, title, per_router, _on_done)
+        return
+    if isinstance(fn, tuple):
+        # งานยาว: บันทึกลง DB แล้วตอบเลข job ทันที ผลจริงตามมาเมื่อ worker ทำเสร็จ
+        kind, args = fn
+        job_id = job_queue.JOBS.enqueue(t.room_id, t.student_id, kind, router_ip, args)
+        post_reply(f"Job {job_id} queued: {kind} on {router_ip}", room_id, _sent, command=command, router=router_ip)
+        _submit_job(t, job_id, kind, router_ip, args)
+        return
+    try:
+        _submit(t, command, router_ip, fn, _on_done)
+    except QueueFull:
+        post_reply(f"Error: router {router_ip} is busy, try again later", room_id, command=command, router=router_ip)
+
+def _submit(t: tenant.Tenant, command: str, router_ip: str, fn, on_done, timeout: float = None) -> None:
+    """ส่ง fn เข้า EXECUTOR ภายใต้ tenant/metrics ของคำสั่ง (QueueFull ถ้าคิวของ router เต็ม; timeout None = timeout_for)"""
+    queued_at = time.perf_counter()
+    def _run():
+        metrics.observe("queue_wait", time.perf_counter() - queued_at, command=command, router=router_ip)
+        with tenant.bind(t), metrics.bind(command=command, router=router_ip), metrics.timed("command"):
+            return fn()
+    EXECUTOR.submit(router_ip, _run, on_done=on_done, timeout=timeout or timeout_for(command))
+
+def _submit_fleet(t: tenant.Tenant, command: str, title: str, fn, on_done) -> None:
+    """
+    /SID all ...: ส่ง fn(ip) เข้า EXECUTOR ทีละ router (เข้าคิวต่อ router เดียวกับคำสั่งเดี่ยว → ไม่รันซ้อนกับ
+    งานเขียนที่ค้างอยู่บน router นั้น และใช้ worker pool เดียวกัน) แล้วตอบรวมครั้งเดียวเมื่อครบทุก router
+    """
+    def _complete(results, elapsed):
+        # fn คืนข้อความ Error: ... ได้แม้ไม่ raise → นับเป็น fail ในสรุปด้วย
+        results = {ip: (ok and not str(r).startswith(("Error", "Cannot")), r) for ip, (ok, r) in results.items()}
+        on_done(fleet.format_results(f"Fleet {title}", results, elapsed))
+    if not FLEET_IPS:
+        _complete({}, 0.0)
+        return
+    gather = fleet.Gather(FLEET_IPS, _complete)
+    for ip in FLEET_IPS:
+        try:
+            _submit(t, command, ip, lambda ip=ip: fn(ip), lambda r, ip=ip: gather.done(ip, True, r))
+        except QueueFull:
+            gather.done(ip, False, f"Error: router {ip} is busy")
+
+def _submit_job(t: tenant.Tenant, job_id: int, kind: str, router_ip: str, args: list[str]) -> None:
+    """รันงานจาก job_queue บน worker: บันทึก running/done/failed ลง DB และโพสต์ผลกลับห้องของ tenant"""
+    def _fn():
+        job_queue.JOBS.start(job_id)
+        return DURABLE[kind](router_ip, args)
+    def _on_done(result):
+        job_queue.JOBS.finish(job_id, result is None or not str(result).startswith(("Error", "Cannot")), result)
+        if result is not None:
+            post_reply(result, t.room_id, command=kind, router=router_ip)
+    try:
+        _submit(t, kind, router_ip, _fn, _on_done, DURABLE_TIMEOUTS[kind])
+    except QueueFull:
+        job_queue.JOBS.finish(job_id, False, "router busy")
+        post_reply(f"Error: router {router_ip} is busy, try again later (job {job_id} cancelled)", t.room_id,
+                   command=kind, router=router_ip)
+
+def resume_jobs() -> None:
+    """ตอนเริ่มโปรแกรม: ส่งงานที่ค้างจากรอบก่อน (queued/running) กลับเข้า worker"""
+    for j in job_queue.JOBS.recover():
+        t = TENANTS.get((j["room_id"], j["student_id"]))
+        if t is None:
+            job_queue.JOBS.finish(j["id"], False, "student/room no longer configured")
+            continue
+        print(f"[jobs] resuming job {j['id']}: {j['kind']} on {j['router']}")
+        post_reply(f"Job {j['id']} resumed after restart: {j['kind']} on {j['router']}", t.room_id,
+                   command=j["kind"], router=j["router"])
+        _submit_job(t, j["id"], j["kind"], j["router"], j["args"])
+
+
+# ===============================================================
+# INGESTION: POLL (fallback) / WEBHOOK
+# ===============================================================
+def _poll_room(room_id: str, cursor: MessageCursor) -> None:
+    # ดึงทีละหน้าใหญ่ แล้วทำทุกข้อความที่ใหม่กว่า cursor ตามลำดับเวลา
+    with metrics.timed("webex_poll", transport="webex"):
+        items = WEBEX.list_messages(room_id, POLL_PAGE_SIZE)
+    if not items:
+        # ห้องว่างตอนเริ่ม → ตั้ง cursor เป็น "ตอนนี้" ไม่งั้นข้อความแรกที่เข้ามาจะถูกใช้ตั้ง cursor เฉย ๆ โดยไม่ได้รัน
+        if not cursor.initialized:
+            now = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+            cursor.advance({"id": "", "created": now})
+        return
+
+    # รันครั้งแรก (ยังไม่มี cursor) → เริ่มนับจากข้อความล่าสุด ไม่ย้อนรันประวัติเก่า
+    if not cursor.initialized:
+        cursor.advance(items[0])
+        return
+
+    for item in cursor.new_items(items):
+        # ขยับ cursor ก่อนรัน: ถ้าโปรเซสตายกลางคำสั่ง จะไม่รัน create/showrun ซ้ำ
+        cursor.advance(item)
+        process_message(item.get("text", "") or "", "poll", room_id, item.get("created", ""))
+
+def poll_loop():
+    # ทุกห้องใช้ loop เดียวกัน (cursor แยกต่อห้องในไฟล์เดียว); rate limit ของ WEBEX คุมไม่ให้ยิงถี่เกิน
+    cursors = {room: MessageCursor(room) for room in ROOMS}
+    while True:
+        time.sleep(POLL_INTERVAL)
+        for room, cursor in cursors.items():
+            try:
+                _poll_room(room, cursor)
+            except Exception as e:
+                print(f"[poll] {room[-8:]}: {e}")
+
+def _fetch_message(message_id: str) -> dict:
+    """webhook ของ Webex ส่งมาแค่ id → ต้อง GET ตัวข้อความเอง"""
+    return WEBEX.get_message(message_id)
+
+def webhook_loop():
+    cursors = {room: MessageCursor(room) for room in ROOMS}
+    webhook_server.start(ROOMS)
+    while True:
+        event = webhook_server.COMMANDS.get()
+        cursor = cursors.get(event.get("room", ""))
+        if cursor is None:
+            continue
+        # Webex อาจส่ง webhook ซ้ำ → dedupe ด้วย id เดียวกับ poll mode
+        if event.get("id") and cursor.seen(event["id"]):
+            continue
+        try:
+            _handle_event(event, cursor)
+        except Exception as e:
+            # Webex ล่ม / คำสั่งพัง → ข้าม event นี้ แต่ bot ต้องรับ event ถัดไปต่อ (เหมือน poll_loop)
+            print(f"[webhook] {cursor.room_id[-8:]}: {e}")
+
+def _handle_event(event: dict, cursor: MessageCursor) -> None:
+    text = event.get("text")
+    created = event.get("created", "")
+    if text is None:
+        msg = _fetch_message(event.get("id", ""))
+        # roomId ใน body ของ webhook ไม่ได้เซ็น → ห้องของข้อความต้องมาจาก Webex เอง และต้องตรงกับ event
+        if msg.get("roomId") != cursor.room_id:
+            print(f"[webhook] drop {event.get('id', '')[-8:]}: room mismatch")
+            return
+        text = msg.get("text", "") or ""
+        created = msg.get("created", created)
+    cursor.advance({"id": event.get("id", ""), "created": created})
+    process_message(text, "webhook", cursor.room_id, created, event.get("received"))
+
+
+def main():
+    metrics.start_server()
+    health.start_probe(ALLOWED_IPS)
+    resume_jobs()
+    if netconf_subscriber.NETCONF_SUBSCRIBE:
+        netconf_subscriber.start(ALLOWED_IPS)
+    if INGEST_MODE == "webhook":
+        webhook_loop()
+    else:
+        poll_loop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# job_queue.py
+# คิวงานยาว (showrun / motd set) แบบถาวรใน SQLite: มีเลข job, ตอบ "Job N queued" ได้ทันที
+# งานที่ยังไม่จบตอนโปรเซสตายจะถูกรันต่อหลังรีสตาร์ต (รันซ้ำได้เพราะทั้งสองคำสั่ง idempotent)
+import os
+import json
+import time
+import sqlite3
+import threading
+
+BASE_DIR         = os.path.dirname(os.path.abspath(__file__))
+JOB_DB           = os.environ.get("JOB_DB", os.path.join(BASE_DIR, "jobs.sqlite3"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 2))   # เริ่มรันได้กี่ครั้ง (รวมครั้งที่ถูกขัดจังหวะ)
+JOB_KEEP_DAYS    = float(os.environ.get("JOB_KEEP_DAYS", 7))     # ลบงานที่จบแล้วที่เก่ากว่านี้ตอนเริ่มโปรแกรม
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id    TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    router     TEXT NOT NULL,
+    args       TEXT NOT NULL,
+    state      TEXT NOT NULL,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    created    REAL NOT NULL,
+    started    REAL,
+    finished   REAL,
+    result     TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+"""
+
+class JobStore:
+    def __init__(self, path: str = JOB_DB):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        # เรียกภายใต้ self._lock; เปิดไฟล์ตอนใช้ครั้งแรก (import เฉย ๆ ไม่สร้างไฟล์)
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, room_id: str, student_id: str, kind: str, router: str, args: list[str]) -> int:
+        with self._lock:
+            cur = self._db().execute(
+                "INSERT INTO jobs (room_id, student_id, kind, router, args, state, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (room_id, student_id, kind, router, json.dumps(args), QUEUED, time.time()))
+            return cur.lastrowid
+
+    def start(self, job_id: int) -> None:
+        with self._lock:
+            self._db().execute("UPDATE jobs SET state = ?, started = ?, attempts = attempts + 1 WHERE id = ?",
+                               (RUNNING, time.time(), job_id))
+
+    def finish(self, job_id: int, ok: bool, result: str = "") -> None:
+        with self._lock:
+            self._db().execute("UPDATE jobs SET state = ?, finished = ?, result = ? WHERE id = ? AND state IN (?, ?)",
+                               (DONE if ok else FAILED, time.time(), (result or "")[:500], job_id, QUEUED, RUNNING))
+
+    def recover(self) -> list[dict]:
+        """
+        เรียกตอนเริ่มโปรแกรม: งาน queued/running ที่ค้างจากรอบก่อน
+        running ที่เริ่มไปครบ JOB_MAX_ATTEMPTS แล้ว → failed; ที่เหลือกลับเป็น queued แล้วคืนให้ผู้เรียกส่งเข้า worker
+        """
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM jobs WHERE state IN (?, ?) AND finished < ?",
+                       (DONE, FAILED, time.time() - JOB_KEEP_DAYS * 86400))
+            db.execute("UPDATE jobs SET state = ?, finished = ?, result = ? WHERE state = ? AND attempts >= ?",
+                       (FAILED, time.time(), "interrupted by restart", RUNNING, JOB_MAX_ATTEMPTS))
+            db.execute("UPDATE jobs SET state = ? WHERE state = ?", (QUEUED, RUNNING))
+            rows = db.execute("SELECT * FROM jobs WHERE state = ? ORDER BY id", (QUEUED,)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def active(self, room_id: str = None, student_id: str = None) -> list[dict]:
+        """งาน queued/running (ของห้อง/นักศึกษาที่ระบุ) เรียงตามเลข job"""
+        sql = "SELECT * FROM jobs WHERE state IN (?, ?)"
+        params = [QUEUED, RUNNING]
+        if room_id is not None:
+            sql += " AND room_id = ?"
+            params.append(room_id)
+        if student_id is not None:
+            sql += " AND student_id = ?"
+            params.append(student_id)
+        with self._lock:
+            rows = self._db().execute(sql + " ORDER BY id", params).fetchall()
+        return [self._row(r) for r in rows]
+
+    @staticmethod
+    def _row(r: sqlite3.Row) -> dict:
+        d = dict(r)
+        d["args"] = json.loads(d["args"])
+        return d
+
+def summary_text(jobs: list[dict]) -> str:
+    """"/SID jobs": งานที่รอ/กำลังรัน พร้อมเวลาที่รอคิว/รันมาแล้ว"""
+    if not jobs:
+        return "Jobs: none queued or running"
+    now = time.time()
+    lines = ["Jobs:"]
+    for j in jobs:
+        text = f"#{j['id']} {j['kind']} {j['router']}"
+        if j["kind"] == "motd" and j["args"]:
+            text += f" \"{' '.join(j['args'])[:30]}\""
+        if j["state"] == RUNNING and j["started"]:
+            text += f" running {now - j['started']:.0f}s (waited {j['started'] - j['created']:.0f}s)"
+        else:
+            text += f" queued {now - j['created']:.0f}s"
+        if j["attempts"] > (1 if j["state"] == RUNNING else 0):
+            text += f" [attempt {j['attempts'] + (0 if j['state'] == RUNNING else 1)}]"
+        lines.append(text)
+    return "\n".join(lines)
+
+JOBS = JobStore()
@@ -1,17 +1,6 @@
-import requests
 import json
+from webex_client import get_client
 
-access_token = ""
-url = 'https://webexapis.com/v1/rooms'
-
-headers = {
-    'Authorization': 'Bearer {}'.format(access_token),
-    'Content-Type': 'application/json'
-}
-
-params = {
-    'max': 100
-}
-
-res = requests.get(url, headers=headers, params=params)
-print(json.dumps(res.json(), indent=4))
\ No newline at end of file
+# token อ่านจาก ENV WEBEX_TOKEN; ไล่ทุกหน้าของ /v1/rooms
+rooms = list(get_client().list_rooms(max_items=100))
+print(json.dumps(rooms, indent=4))
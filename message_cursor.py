@@ -0,0 +1,83 @@
+# message_cursor.py
+# เก็บตำแหน่งข้อความล่าสุดที่ประมวลผลแล้ว (ต่อห้อง) ลงไฟล์ เพื่อไม่ให้ข้อความตกหล่น/รันซ้ำหลังรีสตาร์ต
+import os
+import json
+import threading
+from collections import deque
+
+BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
+CURSOR_FILE = os.environ.get("WEBEX_CURSOR_FILE", os.path.join(BASE_DIR, ".webex_cursor.json"))
+SEEN_LIMIT  = int(os.environ.get("WEBEX_CURSOR_SEEN", 200))
+
+_file_lock = threading.Lock()
+
+def _load_all(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+class MessageCursor:
+    """
+    cursor = (created, id) ของข้อความล่าสุดที่ทำไปแล้ว + ชุด id ที่เห็นล่าสุดไว้ dedupe
+    ข้อมูลของทุกห้องอยู่ในไฟล์เดียว แยก key ด้วย roomId
+    """
+
+    def __init__(self, room_id: str, path: str = CURSOR_FILE):
+        self.room_id = room_id
+        self.path = path
+        state = _load_all(path).get(room_id, {})
+        self.created = state.get("created", "")
+        self.last_id = state.get("id", "")
+        self._seen = deque(state.get("seen", []), maxlen=SEEN_LIMIT)
+        self._seen_set = set(self._seen)
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return bool(self.created)
+
+    def seen(self, message_id: str) -> bool:
+        return message_id in self._seen_set
+
+    def new_items(self, items: list[dict]) -> list[dict]:
+        """
+        รับ items จาก GET /messages (เรียงใหม่ → เก่า) คืนเฉพาะที่ใหม่กว่า cursor
+        เรียงเก่า → ใหม่ และตัดตัวซ้ำตาม id
+        """
+        fresh, ids = [], set()
+        for it in items:
+            mid = it.get("id", "")
+            created = it.get("created", "")
+            if mid == self.last_id or (self.created and created < self.created):
+                break
+            if not mid or mid in ids or self.seen(mid):
+                continue
+            ids.add(mid)
+            fresh.append(it)
+        fresh.reverse()
+        return fresh
+
+    def advance(self, item: dict) -> None:
+        """ขยับ cursor ไปที่ item แล้วเขียนลงไฟล์ทันที"""
+        with self._lock:
+            mid = item.get("id", "")
+            created = item.get("created", "")
+            if mid and mid not in self._seen_set:
+                if len(self._seen) == self._seen.maxlen:
+                    self._seen_set.discard(self._seen[0])
+                self._seen.append(mid)
+                self._seen_set.add(mid)
+            if created >= self.created:
+                self.created, self.last_id = created, mid
+            self._save()
+
+    def _save(self) -> None:
+        with _file_lock:
+            data = _load_all(self.path)
+            data[self.room_id] = {"created": self.created, "id": self.last_id, "seen": list(self._seen)}
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
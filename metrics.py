@@ -0,0 +1,141 @@
+# metrics.py
+# จับเวลาแต่ละ stage (poll, parse, queue wait, connect, RPC, parse response, reply post)
+# เก็บเป็น histogram แยกตาม command / transport / router แล้วเปิดให้ Prometheus ดึงที่ /metrics
+import os
+import time
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1").strip()
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9108))   # 0 = ไม่เปิด endpoint
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+LABELS = ("stage", "command", "transport", "router")
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.series = {}   # labels tuple -> [counts per bucket..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            row = self.series.get(labels)
+            if row is None:
+                row = self.series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {k: list(v) for k, v in self.series.items()}
+
+STAGES = Histogram()
+_ctx = threading.local()
+
+def _context() -> dict:
+    if not hasattr(_ctx, "labels"):
+        _ctx.labels = {}
+    return _ctx.labels
+
+@contextmanager
+def bind(**labels):
+    """ผูก label (เช่น command, router) กับ thread ปัจจุบัน ให้ stage ที่ลึกกว่าใช้ต่อได้โดยไม่ต้องส่ง args"""
+    ctx = _context()
+    saved = dict(ctx)
+    ctx.update({k: v for k, v in labels.items() if v})
+    try:
+        yield
+    finally:
+        ctx.clear()
+        ctx.update(saved)
+
+def observe(stage: str, seconds: float, **labels) -> None:
+    ctx = _context()
+    key = (stage,) + tuple(str(labels.get(l) or ctx.get(l) or "") for l in LABELS[1:])
+    STAGES.observe(key, seconds)
+
+@contextmanager
+def timed(stage: str, **labels):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - t0, **labels)
+
+# ---------------- export ----------------
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def render_prometheus() -> str:
+    name = "ipa_stage_seconds"
+    out = [f"# HELP {name} Latency of each bot stage in seconds.", f"# TYPE {name} histogram"]
+    for key, row in sorted(STAGES.snapshot().items()):
+        lbl = ",".join(f'{l}="{_esc(v)}"' for l, v in zip(LABELS, key))
+        for upper, n in zip(STAGES.buckets, row):
+            out.append(f'{name}_bucket{{{lbl},le="{upper:g}"}} {n}')
+        out.append(f'{name}_bucket{{{lbl},le="+Inf"}} {row[-1]}')
+        out.append(f"{name}_sum{{{lbl}}} {row[-2]:.6f}")
+        out.append(f"{name}_count{{{lbl}}} {row[-1]}")
+    return "\n".join(out) + "\n"
+
+def _quantile(counts: list[int], total: int, q: float) -> float:
+    """ประมาณ quantile จาก bucket (ขอบบนของ bucket ที่ครอบ)"""
+    if not total:
+        return 0.0
+    target = q * total
+    for upper, n in zip(STAGES.buckets, counts):
+        if n >= target:
+            return upper
+    return float("inf")
+
+def summary(group_by: tuple = ("stage", "transport")) -> list[dict]:
+    """รวม series ตาม label ที่เลือก คืน [{key, count, avg, p50, p95}] (ใช้กับคำสั่ง /SID stats)"""
+    idx = [LABELS.index(l) for l in group_by]
+    agg = {}
+    for key, row in STAGES.snapshot().items():
+        k = "/".join(key[i] for i in idx if key[i])
+        cur = agg.setdefault(k, [0] * len(STAGES.buckets) + [0.0, 0])
+        for i, v in enumerate(row):
+            cur[i] += v
+    out = []
+    for k, row in sorted(agg.items()):
+        total = row[-1]
+        out.append({"key": k, "count": total, "avg": row[-2] / total if total else 0.0,
+                    "p50": _quantile(row[:-2], total, 0.5), "p95": _quantile(row[:-2], total, 0.95)})
+    return out
+
+def summary_text() -> str:
+    lines = ["Stage latency (n, avg, p50 <=, p95 <=):"]
+    for st in summary():
+        lines.append(f"{st['key']}: {st['count']}, {st['avg'] * 1000:.1f}ms, "
+                     f"{st['p50'] * 1000:g}ms, {st['p95'] * 1000:g}ms")
+    return "\n".join(lines) if len(lines) > 1 else "No metrics yet"
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    if port <= 0:
+        return None
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="metrics", daemon=True).start()
+    print(f"Metrics endpoint on http://{host}:{port}/metrics")
+    return httpd
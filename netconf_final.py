@@ -1,23 +1,33 @@
 # netconf_final.py
 from ncclient import manager
-import xmltodict
+from ncclient.transport.errors import TransportError
+from ncclient.operations.rpc import RPCError
+from ncclient.operations.errors import TimeoutExpiredError
 import os
-
-STUDENT_ID = os.environ.get("STUDENT_ID", "66070315").strip()
-IF_NAME_CFG = f"Loopback{STUDENT_ID}"
-IF_NAME_MSG = f"loopback {STUDENT_ID}"
+from contextlib import contextmanager
+import metrics
+import deadline
+from deadline import DeadlineExceeded
+import health
+from health import CircuitOpen
+import tenant
+import interface_summary
+import netconf_xml
+from session_pool import SessionPool
+from state_cache import CACHE, after_write
 
 NETCONF_PORT = int(os.environ.get("NETCONF_PORT", "830"))
 USERNAME = os.environ.get("ROUTER_USER", "admin")
 PASSWORD = os.environ.get("ROUTER_PASS", "cisco")
+NETCONF_IDLE_TTL = float(os.environ.get("NETCONF_IDLE_TTL", 300))
+NETCONF_CONNECT_TIMEOUT = float(os.environ.get("NETCONF_CONNECT_TIMEOUT", 10))
+NETCONF_RPC_TIMEOUT = float(os.environ.get("NETCONF_RPC_TIMEOUT", 30))
+health.register("netconf", NETCONF_PORT)
+# "atomic"   = create/delete ส่ง edit-config ตรง ๆ ด้วย operation="create"/"delete" แล้วดู rpc-error
+# "precheck" = เช็ค has_interface ก่อนทุกครั้ง (แบบเดิม)
+NETCONF_EDIT_MODE = os.environ.get("NETCONF_EDIT_MODE", "atomic").strip().lower()
 
-def ip_for_student(student_id: str) -> str:
-    last3 = student_id[-3:]
-    x = int(last3[0])
-    y = int(last3[1:])
-    return f"172.{x}.{y}.1"
-
-LOOPBACK_IP = ip_for_student(STUDENT_ID)
+# ชื่อ/IP ของ loopback มาจาก tenant.current() ของแต่ละคำสั่ง (หลายนักศึกษาในโปรเซสเดียว)
 
 def _connect(ip: str):
     return manager.connect(
@@ -28,36 +38,95 @@ def _connect(ip: str):
         hostkey_verify=False,
         allow_agent=False,
         look_for_keys=False,
-        timeout=10
+        timeout=deadline.cap(NETCONF_CONNECT_TIMEOUT)
     )
 
-def has_interface(ip: str) -> bool:
-    with _connect(ip) as m:
-        filt = f"""
-<filter>
-  <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
-    <interface>
-      <name>{IF_NAME_CFG}</name>
-    </interface>
-  </interfaces>
-</filter>
-"""
-        resp = m.get_config(source="running", filter=filt)
-        d = xmltodict.parse(resp.xml)
-        return IF_NAME_CFG in resp.xml and d is not None
+def _close(m) -> None:
+    if deadline.expired():
+        # ทิ้งเพราะหมดเวลา → ตัด SSH เลย ไม่ต้องรอ <close-session> จาก router ที่ช้าอยู่แล้ว
+        m._session.close()
+        return
+    m.close_session()
+
+def open_session(ip: str):
+    """session แยกที่ไม่อยู่ใน pool — สำหรับงานที่ต้องถือ session ค้างไว้ (เช่น subscription ของ netconf_subscriber)"""
+    return _connect(ip)
+
+# session NETCONF ต่อ router ที่เปิดค้างไว้ใช้ซ้ำ (ไม่ต้อง SSH handshake + hello ใหม่ทุกคำสั่ง)
+POOL = SessionPool(_connect, lambda m: m.connected, _close,
+                   max_per_key=1, idle_ttl=NETCONF_IDLE_TTL, name="netconf", discard_on_error=True)
+
+_RPCS = ("get", "get_config", "edit_config", "dispatch")
+
+class _TimedManager:
+    """ห่อ manager จาก pool ให้ทุก RPC ถูกจับเวลาเป็น stage device_rpc และรอไม่เกิน deadline"""
+    def __init__(self, m, ip: str):
+        self._m = m
+        self._ip = ip
+
+    def __getattr__(self, name):
+        attr = getattr(self._m, name)
+        if name not in _RPCS:
+            return attr
+        def _call(*args, **kwargs):
+            self._m.timeout = deadline.cap(NETCONF_RPC_TIMEOUT)
+            with metrics.timed("device_rpc", transport="netconf", router=self._ip):
+                try:
+                    return attr(*args, **kwargs)
+                except TimeoutExpiredError:
+                    if deadline.expired():
+                        raise DeadlineExceeded(deadline.current()[1])
+                    raise
+        return _call
+
+# error ระดับ transport (ต่อไม่ได้ / session หลุด / timeout) — rpc-error ของ YANG ไม่นับ
+_TRANSPORT_ERRORS = (TransportError, OSError, TimeoutExpiredError, DeadlineExceeded)
+
+@contextmanager
+def _session(ip: str):
+    if POOL.holding(ip):
+        # ชั้นในของ _handle: ชั้นนอกเช็ค circuit และบันทึกผลให้แล้ว
+        with POOL.session(ip) as m:
+            yield _TimedManager(m, ip)
+        return
+    trial = health.guard(ip, "netconf")
+    try:
+        with POOL.session(ip) as m:
+            yield _TimedManager(m, ip)
+    except _TRANSPORT_ERRORS as e:
+        health.failure(ip, "netconf", e)
+        raise
+    else:
+        health.success(ip, "netconf")
+    finally:
+        if trial:
+            health.release(ip, "netconf")
+
+def has_interface(ip: str, refresh: bool = False) -> bool:
+    t = tenant.current()
+    return CACHE.cached(ip, f"exists:{t.if_name_cfg}", lambda: _has_interface(ip), refresh)
+
+def _has_interface(ip: str) -> bool:
+    t = tenant.current()
+    with _session(ip) as m:
+        resp = m.get_config(source="running", filter=netconf_xml.filter_cfg(t.if_name_cfg))
+    with metrics.timed("response_parse", transport="netconf", router=ip):
+        return netconf_xml.has_interface(resp, t.if_name_cfg)
 
 def create(ip: str) -> str:
+    # operation="create" → router ตอบ rpc-error data-exists ถ้ามี interface อยู่แล้ว (ไม่ต้อง pre-check)
+    t = tenant.current()
     cfg = f"""
-<config>
+<config xmlns:nc="urn:ietf:params:xml:ns:netconf:base:1.0">
   <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
-    <interface>
-      <name>{IF_NAME_CFG}</name>
-      <description>Student {STUDENT_ID} loopback</description>
+    <interface nc:operation="create">
+      <name>{t.if_name_cfg}</name>
+      <description>Student {t.student_id} loopback</description>
       <type xmlns:ianaift="urn:ietf:params:xml:ns:yang:iana-if-type">ianaift:softwareLoopback</type>
       <enabled>true</enabled>
       <ipv4 xmlns="urn:ietf:params:xml:ns:yang:ietf-ip">
         <address>
-          <ip>{LOOPBACK_IP}</ip>
+          <ip>{t.loopback_ip}</ip>
           <netmask>255.255.255.0</netmask>
         </address>
       </ipv4>
@@ -65,120 +134,216 @@ def create(ip: str) -> str:
   </interfaces>
 </config>
 """
-    with _connect(ip) as m:
-        r = m.edit_config(target="running", config=cfg)
-        return f"Interface {IF_NAME_MSG} is created successfully" if "<ok/>" in r.xml else f"Cannot create: Interface {IF_NAME_MSG}"
+    with _session(ip) as m:
+        try:
+            r = m.edit_config(target="running", config=cfg)
+        except RPCError as e:
+            if e.tag == "data-exists":
+                return f"Cannot create: Interface {t.if_name_msg}"
+            raise
+        return f"Interface {t.if_name_msg} is created successfully" if netconf_xml.is_ok(r) else f"Cannot create: Interface {t.if_name_msg}"
 
 def delete(ip: str) -> str:
+    # operation="delete" → router ตอบ rpc-error data-missing ถ้าไม่มี interface
+    t = tenant.current()
     cfg = f"""
-<config>
+<config xmlns:nc="urn:ietf:params:xml:ns:netconf:base:1.0">
   <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
-    <interface operation="delete">
-      <name>{IF_NAME_CFG}</name>
+    <interface nc:operation="delete">
+      <name>{t.if_name_cfg}</name>
     </interface>
   </interfaces>
 </config>
 """
-    with _connect(ip) as m:
-        r = m.edit_config(target="running", config=cfg)
-        return f"Interface {IF_NAME_MSG} is deleted successfully" if "<ok/>" in r.xml else f"Cannot delete: Interface {IF_NAME_MSG}"
+    with _session(ip) as m:
+        try:
+            r = m.edit_config(target="running", config=cfg)
+        except RPCError as e:
+            if e.tag == "data-missing":
+                return f"Cannot delete: Interface {t.if_name_msg}"
+            raise
+        return f"Interface {t.if_name_msg} is deleted successfully" if netconf_xml.is_ok(r) else f"Cannot delete: Interface {t.if_name_msg}"
 
 def enable(ip: str) -> str:
+    t = tenant.current()
     cfg = f"""
 <config>
   <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
     <interface>
-      <name>{IF_NAME_CFG}</name>
+      <name>{t.if_name_cfg}</name>
       <enabled>true</enabled>
     </interface>
   </interfaces>
 </config>
 """
-    with _connect(ip) as m:
+    with _session(ip) as m:
         r = m.edit_config(target="running", config=cfg)
-        return f"Interface {IF_NAME_MSG} is enabled successfully" if "<ok/>" in r.xml else f"Cannot enable: Interface {IF_NAME_MSG}"
+        return f"Interface {t.if_name_msg} is enabled successfully" if netconf_xml.is_ok(r) else f"Cannot enable: Interface {t.if_name_msg}"
 
 def disable(ip: str) -> str:
+    t = tenant.current()
     cfg = f"""
 <config>
   <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
     <interface>
-      <name>{IF_NAME_CFG}</name>
+      <name>{t.if_name_cfg}</name>
       <enabled>false</enabled>
     </interface>
   </interfaces>
 </config>
 """
-    with _connect(ip) as m:
+    with _session(ip) as m:
         r = m.edit_config(target="running", config=cfg)
-        return f"Interface {IF_NAME_MSG} is shutdowned successfully" if "<ok/>" in r.xml else f"Cannot shutdown: Interface {IF_NAME_MSG}"
+        return f"Interface {t.if_name_msg} is shutdowned successfully" if netconf_xml.is_ok(r) else f"Cannot shutdown: Interface {t.if_name_msg}"
 
-def status(ip: str) -> str:
-    with _connect(ip) as m:
-        filt = f"""
-<filter>
-  <interfaces-state xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
-    <interface>
-      <name>{IF_NAME_CFG}</name>
-    </interface>
-  </interfaces-state>
-</filter>
-"""
-        r = m.get(filt)
-        d = xmltodict.parse(r.xml)
-        # ถ้าไม่มีข้อมูล state → อาจไม่มี interface
-        if "interfaces-state" not in r.xml:
-            return f"No Interface {IF_NAME_MSG}"
+def status(ip: str, refresh: bool = False) -> str:
+    t = tenant.current()
+    return CACHE.cached(ip, f"status:{t.if_name_cfg}", lambda: _status(ip), refresh)
 
-        try:
-            iface = d["rpc-reply"]["data"]["interfaces-state"]["interface"]
-            # ถ้าเป็น list ให้เอาตัวแรก
-            if isinstance(iface, list):
-                iface = iface[0]
-            oper = iface.get("oper-status", "down")
-        except Exception:
-            return f"No Interface {IF_NAME_MSG}"
-
-        # อ่าน enabled จาก running-config
-        filt2 = f"""
-<filter>
-  <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
-    <interface>
-      <name>{IF_NAME_CFG}</name>
-    </interface>
+def _status(ip: str) -> str:
+    # <get> เดียวได้ทั้ง config (enabled) และ state (oper-status) → 1 RPC ต่อคำสั่ง
+    t = tenant.current()
+    with _session(ip) as m:
+        r = m.get(netconf_xml.filter_status(t.if_name_cfg))
+
+    # enabled จาก running-config (interfaces), oper-status จาก interfaces-state
+    with metrics.timed("response_parse", transport="netconf", router=ip):
+        exists, enabled, oper = netconf_xml.interface_status(r, t.if_name_cfg)
+    if not exists:
+        return f"No Interface {t.if_name_msg}"
+    oper = oper or "down"
+
+    if enabled and oper == "up":
+        return f"Interface {t.if_name_msg} is enabled"
+    if not enabled:
+        return f"Interface {t.if_name_msg} is disabled"
+    return f"Interface {t.if_name_msg} admin={'up' if enabled else 'down'}, oper={oper}"
+
+# ---------------- gigabit_status จาก oper data ----------------
+def interface_states(ip: str) -> list[tuple[str, str, str]]:
+    """[(name, admin-status, oper-status)] ของทุก interface จาก interfaces-state ใน <get> เดียว"""
+    with _session(ip) as m:
+        r = m.get(netconf_xml.FILTER_STATE_ALL)
+    with metrics.timed("response_parse", transport="netconf", router=ip):
+        return netconf_xml.state_rows(r)
+
+def gigabit_status(ip: str) -> str:
+    """admin/oper-status ของทุก GigabitEthernet/Loopback จาก interfaces-state ใน <get> เดียว (แทน CLI scraping)"""
+    rows = [(name, interface_summary.state(admin, oper))
+            for name, admin, oper in interface_states(ip) if interface_summary.wanted(name)]
+    if not rows:
+        raise RuntimeError("interfaces-state has no GigabitEthernet/Loopback")
+    return interface_summary.summarize(rows)
+
+# ---------------- bulk: หลาย loopback ใน edit-config เดียว ----------------
+def list_interfaces(ip: str) -> dict[str, str]:
+    """{name: description} ของทุก interface ใน running-config (get-config ครั้งเดียว ขอแค่ <name>/<description>)"""
+    with _session(ip) as m:
+        resp = m.get_config(source="running", filter=netconf_xml.FILTER_CFG_DESCRIPTIONS)
+    with metrics.timed("response_parse", transport="netconf", router=ip):
+        return netconf_xml.interface_descriptions(resp)
+
+def bulk_edit(ip: str, create: list[dict] = (), delete: list[str] = ()) -> tuple[bool, str]:
+    """
+    create: [{name, description, ip, netmask}] / delete: [name] → edit-config เดียว
+    router ทำทั้งชุดหรือไม่ทำเลย (rpc-error ตัวแรกยกเลิกทั้งหมด) คืน (ok, ข้อความ error)
+    """
+    parts = [f"""
+    <interface nc:operation="create">
+      <name>{it["name"]}</name>
+      <description>{it["description"]}</description>
+      <type xmlns:ianaift="urn:ietf:params:xml:ns:yang:iana-if-type">ianaift:softwareLoopback</type>
+      <enabled>true</enabled>
+      <ipv4 xmlns="urn:ietf:params:xml:ns:yang:ietf-ip">
+        <address>
+          <ip>{it["ip"]}</ip>
+          <netmask>{it["netmask"]}</netmask>
+        </address>
+      </ipv4>
+    </interface>""" for it in create]
+    parts += [f"""
+    <interface nc:operation="remove">
+      <name>{name}</name>
+    </interface>""" for name in delete]
+    cfg = f"""
+<config xmlns:nc="urn:ietf:params:xml:ns:netconf:base:1.0">
+  <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">{"".join(parts)}
   </interfaces>
-</filter>
+</config>
 """
-        r2 = m.get_config(source="running", filter=filt2)
-        if IF_NAME_CFG not in r2.xml:
-            return f"No Interface {IF_NAME_MSG}"
-        d2 = xmltodict.parse(r2.xml)
-        iface2 = d2["rpc-reply"]["data"]["interfaces"]["interface"]
-        enabled = str(iface2.get("enabled", "false")).lower() == "true"
-
-        if enabled and oper == "up":
-            return f"Interface {IF_NAME_MSG} is enabled"
-        if not enabled:
-            return f"Interface {IF_NAME_MSG} is disabled"
-        return f"Interface {IF_NAME_MSG} admin={'up' if enabled else 'down'}, oper={oper}"
-
-def handle_command(cmd: str, router_ip: str) -> str:
-    try:
+    with _session(ip) as m:
+        try:
+            r = m.edit_config(target="running", config=cfg)
+        except RPCError as e:
+            return False, f"rpc-error {e.tag}: {e.message or ''}".strip()
+    return netconf_xml.is_ok(r), ""
+
+def _from_cache(cmd: str, router_ip: str, refresh: bool = False):
+    """คำตอบที่ได้จาก state cache ล้วน ๆ (ไม่ต้องเช็ค circuit / เปิด session) หรือ None ถ้าต้องคุยกับ router"""
+    t = tenant.current()
+    if cmd == "status":
+        cached = not refresh and CACHE.contains(router_ip, f"status:{t.if_name_cfg}")
+        return status(router_ip) if cached else None
+    if not CACHE.contains(router_ip, f"exists:{t.if_name_cfg}"):
+        return None
+    exists = has_interface(router_ip)
+    if cmd == "create" and NETCONF_EDIT_MODE != "atomic" and exists:
+        return f"Cannot create: Interface {t.if_name_msg}"
+    if cmd == "delete" and NETCONF_EDIT_MODE != "atomic" and not exists:
+        return f"Cannot delete: Interface {t.if_name_msg}"
+    if cmd == "enable" and not exists:
+        return f"Cannot enable: Interface {t.if_name_msg}"
+    if cmd == "disable" and not exists:
+        return f"Cannot shutdown: Interface {t.if_name_msg}"
+    return None
+
+def _handle(cmd: str, router_ip: str, refresh: bool = False) -> str:
+    # ถือ session เดียวตลอดคำสั่ง: pre-check has_interface กับ edit-config ใช้ session เดียวกัน
+    t = tenant.current()
+    cached = _from_cache(cmd, router_ip, refresh)
+    if cached is not None:
+        return cached
+    with _session(router_ip):
         if cmd == "create":
-            return create(router_ip) if not has_interface(router_ip) else f"Cannot create: Interface {IF_NAME_MSG}"
+            if NETCONF_EDIT_MODE == "atomic":
+                return create(router_ip)
+            return create(router_ip) if not has_interface(router_ip) else f"Cannot create: Interface {t.if_name_msg}"
         if cmd == "delete":
-            return delete(router_ip) if has_interface(router_ip) else f"Cannot delete: Interface {IF_NAME_MSG}"
+            if NETCONF_EDIT_MODE == "atomic":
+                return delete(router_ip)
+            return delete(router_ip) if has_interface(router_ip) else f"Cannot delete: Interface {t.if_name_msg}"
         if cmd == "enable":
-            return enable(router_ip) if has_interface(router_ip) else f"Cannot enable: Interface {IF_NAME_MSG}"
+            return enable(router_ip) if has_interface(router_ip) else f"Cannot enable: Interface {t.if_name_msg}"
         if cmd == "disable":
-            return disable(router_ip) if has_interface(router_ip) else f"Cannot shutdown: Interface {IF_NAME_MSG}"
+            return disable(router_ip) if has_interface(router_ip) else f"Cannot shutdown: Interface {t.if_name_msg}"
         if cmd == "status":
-            return status(router_ip)
+            return status(router_ip, refresh)
         return "Unknown command"
+
+def run_command(cmd: str, router_ip: str, refresh: bool = False) -> str:
+    """เหมือน handle_command แต่ปล่อย error ของ transport ออกไป (ให้โหมด auto สลับไป RESTCONF ได้)"""
+    t = tenant.current()
+    try:
+        result = _handle(cmd, router_ip, refresh)
+    except TransportError:
+        # session ใน pool ตายระหว่างใช้ (เช่น router ตัด idle) → pool ทิ้งไปแล้ว ลองใหม่อีกครั้ง
+        result = _handle(cmd, router_ip, refresh)
+    after_write(router_ip, t.if_name_cfg, cmd, result)
+    return result
+
+def handle_command(cmd: str, router_ip: str, refresh: bool = False) -> str:
+    t = tenant.current()
+    try:
+        return run_command(cmd, router_ip, refresh)
+    except DeadlineExceeded:
+        CACHE.invalidate(router_ip)
+        raise
+    except CircuitOpen:
+        raise
     except Exception:
-        if cmd == "create":  return f"Cannot create: Interface {IF_NAME_MSG}"
-        if cmd == "delete":  return f"Cannot delete: Interface {IF_NAME_MSG}"
-        if cmd == "enable":  return f"Cannot enable: Interface {IF_NAME_MSG}"
-        if cmd == "disable": return f"Cannot shutdown: Interface {IF_NAME_MSG}"
-        if cmd == "status":  return f"No Interface {IF_NAME_MSG}"
+        if cmd == "create":  return f"Cannot create: Interface {t.if_name_msg}"
+        if cmd == "delete":  return f"Cannot delete: Interface {t.if_name_msg}"
+        if cmd == "enable":  return f"Cannot enable: Interface {t.if_name_msg}"
+        if cmd == "disable": return f"Cannot shutdown: Interface {t.if_name_msg}"
+        if cmd == "status":  return f"No Interface {t.if_name_msg}"
         return "Unknown command"
@@ -0,0 +1,200 @@
+# netconf_subscriber.py
+# ตารางสถานะ interface (admin/oper) ต่อ router ในหน่วยความจำ ป้อนด้วย YANG-push (establish-subscription แบบ dial-in)
+# status / gi-status ตอบจากตารางได้ทันทีโดยไม่ต้องถาม router; subscription หลุด → poll แทน แล้วค่อยลอง subscribe ใหม่
+import os
+import time
+import threading
+
+from lxml import etree
+
+import netconf_final
+import netconf_xml
+import interface_summary
+import tenant
+from state_cache import CACHE
+
+NETCONF_SUBSCRIBE     = os.environ.get("NETCONF_SUBSCRIBE", "0").strip().lower() in ("1", "true", "yes")
+NETCONF_PUSH_PERIOD   = float(os.environ.get("NETCONF_PUSH_PERIOD", 10))     # วินาที ระหว่าง push-update แบบ periodic
+NETCONF_POLL_INTERVAL = float(os.environ.get("NETCONF_POLL_INTERVAL", 10))   # poll ระหว่างที่ subscription ใช้ไม่ได้
+NETCONF_RESUBSCRIBE   = float(os.environ.get("NETCONF_RESUBSCRIBE", 30))     # poll นานเท่าไรก่อนลอง subscribe ใหม่
+# ไม่ได้ push-update เกินกี่รอบของ period ถือว่า subscription ตาย / ตารางไม่สด
+MISSED_PERIODS = 3
+
+_ESTABLISH = etree.fromstring(f"""
+<establish-subscription xmlns="{netconf_xml.EN}"
+    xmlns:yp="urn:ietf:params:xml:ns:yang:ietf-yang-push">
+  <stream>yp:yang-push</stream>
+  <yp:xpath-filter xmlns:if="{netconf_xml.IF}">/if:interfaces-state</yp:xpath-filter>
+  <yp:period>{int(NETCONF_PUSH_PERIOD * 100)}</yp:period>
+</establish-subscription>""")
+
+class _Table:
+    __slots__ = ("rows", "source", "updated_at", "expires_at", "dirty_at", "subscribed", "pushes", "polls", "last_error")
+
+    def __init__(self):
+        self.rows = {}           # name -> (admin, oper)
+        self.source = ""         # "push" | "poll" | "sync"
+        self.updated_at = 0.0
+        self.expires_at = 0.0
+        self.dirty_at = 0.0      # เวลาที่มีการสั่งเขียน (ข้อมูลก่อนหน้านี้ใช้ไม่ได้)
+        self.subscribed = False
+        self.pushes = 0
+        self.polls = 0
+        self.last_error = ""
+
+    def fresh(self, now: float) -> bool:
+        return self.updated_at > self.dirty_at and now < self.expires_at
+
+_tables = {}
+_lock = threading.Lock()
+_stop = threading.Event()
+
+def _get(router: str) -> _Table:
+    # เรียกภายใต้ _lock
+    tb = _tables.get(router)
+    if tb is None:
+        tb = _tables[router] = _Table()
+    return tb
+
+def _update(router: str, rows, source: str, ttl: float) -> None:
+    now = time.monotonic()
+    with _lock:
+        tb = _get(router)
+        tb.rows = {name: (admin, oper) for name, admin, oper in rows}
+        tb.source = source
+        tb.updated_at = now
+        tb.expires_at = now + ttl
+        if source == "push":
+            tb.pushes += 1
+        elif source == "poll":
+            tb.polls += 1
+
+def _mark_dirty(router: str) -> None:
+    with _lock:
+        tb = _tables.get(router)
+        if tb is not None:
+            tb.dirty_at = time.monotonic()
+
+# สั่งเขียนผ่าน bot (create/delete/enable/disable/bulk) → state cache ถูกล้าง → ตารางของ router นั้นรอข้อมูลใหม่
+CACHE.on_invalidate(_mark_dirty)
+
+# ---------------- อ่านจากตาราง ----------------
+def rows(router: str):
+    """[(name, admin, oper)] ถ้าตารางยังสด ไม่งั้น None (ผู้เรียกไปถาม router เอง)"""
+    with _lock:
+        tb = _tables.get(router)
+        if tb is None or not tb.fresh(time.monotonic()):
+            return None
+        return [(name, admin, oper) for name, (admin, oper) in tb.rows.items()]
+
+def status(router: str):
+    """ข้อความแบบเดียวกับ status ของ transport สำหรับ loopback ของ tenant ปัจจุบัน; None = ตารางไม่สด"""
+    t = tenant.current()
+    with _lock:
+        tb = _tables.get(router)
+        if tb is None or not tb.fresh(time.monotonic()):
+            return None
+        entry = tb.rows.get(t.if_name_cfg)
+    if entry is None:
+        return f"No Interface {t.if_name_msg}"
+    admin, oper = entry
+    if admin == "up" and oper == "up":
+        return f"Interface {t.if_name_msg} is enabled"
+    if admin != "up":
+        return f"Interface {t.if_name_msg} is disabled"
+    return f"Interface {t.if_name_msg} admin=up, oper={oper or 'down'}"
+
+def gigabit_status(router: str):
+    """สรุปแบบ interface_summary จากตาราง; None = ตารางไม่สด"""
+    current = rows(router)
+    if current is None:
+        return None
+    picked = [(name, interface_summary.state(admin, oper)) for name, admin, oper in current
+              if interface_summary.wanted(name)]
+    return interface_summary.summarize(picked) if picked else None
+
+# ---------------- subscription / poll ----------------
+def _close(m) -> None:
+    try:
+        m.close_session()
+    except Exception:
+        try:
+            m._session.close()
+        except Exception:
+            pass
+
+def _subscribe_once(router: str) -> None:
+    """ถือ subscription ไว้จนกว่าจะหลุด (คืนค่าเมื่อหลุด / router ไม่รองรับ)"""
+    m = netconf_final.open_session(router)
+    try:
+        sub_id = netconf_xml.subscription_id(m.dispatch(_ESTABLISH))
+        if sub_id is None:
+            raise RuntimeError("establish-subscription rejected")
+        stale_after = NETCONF_PUSH_PERIOD * MISSED_PERIODS
+        # ตั้งต้นตารางด้วย <get> เดียว แล้วให้ push-update ดูแลต่อ
+        _update(router, netconf_xml.state_rows(m.get(netconf_xml.FILTER_STATE_ALL)), "sync", stale_after)
+        with _lock:
+            _get(router).subscribed = True
+        print(f"[subscribe] {router}: subscription {sub_id} established")
+        last_push = time.monotonic()
+        while not _stop.is_set():
+            n = m.take_notification(block=True, timeout=1)
+            if n is None:
+                if not m.connected:
+                    raise RuntimeError("session closed")
+                if time.monotonic() - last_push > stale_after:
+                    raise RuntimeError(f"no push-update for {stale_after:g}s")
+                continue
+            pushed = netconf_xml.notification_rows(n.notification_ele)
+            if pushed is not None:
+                last_push = time.monotonic()
+                _update(router, pushed, "push", stale_after)
+    finally:
+        with _lock:
+            _get(router).subscribed = False
+        _close(m)
+
+def _poll_until(router: str, until: float) -> None:
+    while not _stop.is_set() and time.monotonic() < until:
+        try:
+            _update(router, netconf_final.interface_states(router), "poll", NETCONF_POLL_INTERVAL * 2)
+        except Exception as e:
+            with _lock:
+                _get(router).last_error = str(e)[:120]
+        _stop.wait(NETCONF_POLL_INTERVAL)
+
+def _loop(router: str) -> None:
+    while not _stop.is_set():
+        try:
+            _subscribe_once(router)
+        except Exception as e:
+            with _lock:
+                _get(router).last_error = str(e)[:120]
+            print(f"[subscribe] {router}: {str(e)[:120]}; polling every {NETCONF_POLL_INTERVAL:g}s")
+        _poll_until(router, time.monotonic() + NETCONF_RESUBSCRIBE)
+
+def start(routers) -> list[threading.Thread]:
+    _stop.clear()
+    threads = []
+    for router in sorted(routers):
+        with _lock:
+            _get(router)
+        th = threading.Thread(target=_loop, args=(router,), name=f"subscribe-{router}", daemon=True)
+        th.start()
+        threads.append(th)
+    return threads
+
+def stop() -> None:
+    _stop.set()
+
+# ---------------- report ----------------
+def summary_text() -> str:
+    now = time.monotonic()
+    with _lock:
+        items = sorted(_tables.items())
+        lines = [f"{router}: {'subscribed' if tb.subscribed else 'polling'}, "
+                 f"{len(tb.rows)} interfaces, {tb.source or '-'} {now - tb.updated_at:.0f}s ago"
+                 f"{'' if tb.fresh(now) else ' (stale)'} [{tb.pushes} push/{tb.polls} poll]"
+                 + (f" last error: {tb.last_error}" if tb.last_error and not tb.subscribed else "")
+                 for router, tb in items if tb.updated_at or tb.last_error]
+    return "Live state:\n" + "\n".join(lines) if lines else "Live state: no data"
@@ -0,0 +1,112 @@
+# netconf_xml.py
+# อ่าน reply ของ NETCONF ด้วย lxml XPath ที่ compile ไว้ตั้งแต่ import
+# ใช้ tree ที่ ncclient parse ไว้แล้ว (ไม่ parse ซ้ำด้วย xmltodict / ไม่ค้น substring ใน XML ทั้งก้อน)
+# และดึงเฉพาะ leaf ที่คำสั่งต้องใช้
+from xml.sax.saxutils import escape
+from lxml import etree
+
+NC = "urn:ietf:params:xml:ns:netconf:base:1.0"
+IF = "urn:ietf:params:xml:ns:yang:ietf-interfaces"
+EN = "urn:ietf:params:xml:ns:yang:ietf-event-notifications"   # establish-subscription (IOS-XE)
+NS = {"nc": NC, "if": IF, "en": EN}
+
+# reply ที่เป็น str/bytes (เช่นใน bench) — ไม่ resolve entity, รองรับ reply ใหญ่
+PARSER = etree.XMLParser(resolve_entities=False, huge_tree=True)
+
+def _xpath(expr: str) -> etree.XPath:
+    return etree.XPath(expr, namespaces=NS, smart_strings=False)
+
+# ---------------- XPath (context = <rpc-reply>) ----------------
+_CFG_HAS       = _xpath("boolean(nc:data/if:interfaces/if:interface[if:name=$name])")
+_CFG_ENABLED   = _xpath("string(nc:data/if:interfaces/if:interface[if:name=$name]/if:enabled)")
+_CFG_NAMES     = _xpath("nc:data/if:interfaces/if:interface/if:name/text()")
+_CFG_IFACES    = _xpath("nc:data/if:interfaces/if:interface")
+_STATE_OPER    = _xpath("string(nc:data/if:interfaces-state/if:interface[if:name=$name]/if:oper-status)")
+_STATE_IFACES  = _xpath("nc:data/if:interfaces-state/if:interface")
+# context = <notification> (push-update ของ YANG-push ห่อ interfaces-state ไว้ใน datastore-contents)
+_PUSH_STATE    = _xpath("boolean(.//if:interfaces-state)")
+_PUSH_IFACES   = _xpath(".//if:interfaces-state/if:interface")
+# context = <rpc-reply> ของ establish-subscription
+_SUB_RESULT    = _xpath("string(en:subscription-result)")
+_SUB_ID        = _xpath("string(en:subscription-id)")
+
+_OK = f"{{{NC}}}ok"
+_NAME, _ADMIN, _OPER, _DESCR = (f"{{{IF}}}{leaf}" for leaf in ("name", "admin-status", "oper-status", "description"))
+
+# ---------------- filter (สร้างครั้งเดียว ใส่แค่ชื่อ interface ตอนเรียก) ----------------
+_IF_OPEN = f'<interfaces xmlns="{IF}">'
+_STATE_OPEN = f'<interfaces-state xmlns="{IF}">'
+
+_FILTER_CFG_NAME = f"<filter>{_IF_OPEN}<interface><name>{{name}}</name></interface></interfaces></filter>"
+_FILTER_STATUS = (f"<filter>{_IF_OPEN}<interface><name>{{name}}</name></interface></interfaces>"
+                  f"{_STATE_OPEN}<interface><name>{{name}}</name></interface></interfaces-state></filter>")
+FILTER_CFG_DESCRIPTIONS = f"<filter>{_IF_OPEN}<interface><name/><description/></interface></interfaces></filter>"
+FILTER_STATE_ALL = (f"<filter>{_STATE_OPEN}<interface><name/><admin-status/><oper-status/>"
+                    f"</interface></interfaces-state></filter>")
+
+def filter_cfg(name: str) -> str:
+    """get-config: interface เดียว (มี/ไม่มี)"""
+    return _FILTER_CFG_NAME.format(name=escape(name))
+
+def filter_status(name: str) -> str:
+    """get: config (enabled) + state (oper-status) ของ interface เดียวใน RPC เดียว"""
+    return _FILTER_STATUS.format(name=escape(name))
+
+# ---------------- อ่าน reply ----------------
+def root(reply):
+    """<rpc-reply> ที่ ncclient parse ไว้แล้ว; str/bytes parse ด้วย PARSER"""
+    if isinstance(reply, (str, bytes)):
+        return etree.fromstring(reply.encode() if isinstance(reply, str) else reply, PARSER)
+    if isinstance(reply, etree._Element):
+        return reply
+    reply.ok   # ให้ ncclient parse (ถ้ายังไม่ได้ทำ)
+    r = getattr(reply, "_root", None)
+    return r if r is not None else etree.fromstring(reply.xml.encode(), PARSER)
+
+def is_ok(reply) -> bool:
+    return root(reply).find(_OK) is not None
+
+def has_interface(reply, name: str) -> bool:
+    return _CFG_HAS(root(reply), name=name)
+
+def interface_status(reply, name: str) -> tuple[bool, bool, str]:
+    """(มีใน config, enabled, oper-status หรือ "" ถ้าไม่มีใน state)"""
+    r = root(reply)
+    if not _CFG_HAS(r, name=name):
+        return False, False, ""
+    return True, _CFG_ENABLED(r, name=name).strip().lower() == "true", _STATE_OPER(r, name=name).strip()
+
+def interface_names(reply) -> set[str]:
+    return {n.strip() for n in _CFG_NAMES(root(reply))}
+
+def interface_descriptions(reply) -> dict[str, str]:
+    """{name: description} ของทุก interface ใน config ("" ถ้าไม่มี description)"""
+    out = {}
+    for el in _CFG_IFACES(root(reply)):
+        leaves = {c.tag: c.text for c in el}
+        out[(leaves.get(_NAME) or "").strip()] = (leaves.get(_DESCR) or "").strip()
+    return out
+
+def _rows(elements) -> list[tuple[str, str, str]]:
+    rows = []
+    for el in elements:
+        leaves = {c.tag: c.text for c in el}   # ไล่ลูกครั้งเดียว แทน findtext ทีละ leaf
+        rows.append(((leaves.get(_NAME) or "").strip(), leaves.get(_ADMIN) or "", leaves.get(_OPER) or ""))
+    return rows
+
+def state_rows(reply) -> list[tuple[str, str, str]]:
+    """[(name, admin-status, oper-status)] จาก interfaces-state ตามลำดับของ router"""
+    return _rows(_STATE_IFACES(root(reply)))
+
+def notification_rows(ele):
+    """rows แบบ state_rows จาก notification (push-update); None = notification อื่นที่ไม่มี interfaces-state"""
+    if not _PUSH_STATE(ele):
+        return None
+    return _rows(_PUSH_IFACES(ele))
+
+def subscription_id(reply):
+    """id ของ subscription ถ้า router ตอบ ok (เช่น "notif-bis:ok") ไม่งั้น None"""
+    r = root(reply)
+    if _SUB_RESULT(r).strip().rpartition(":")[2] != "ok":
+        return None
+    return _SUB_ID(r).strip() or None
@@ -1,20 +1,90 @@
-from netmiko import ConnectHandler
+from netmiko import ConnectHandler, NetmikoTimeoutException, ReadTimeout
 import os
 import re
 from typing import Optional
+import metrics
+import deadline
+from deadline import DeadlineExceeded
+import health
+import interface_summary
+from session_pool import SessionPool
+from state_cache import CACHE
 
 USERNAME = os.environ.get("ROUTER_USER") or os.environ.get("ROUTER_USERNAME") or "admin"
 PASSWORD = os.environ.get("ROUTER_PASS") or os.environ.get("ROUTER_PASSWORD") or "cisco"
+ENABLE_SECRET = os.environ.get("ROUTER_ENABLE", "")   # ตัวเดียวกับ ansible_become_password ของ ansible_final
+# VTY line ของ IOS-XE มีน้อยและใช้ร่วมกับเพื่อน → จำกัด session พร้อมกันต่อ router
+NETMIKO_MAX_SESSIONS = int(os.environ.get("NETMIKO_MAX_SESSIONS", 2))
+NETMIKO_IDLE_TTL     = float(os.environ.get("NETMIKO_IDLE_TTL", 120))
+SSH_PORT             = int(os.environ.get("SSH_PORT", 22))
+SSH_CONNECT_TIMEOUT  = float(os.environ.get("SSH_CONNECT_TIMEOUT", 10))
+health.register("cli", SSH_PORT)
 
 def _device(ip: str) -> dict:
     return {
         "device_type": "cisco_ios",
         "host": ip,
+        "port": SSH_PORT,
         "username": USERNAME,
         "password": PASSWORD,
+        "secret": ENABLE_SECRET,
         "fast_cli": True,
+        "conn_timeout": deadline.cap(SSH_CONNECT_TIMEOUT),
+        "auth_timeout": deadline.cap(SSH_CONNECT_TIMEOUT),
     }
 
+def _connect(ip: str):
+    ssh = ConnectHandler(**_device(ip))
+    if ENABLE_SECRET:
+        # router ที่ login แล้วได้ user EXEC (>) → เข้า enable ก่อนเก็บลง pool (show run / config ต้องใช้)
+        ssh.enable()
+    return ssh
+
+def _alive(ssh) -> bool:
+    return ssh.is_alive()
+
+# session SSH ที่ login + ตั้ง terminal length ไว้แล้ว เก็บไว้ใช้ซ้ำต่อ router
+def _close(ssh) -> None:
+    if deadline.expired():
+        # หมดเวลาแล้ว → ปิด SSH ทันที ไม่ต้องส่ง exit/รอ prompt
+        ssh.paramiko_cleanup()
+        return
+    ssh.disconnect()
+
+POOL = SessionPool(_connect, _alive, _close,
+                   max_per_key=NETMIKO_MAX_SESSIONS, idle_ttl=NETMIKO_IDLE_TTL,
+                   name="netmiko", discard_on_error=True)
+
+def _session(ip: str):
+    return POOL.session(ip)
+
+def _run(ip: str, fn):
+    """รัน fn(ssh) บน session จาก pool; ถ้า session เก่าหลุดกลางทาง (router ตัด VTY) login ใหม่แล้วลองอีกครั้ง"""
+    trial = health.guard(ip, "cli")
+    try:
+        for attempt in range(2):
+            got_session = False
+            try:
+                with _session(ip) as ssh:
+                    got_session = True
+                    # send_command ทุกตัวใน fn รอ prompt ไม่เกินเวลาที่เหลือของคำสั่ง
+                    ssh.read_timeout_override = deadline.remaining()
+                    with metrics.timed("device_rpc", transport="cli", router=ip):
+                        result = fn(ssh)
+                health.success(ip, "cli")
+                return result
+            except (OSError, EOFError, NetmikoTimeoutException, ReadTimeout) as e:
+                expired = deadline.expired()
+                # login ไม่ผ่านตั้งแต่แรก → ไม่ต้องลองซ้ำให้เสียเวลา timeout อีกรอบ
+                if expired or attempt or not got_session:
+                    health.failure(ip, "cli", e)
+                    if expired:
+                        raise DeadlineExceeded(deadline.current()[1])
+                    raise
+    finally:
+        if trial:
+            health.release(ip, "cli")
+
 def gigabit_status(ip: str) -> str:
     """
     สรุปสถานะทั้ง GigabitEthernet* และ Loopback* จาก 'show ip interface brief'
@@ -22,67 +92,51 @@ def gigabit_status(ip: str) -> str:
       GigabitEthernet1 up, GigabitEthernet2 administratively down, Loopback66070315 up
       -> Gi: 1 up, 0 down, 1 admin-down | Lo: 1 up, 0 down, 0 admin-down
     """
-    with ConnectHandler(**_device(ip)) as ssh:
-        gi_up = gi_down = gi_admin = 0
-        lo_up = lo_down = lo_admin = 0
-        lines_out = []
-
-        # พยายามใช้ TextFSM ก่อน (ถ้ามี ntc_templates)
-        res = ssh.send_command("show ip interface brief", use_textfsm=True)
-
-        def _acc(name: str, status: str, proto: str):
-            nonlocal gi_up, gi_down, gi_admin, lo_up, lo_down, lo_admin
-            status_l = (status or "").lower()
-            proto_l = (proto or "").lower()
-            is_admin = "administratively" in status_l
-            is_up = (status_l == "up") and (proto_l in ("up", ""))
-
-            if name.startswith("GigabitEthernet"):
-                if is_admin:
-                    gi_admin += 1; lines_out.append(f"{name} administratively down")
-                elif is_up:
-                    gi_up += 1;    lines_out.append(f"{name} up")
-                else:
-                    gi_down += 1;  lines_out.append(f"{name} down")
-            elif name.startswith("Loopback"):
-                if is_admin:
-                    lo_admin += 1; lines_out.append(f"{name} administratively down")
-                elif is_up:
-                    lo_up += 1;    lines_out.append(f"{name} up")
-                else:
-                    lo_down += 1;  lines_out.append(f"{name} down")
-
-        if isinstance(res, list):
-            # โหมด parsed (list[dict])
-            for it in res:
-                name   = it.get("intf") or it.get("interface") or ""
-                if not (name.startswith("GigabitEthernet") or name.startswith("Loopback")):
-                    continue
-                status = it.get("status") or it.get("Status") or ""
-                proto  = it.get("proto")  or it.get("protocol") or ""
-                _acc(name, status, proto)
+    return _run(ip, _gigabit_status_on)
+
+def _gigabit_status_on(ssh) -> str:
+    rows = []
+
+    # พยายามใช้ TextFSM ก่อน (ถ้ามี ntc_templates)
+    res = ssh.send_command("show ip interface brief", use_textfsm=True)
+
+    def _acc(name: str, status: str, proto: str):
+        status_l = (status or "").lower()
+        proto_l = (proto or "").lower()
+        if "administratively" in status_l:
+            rows.append((name, interface_summary.ADMIN_DOWN))
+        elif status_l == "up" and proto_l in ("up", ""):
+            rows.append((name, interface_summary.UP))
         else:
-            # โหมดข้อความดิบ
-            raw = res if isinstance(res, str) else ssh.send_command("show ip interface brief")
-            for line in raw.splitlines():
-                line = line.strip()
-                if not (line.startswith("GigabitEthernet") or line.startswith("Loopback")):
-                    continue
-                cols = line.split()
-                if len(cols) < 3:
-                    continue
-                name = cols[0]
-                if "administratively down" in line.lower():
-                    status, proto = "administratively down", cols[-1]
-                else:
-                    status, proto = cols[-2], cols[-1]
-                _acc(name, status, proto)
-
-        summary = (
-            f"Gi: {gi_up} up, {gi_down} down, {gi_admin} admin-down | "
-            f"Lo: {lo_up} up, {lo_down} down, {lo_admin} admin-down"
-        )
-        return f"{', '.join(lines_out)} -> {summary}"
+            rows.append((name, interface_summary.DOWN))
+
+    if isinstance(res, list):
+        # โหมด parsed (list[dict])
+        for it in res:
+            name   = it.get("intf") or it.get("interface") or ""
+            if not interface_summary.wanted(name):
+                continue
+            status = it.get("status") or it.get("Status") or ""
+            proto  = it.get("proto")  or it.get("protocol") or ""
+            _acc(name, status, proto)
+    else:
+        # โหมดข้อความดิบ
+        raw = res if isinstance(res, str) else ssh.send_command("show ip interface brief")
+        for line in raw.splitlines():
+            line = line.strip()
+            if not interface_summary.wanted(line):
+                continue
+            cols = line.split()
+            if len(cols) < 3:
+                continue
+            name = cols[0]
+            if "administratively down" in line.lower():
+                status, proto = "administratively down", cols[-1]
+            else:
+                status, proto = cols[-2], cols[-1]
+            _acc(name, status, proto)
+
+    return interface_summary.summarize(rows)
 
 # รองรับการเรียกชื่ออื่น (เช่น gigabit_status_for_ip)
 def gigabit_status_for_ip(ip: str) -> str:
@@ -95,27 +149,59 @@ def _clean_banner(s: str) -> str:
     s = re.sub(r"(?i)^motd banner.*\n", "", s)
     return s.strip()
 
-def read_motd(ip: str) -> Optional[str]:
+def read_motd(ip: str, refresh: bool = False) -> Optional[str]:
     """
     อ่านค่า MOTD ด้วย Netmiko/TextFSM:
       - ถ้ามี MOTD → คืนข้อความ (string)
       - ถ้าไม่มี / อ่านไม่ได้ → คืน None 
+    ผลที่อ่านได้เก็บใน state cache (refresh=True = บังคับอ่านจาก router)
     """
+    return CACHE.cached(ip, "motd", lambda: _read_motd(ip), refresh, cache_if=lambda v: v is not None)
+
+def _read_motd(ip: str) -> Optional[str]:
+    def _read(ssh) -> Optional[str]:
+        # 1) show running-config | section banner
+        out = ssh.send_command("show running-config | section banner")
+        if out and "banner motd" in out.lower():
+            m = re.search(r"(?is)banner\s+motd\s+(\S)\s+(.*?)\1", out)
+            if m and m.group(2).strip():
+                return _clean_banner(m.group(2))
+
+        # 2) fallback: show banner motd
+        out2 = ssh.send_command("show banner motd")
+        if out2 and "not configured" not in out2.lower():
+            text = _clean_banner(out2)
+            return text if text else None
+
+        return None
+
     try:
-        with ConnectHandler(**_device(ip)) as ssh:
-            # 1) show running-config | section banner
-            out = ssh.send_command("show running-config | section banner")
-            if out and "banner motd" in out.lower():
-                m = re.search(r"(?is)banner\s+motd\s+(\S)\s+(.*?)\1", out)
-                if m and m.group(2).strip():
-                    return _clean_banner(m.group(2))
-
-            # 2) fallback: show banner motd
-            out2 = ssh.send_command("show banner motd")
-            if out2 and "not configured" not in out2.lower():
-                text = _clean_banner(out2)
-                return text if text else None
-
-            return None
+        return _run(ip, _read)
+    except (health.CircuitOpen, DeadlineExceeded):
+        raise   # ให้ผู้ใช้ได้ "circuit open" / "timed out" ไม่ใช่ "No MOTD Configured"
     except Exception:
         return None
+
+
+def show_running_config(ip: str) -> str:
+    """'show running-config' ผ่าน session ที่ pool ไว้ (ใช้เป็น backend inprocess ของ ansible_final)"""
+    return _run(ip, lambda ssh: ssh.send_command("show running-config", read_timeout=120))
+
+def _banner_delimiter(text: str) -> str:
+    for ch in "^#%&@~|":
+        if ch not in text:
+            return ch
+    raise ValueError("MOTD text contains every banner delimiter")
+
+def set_banner_motd(ip: str, text: str) -> bool:
+    """ตั้ง banner motd ผ่าน session ที่ pool ไว้ (เทียบเท่า ios_banner state=present)"""
+    delim = _banner_delimiter(text)
+    lines = text.splitlines() or [""]
+    cmds = [f"banner motd {delim}{lines[0]}"] + lines[1:]
+    cmds[-1] = f"{cmds[-1]}{delim}"
+
+    def _apply(ssh) -> bool:
+        out = ssh.send_config_set(cmds, cmd_verify=False)
+        return "% Invalid" not in out and "% Incomplete" not in out
+
+    return bool(_run(ip, _apply))
@@ -2,28 +2,35 @@
 import os
 import time
 import json
+import hashlib
+import threading
 import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from state_cache import CACHE, after_write
+import metrics
+import deadline
+from deadline import DeadlineExceeded
+import health
+from health import CircuitOpen
+import tenant
+import interface_summary
 from dotenv import load_dotenv
 load_dotenv()
 requests.packages.urllib3.disable_warnings()
 
-STUDENT_ID    = os.environ.get("STUDENT_ID", "66070315").strip()
 RESTCONF_PORT = os.environ.get("RESTCONF_PORT", "443").strip()
 
 TIMEOUT = float(os.environ.get("RESTCONF_TIMEOUT", 8))
 RETRIES = int(os.environ.get("RESTCONF_RETRIES", 3))
 BACKOFF = float(os.environ.get("RESTCONF_BACKOFF", 1.5))
+POOL_SIZE = int(os.environ.get("RESTCONF_POOL_SIZE", 4))
+IDLE_TTL  = float(os.environ.get("RESTCONF_IDLE_TTL", 60))
+# "optimistic" = เขียนตรง ๆ แล้วตีความ 404/409/412 (ไม่ต้อง GET pre-check) | "precheck" = แบบเดิม
+WRITE_MODE = os.environ.get("RESTCONF_WRITE_MODE", "optimistic").strip().lower()
+health.register("restconf", int(RESTCONF_PORT))
 
-IF_NAME_CFG = f"Loopback{STUDENT_ID}"
-IF_NAME_MSG = f"loopback {STUDENT_ID}"
-
-def ip_for_student(student_id: str) -> str:
-    last3 = student_id[-3:]
-    x = int(last3[0])
-    y = int(last3[1:])
-    return f"172.{x}.{y}.1"
-
-LOOPBACK_IP = ip_for_student(STUDENT_ID)
+# ชื่อ/IP ของ loopback มาจาก tenant.current() ของแต่ละคำสั่ง (หลายนักศึกษาในโปรเซสเดียว)
 
 def _base(router_ip: str) -> tuple[str, str]:
     base = f"https://{router_ip}:{RESTCONF_PORT}/restconf/data"
@@ -37,121 +44,355 @@ headers = {
 basicauth = (os.environ.get("ROUTER_USER", "admin"),
              os.environ.get("ROUTER_PASS", "cisco"))
 
+# ---------------- keep-alive session ต่อ router ----------------
+# requests.Session + HTTPAdapter เก็บ connection TCP/TLS ไว้ใช้ซ้ำ แทนการ handshake ใหม่ทุก request
+_sessions = {}       # router -> [Session, last_used]
+_closed_totals = {}  # router -> {"requests": n, "connections": n} ของ session ที่ปิดไปแล้ว
+_sessions_lock = threading.Lock()
+
+def _new_session() -> requests.Session:
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0))
+    s.auth = basicauth
+    s.headers.update(headers)
+    s.verify = False
+    return s
+
+def _pool_counters(s: requests.Session) -> tuple[int, int]:
+    reqs = conns = 0
+    pm = s.get_adapter("https://").poolmanager
+    for key in list(pm.pools.keys()):
+        pool = pm.pools.get(key)
+        if pool is not None:
+            reqs += pool.num_requests
+            conns += pool.num_connections
+    return reqs, conns
+
+def _retire(router: str, s: requests.Session) -> None:
+    reqs, conns = _pool_counters(s)
+    tot = _closed_totals.setdefault(router, {"requests": 0, "connections": 0})
+    tot["requests"] += reqs
+    tot["connections"] += conns
+    s.close()
+
+def _session_for(url: str) -> requests.Session:
+    router = urlsplit(url).hostname or ""
+    now = time.time()
+    with _sessions_lock:
+        entry = _sessions.get(router)
+        if entry and now - entry[1] > IDLE_TTL:
+            # ว่างนานเกิน → router น่าจะตัด keep-alive ไปแล้ว เปิด session ใหม่
+            _retire(router, entry[0])
+            entry = None
+        if entry is None:
+            entry = [_new_session(), now]
+            _sessions[router] = entry
+        entry[1] = now
+        return entry[0]
+
+def connection_stats() -> dict:
+    """จำนวน request เทียบกับจำนวน connection (handshake) ที่เปิดจริง ต่อ router"""
+    out = {}
+    with _sessions_lock:
+        routers = set(_sessions) | set(_closed_totals)
+        for router in routers:
+            tot = _closed_totals.get(router, {"requests": 0, "connections": 0})
+            reqs, conns = tot["requests"], tot["connections"]
+            if router in _sessions:
+                r2, c2 = _pool_counters(_sessions[router][0])
+                reqs, conns = reqs + r2, conns + c2
+            out[router] = {
+                "requests": reqs,
+                "connections": conns,
+                "reused": max(0, reqs - conns),
+            }
+    return out
+
+def close_sessions() -> None:
+    with _sessions_lock:
+        for router, (s, _) in list(_sessions.items()):
+            _retire(router, s)
+        _sessions.clear()
+
+# ---------------- ETag / Last-Modified ต่อ resource ----------------
+# เก็บ validator ล่าสุดที่ router ส่งมา แล้วใช้ If-Match ตอนเขียน → รู้ว่ามีคนแก้ไปก่อน (412) โดยไม่ต้อง GET ซ้ำ
+# router ส่วนใหญ่ให้ ETag/Last-Modified ของทั้ง datastore จึงเก็บ hash ของ body (จาก GET) ไว้ด้วย
+# ไว้แยกว่า 412 มาจากการแก้ resource นี้จริง หรือแค่ interface อื่นบน router เดียวกันเปลี่ยน
+_validators = {}   # url -> (etag, last_modified, sha256 ของ body หรือ None ถ้าไม่รู้)
+_validators_lock = threading.Lock()
+
+def _digest(r: requests.Response) -> str:
+    return hashlib.sha256(r.content).hexdigest()
+
+def _remember_validators(method: str, url: str, r: requests.Response) -> None:
+    with _validators_lock:
+        if (method == "DELETE" and r.status_code in (200, 204)) or r.status_code in (404, 412):
+            _validators.pop(url, None)
+            return
+        etag, last_mod = r.headers.get("ETag"), r.headers.get("Last-Modified")
+        if r.status_code in (200, 201, 204) and (etag or last_mod):
+            _validators[url] = (etag, last_mod, _digest(r) if method == "GET" and r.status_code == 200 else None)
+
+def _if_match(url: str) -> tuple[dict, str]:
+    """(header เงื่อนไข, hash ของ body ที่เห็นล่าสุด)"""
+    with _validators_lock:
+        etag, last_mod, seen = _validators.get(url, (None, None, None))
+    if etag:
+        return {"If-Match": etag}, seen
+    if last_mod:
+        return {"If-Unmodified-Since": last_mod}, seen
+    return {}, seen
+
 def _request(method: str, url: str, **kwargs) -> requests.Response:
-    kwargs.setdefault("auth", basicauth)
-    kwargs.setdefault("headers", headers)
+    """ส่ง request ผ่าน circuit breaker ของ router: ตอบได้ (ทุก status) = ok, ต่อไม่ได้/timeout = fail"""
+    router = urlsplit(url).hostname
+    trial = health.guard(router, "restconf")
+    try:
+        r = _send(method, url, router, **kwargs)
+    except (requests.exceptions.RequestException, DeadlineExceeded) as e:
+        health.failure(router, "restconf", e)
+        raise
+    else:
+        health.success(router, "restconf")
+    finally:
+        if trial:
+            health.release(router, "restconf")   # ไม่มีผลถ้า success/failure ตัดสินไปแล้ว
+    return r
+
+def _send(method: str, url: str, router: str, **kwargs) -> requests.Response:
+    timeout = kwargs.pop("timeout", TIMEOUT)
+    # ส่ง verify ทุกครั้ง: Session.verify ถูก REQUESTS_CA_BUNDLE/CURL_CA_BUNDLE ใน ENV ทับได้
     kwargs.setdefault("verify", False)
-    kwargs.setdefault("timeout", TIMEOUT)
     last_exc = None
     delay = 0
     for _ in range(RETRIES):
         if delay:
+            # เวลาที่เหลือไม่พอให้รอ backoff แล้วลองใหม่ → เลิกเลย
+            left = deadline.remaining()
+            if left is not None and left <= delay:
+                raise DeadlineExceeded(deadline.current()[1])
             time.sleep(delay)
         try:
-            return requests.request(method.upper(), url, **kwargs)
+            with metrics.timed("device_rpc", transport="restconf", router=router):
+                r = _session_for(url).request(method.upper(), url, timeout=deadline.cap(timeout), **kwargs)
+            _remember_validators(method.upper(), url, r)
+            return r
         except requests.exceptions.RequestException as e:
             last_exc = e
             delay = delay * BACKOFF if delay else BACKOFF
     raise last_exc if last_exc else RuntimeError("Unknown request error")
 
-def has_interface(router_ip: str) -> bool:
+def _conditional(method: str, url: str, router_ip: str, **kwargs) -> requests.Response:
+    """
+    เขียนแบบมีเงื่อนไข If-Match; 412 → GET resource นี้ครั้งเดียว:
+    ตัวมันเองไม่เปลี่ยน (validator ขยับเพราะ interface อื่น) → ส่งซ้ำด้วย validator ใหม่,
+    เปลี่ยนจริง → คืน 412 ไม่เขียนทับ (ผู้เรียกตอบ "Cannot ..." เหมือนเดิม), ไม่มีแล้ว → คืน 404
+    """
+    cond, seen = _if_match(url)
+    r = _request(method, url, headers=cond, **kwargs)
+    if r.status_code != 412:
+        return r
+    CACHE.invalidate(router_ip)
+    current = _request("GET", url)
+    if current.status_code != 200:
+        return current
+    if seen is not None and _digest(current) != seen:
+        print(f"[restconf] conflicting change detected on {url}")
+        return r
+    return _request(method, url, headers=_if_match(url)[0], **kwargs)
+
+def has_interface(router_ip: str, refresh: bool = False) -> bool:
+    t = tenant.current()
+    return CACHE.cached(router_ip, f"exists:{t.if_name_cfg}", lambda: _has_interface(router_ip), refresh)
+
+def _has_interface(router_ip: str) -> bool:
+    t = tenant.current()
     CFG_ROOT, _ = _base(router_ip)
-    r = _request("GET", f"{CFG_ROOT}/interface={IF_NAME_CFG}")
+    r = _request("GET", f"{CFG_ROOT}/interface={t.if_name_cfg}")
     return r.status_code == 200
 
 def create(router_ip: str) -> str:
+    t = tenant.current()
     CFG_ROOT, _ = _base(router_ip)
     payload = {
         "ietf-interfaces:interface": {
-            "name": IF_NAME_CFG,
-            "description": f"Student {STUDENT_ID} loopback",
+            "name": t.if_name_cfg,
+            "description": f"Student {t.student_id} loopback",
             "type": "iana-if-type:softwareLoopback",
             "enabled": True,
-            "ietf-ip:ipv4": {"address": [{"ip": LOOPBACK_IP, "netmask": "255.255.255.0"}]},
+            "ietf-ip:ipv4": {"address": [{"ip": t.loopback_ip, "netmask": "255.255.255.0"}]},
         }
     }
     r = _request("POST", CFG_ROOT, data=json.dumps(payload))
     if r.status_code in (200, 201, 204):
-        return f"Interface {IF_NAME_MSG} is created successfully"
+        return f"Interface {t.if_name_msg} is created successfully"
     if r.status_code == 409:
-        return f"Cannot create: Interface {IF_NAME_MSG}"
-    # fallback PUT
-    r2 = _request("PUT", f"{CFG_ROOT}/interface={IF_NAME_CFG}",
+        return f"Cannot create: Interface {t.if_name_msg}"
+    # fallback PUT — If-None-Match: * กันไม่ให้ PUT ไปทับ interface ที่มีอยู่แล้ว (412)
+    r2 = _request("PUT", f"{CFG_ROOT}/interface={t.if_name_cfg}",
+                  headers={"If-None-Match": "*"},
                   data=json.dumps(payload["ietf-interfaces:interface"]))
     if r2.status_code in (200, 201, 204):
-        return f"Interface {IF_NAME_MSG} is created successfully"
-    if r2.status_code == 409:
-        return f"Cannot create: Interface {IF_NAME_MSG}"
-    return f"Cannot create: Interface {IF_NAME_MSG}"
+        return f"Interface {t.if_name_msg} is created successfully"
+    if r2.status_code in (409, 412):
+        return f"Cannot create: Interface {t.if_name_msg}"
+    return f"Cannot create: Interface {t.if_name_msg}"
 
 def delete(router_ip: str) -> str:
+    t = tenant.current()
     CFG_ROOT, _ = _base(router_ip)
-    r = _request("DELETE", f"{CFG_ROOT}/interface={IF_NAME_CFG}")
+    r = _conditional("DELETE", f"{CFG_ROOT}/interface={t.if_name_cfg}", router_ip)
     if r.status_code in (200, 204):
-        return f"Interface {IF_NAME_MSG} is deleted successfully"
+        return f"Interface {t.if_name_msg} is deleted successfully"
     if r.status_code == 404:
-        return f"Cannot delete: Interface {IF_NAME_MSG}"
-    return f"Cannot delete: Interface {IF_NAME_MSG}"
+        return f"Cannot delete: Interface {t.if_name_msg}"
+    return f"Cannot delete: Interface {t.if_name_msg}"
 
 def enable(router_ip: str) -> str:
+    t = tenant.current()
     CFG_ROOT, _ = _base(router_ip)
-    payload = {"ietf-interfaces:interface": {"name": IF_NAME_CFG,
+    payload = {"ietf-interfaces:interface": {"name": t.if_name_cfg,
                 "type": "iana-if-type:softwareLoopback", "enabled": True}}
-    r = _request("PATCH", f"{CFG_ROOT}/interface={IF_NAME_CFG}", data=json.dumps(payload))
+    # PATCH ไปยัง resource ที่ไม่มีอยู่ → 404 (RFC 8040) จึงไม่ต้อง pre-check
+    r = _conditional("PATCH", f"{CFG_ROOT}/interface={t.if_name_cfg}", router_ip, data=json.dumps(payload))
     if r.status_code in (200, 204):
-        return f"Interface {IF_NAME_MSG} is enabled successfully"
+        return f"Interface {t.if_name_msg} is enabled successfully"
     if r.status_code == 404:
-        return f"Cannot enable: Interface {IF_NAME_MSG}"
-    return f"Cannot enable: Interface {IF_NAME_MSG}"
+        return f"Cannot enable: Interface {t.if_name_msg}"
+    return f"Cannot enable: Interface {t.if_name_msg}"
 
 def disable(router_ip: str) -> str:
+    t = tenant.current()
     CFG_ROOT, _ = _base(router_ip)
-    payload = {"ietf-interfaces:interface": {"name": IF_NAME_CFG,
+    payload = {"ietf-interfaces:interface": {"name": t.if_name_cfg,
                 "type": "iana-if-type:softwareLoopback", "enabled": False}}
-    r = _request("PATCH", f"{CFG_ROOT}/interface={IF_NAME_CFG}", data=json.dumps(payload))
+    # PATCH ไปยัง resource ที่ไม่มีอยู่ → 404 (RFC 8040) จึงไม่ต้อง pre-check
+    r = _conditional("PATCH", f"{CFG_ROOT}/interface={t.if_name_cfg}", router_ip, data=json.dumps(payload))
     if r.status_code in (200, 204):
-        return f"Interface {IF_NAME_MSG} is shutdowned successfully"
+        return f"Interface {t.if_name_msg} is shutdowned successfully"
     if r.status_code == 404:
-        return f"Cannot shutdown: Interface {IF_NAME_MSG}"
-    return f"Cannot shutdown: Interface {IF_NAME_MSG}"
+        return f"Cannot shutdown: Interface {t.if_name_msg}"
+    return f"Cannot shutdown: Interface {t.if_name_msg}"
 
-def status(router_ip: str) -> str:
+def status(router_ip: str, refresh: bool = False) -> str:
+    t = tenant.current()
+    return CACHE.cached(router_ip, f"status:{t.if_name_cfg}", lambda: _status(router_ip), refresh)
+
+def _status(router_ip: str) -> str:
+    t = tenant.current()
     CFG_ROOT, STATE_ROOT = _base(router_ip)
-    r_cfg = _request("GET", f"{CFG_ROOT}/interface={IF_NAME_CFG}")
+    r_cfg = _request("GET", f"{CFG_ROOT}/interface={t.if_name_cfg}")
     if r_cfg.status_code == 404:
-        return f"No Interface {IF_NAME_MSG}"
+        return f"No Interface {t.if_name_msg}"
     if r_cfg.status_code != 200:
-        return f"No Interface {IF_NAME_MSG}"
-    enabled = bool(r_cfg.json().get("ietf-interfaces:interface", {}).get("enabled", False))
+        return f"No Interface {t.if_name_msg}"
+    with metrics.timed("response_parse", transport="restconf", router=router_ip):
+        enabled = bool(r_cfg.json().get("ietf-interfaces:interface", {}).get("enabled", False))
 
-    r_state = _request("GET", f"{STATE_ROOT}/interface={IF_NAME_CFG}")
+    r_state = _request("GET", f"{STATE_ROOT}/interface={t.if_name_cfg}")
     oper = "unknown"
     if r_state.status_code == 200:
-        oper = r_state.json().get("ietf-interfaces:interface", {}).get("oper-status", "unknown")
+        with metrics.timed("response_parse", transport="restconf", router=router_ip):
+            oper = r_state.json().get("ietf-interfaces:interface", {}).get("oper-status", "unknown")
 
     if enabled and oper == "up":
-        return f"Interface {IF_NAME_MSG} is enabled"
+        return f"Interface {t.if_name_msg} is enabled"
     if not enabled:
-        return f"Interface {IF_NAME_MSG} is disabled"
-    return f"Interface {IF_NAME_MSG} admin={'up' if enabled else 'down'}, oper={oper}"
+        return f"Interface {t.if_name_msg} is disabled"
+    return f"Interface {t.if_name_msg} admin={'up' if enabled else 'down'}, oper={oper}"
+
+# ---------------- gigabit_status จาก oper data ----------------
+def gigabit_status(router_ip: str) -> str:
+    """admin/oper-status ของทุก GigabitEthernet/Loopback จาก interfaces-state ใน GET เดียว (แทน CLI scraping)"""
+    _, STATE_ROOT = _base(router_ip)
+    r = _request("GET", STATE_ROOT)
+    if r.status_code != 200:
+        raise RuntimeError(f"cannot read interfaces-state (HTTP {r.status_code})")
+    with metrics.timed("response_parse", transport="restconf", router=router_ip):
+        items = r.json().get("ietf-interfaces:interfaces-state", {}).get("interface", [])
+        rows = [(it.get("name", ""), interface_summary.state(it.get("admin-status"), it.get("oper-status")))
+                for it in items if interface_summary.wanted(it.get("name", ""))]
+    if not rows:
+        raise RuntimeError("interfaces-state has no GigabitEthernet/Loopback")
+    return interface_summary.summarize(rows)
+
+# ---------------- bulk: หลาย loopback ใน request เดียว ----------------
+def list_interfaces(router_ip: str) -> dict[str, str]:
+    """{name: description} ของทุก interface ใน running-config (GET collection ครั้งเดียว)"""
+    CFG_ROOT, _ = _base(router_ip)
+    r = _request("GET", CFG_ROOT)
+    if r.status_code != 200:
+        raise RuntimeError(f"cannot read interfaces (HTTP {r.status_code})")
+    with metrics.timed("response_parse", transport="restconf", router=router_ip):
+        items = r.json().get("ietf-interfaces:interfaces", {}).get("interface", [])
+    return {it.get("name", ""): it.get("description", "") for it in items}
+
+def bulk_edit(router_ip: str, create: list[dict] = (), delete: list[str] = ()) -> tuple[bool, str]:
+    """
+    create: [{name, description, ip, netmask}] → PATCH (merge) บน collection interfaces ครั้งเดียว
+    delete: [name] → YANG Patch (RFC 8072) ครั้งเดียว, router ทำทั้งชุดหรือไม่ทำเลย
+    คืน (ok, ข้อความ error)
+    """
+    CFG_ROOT, _ = _base(router_ip)
+    if create:
+        payload = {"ietf-interfaces:interfaces": {"interface": [{
+            "name": it["name"],
+            "description": it["description"],
+            "type": "iana-if-type:softwareLoopback",
+            "enabled": True,
+            "ietf-ip:ipv4": {"address": [{"ip": it["ip"], "netmask": it["netmask"]}]},
+        } for it in create]}}
+        r = _request("PATCH", CFG_ROOT, data=json.dumps(payload))
+        if r.status_code not in (200, 204):
+            return False, f"PATCH interfaces failed (HTTP {r.status_code})"
+    if delete:
+        patch = {"ietf-yang-patch:yang-patch": {"patch-id": f"bulk-delete-{int(time.time())}", "edit": [
+            {"edit-id": name, "operation": "remove", "target": f"/interface={name}"} for name in delete]}}
+        r = _request("PATCH", CFG_ROOT, data=json.dumps(patch),
+                     headers={"Content-Type": "application/yang-patch+json"})
+        if r.status_code not in (200, 204):
+            return False, f"YANG Patch failed (HTTP {r.status_code})"
+    return True, ""
+
+def _handle(cmd: str, router_ip: str, refresh: bool = False) -> str:
+    t = tenant.current()
+    if WRITE_MODE == "optimistic" and cmd in _WRITES:
+        return _WRITES[cmd](router_ip)
+    if cmd == "create":
+        return create(router_ip) if not has_interface(router_ip) else f"Cannot create: Interface {t.if_name_msg}"
+    if cmd == "delete":
+        return delete(router_ip) if has_interface(router_ip) else f"Cannot delete: Interface {t.if_name_msg}"
+    if cmd == "enable":
+        return enable(router_ip) if has_interface(router_ip) else f"Cannot enable: Interface {t.if_name_msg}"
+    if cmd == "disable":
+        return disable(router_ip) if has_interface(router_ip) else f"Cannot shutdown: Interface {t.if_name_msg}"
+    if cmd == "status":
+        return status(router_ip, refresh)
+    return "Unknown command"
 
-def handle_command(cmd: str, router_ip: str) -> str:
+_WRITES = {"create": create, "delete": delete, "enable": enable, "disable": disable}
+
+def run_command(cmd: str, router_ip: str, refresh: bool = False) -> str:
+    """เหมือน handle_command แต่ปล่อย error ของ transport ออกไป (ให้โหมด auto สลับไป NETCONF ได้)"""
+    t = tenant.current()
+    result = _handle(cmd, router_ip, refresh)
+    after_write(router_ip, t.if_name_cfg, cmd, result)
+    return result
+
+def handle_command(cmd: str, router_ip: str, refresh: bool = False) -> str:
+    t = tenant.current()
     try:
-        if cmd == "create":
-            return create(router_ip) if not has_interface(router_ip) else f"Cannot create: Interface {IF_NAME_MSG}"
-        if cmd == "delete":
-            return delete(router_ip) if has_interface(router_ip) else f"Cannot delete: Interface {IF_NAME_MSG}"
-        if cmd == "enable":
-            return enable(router_ip) if has_interface(router_ip) else f"Cannot enable: Interface {IF_NAME_MSG}"
-        if cmd == "disable":
-            return disable(router_ip) if has_interface(router_ip) else f"Cannot shutdown: Interface {IF_NAME_MSG}"
-        if cmd == "status":
-            return status(router_ip)
-        return "Unknown command"
+        return run_command(cmd, router_ip, refresh)
+    except DeadlineExceeded:
+        # ไม่รู้ว่าการเขียนไปถึง router หรือยัง → ล้าง cache ของ router นี้
+        CACHE.invalidate(router_ip)
+        raise
+    except CircuitOpen:
+        raise
     except Exception:
-        if cmd == "create":  return f"Cannot create: Interface {IF_NAME_MSG}"
-        if cmd == "delete":  return f"Cannot delete: Interface {IF_NAME_MSG}"
-        if cmd == "enable":  return f"Cannot enable: Interface {IF_NAME_MSG}"
-        if cmd == "disable": return f"Cannot shutdown: Interface {IF_NAME_MSG}"
-        if cmd == "status":  return f"No Interface {IF_NAME_MSG}"
+        if cmd == "create":  return f"Cannot create: Interface {t.if_name_msg}"
+        if cmd == "delete":  return f"Cannot delete: Interface {t.if_name_msg}"
+        if cmd == "enable":  return f"Cannot enable: Interface {t.if_name_msg}"
+        if cmd == "disable": return f"Cannot shutdown: Interface {t.if_name_msg}"
+        if cmd == "status":  return f"No Interface {t.if_name_msg}"
         return "Unknown command"
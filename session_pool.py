@@ -0,0 +1,156 @@
+# session_pool.py
+# pool ของ session อุปกรณ์ที่เปิดค้างไว้ (ต่อ router) ใช้ร่วมกันระหว่าง netconf_final / netmiko_final
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import metrics
+import deadline
+
+class SessionPool:
+    """
+    factory(key)   -> สร้าง session ใหม่ (login/handshake)
+    is_alive(s)    -> True ถ้ายังใช้ต่อได้
+    close(s)       -> ปิด session ทิ้ง
+    max_per_key    -> จำนวน session พร้อมกันสูงสุดต่อ router
+    idle_ttl       -> session ที่ว่างนานกว่านี้ (วินาที) จะถูกปิดทิ้ง
+    discard_on_error -> ทิ้ง session ถ้ามี exception ระหว่างใช้ (เช่น CLI ที่ buffer อาจค้าง)
+
+    with pool.session(ip) as s: ...
+    เรียกซ้อนใน thread เดียวกันด้วย key เดิมจะได้ session เดิม (ไม่ต้องจองใหม่)
+    """
+
+    def __init__(self, factory, is_alive, close, max_per_key: int = 1,
+                 idle_ttl: float = 300, name: str = "pool", discard_on_error: bool = False):
+        self._factory = factory
+        self._is_alive = is_alive
+        self._close = close
+        self._max_per_key = max_per_key
+        self.idle_ttl = idle_ttl
+        self.name = name
+        self._discard_on_error = discard_on_error
+        self._idle = defaultdict(deque)          # key -> deque[(session, last_used)]
+        self._slots = {}                         # key -> BoundedSemaphore
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._reaper = None
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def _slot(self, key):
+        with self._lock:
+            if key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(self._max_per_key)
+            return self._slots[key]
+
+    def _held(self) -> dict:
+        if not hasattr(self._local, "held"):
+            self._local.held = {}
+        return self._local.held
+
+    def holding(self, key) -> bool:
+        """thread นี้ถือ session ของ key อยู่แล้ว (อยู่ใน with pool.session(key) ชั้นนอก)"""
+        return key in self._held()
+
+    def _safe_close(self, s) -> None:
+        try:
+            self._close(s)
+        except Exception:
+            pass
+
+    def _take_idle(self, key):
+        now = time.time()
+        while True:
+            with self._lock:
+                if not self._idle[key]:
+                    return None
+                s, last_used = self._idle[key].pop()
+            if now - last_used > self.idle_ttl or not self._alive(s):
+                self.evicted += 1
+                self._safe_close(s)
+                continue
+            return s
+
+    def _alive(self, s) -> bool:
+        try:
+            return bool(self._is_alive(s))
+        except Exception:
+            return False
+
+    @contextmanager
+    def session(self, key):
+        held = self._held()
+        if key in held:
+            # ซ้อนกันใน thread เดียวกัน → ใช้ session เดิม (เช่น pre-check + edit ใน handle_command)
+            yield held[key]
+            return
+
+        slot = self._slot(key)
+        left = deadline.remaining()
+        if not slot.acquire(timeout=max(left, 0) if left is not None else None):
+            raise deadline.DeadlineExceeded(deadline.current()[1])
+        try:
+            s = self._take_idle(key)
+            if s is None:
+                with metrics.timed("device_connect", transport=self.name, router=key):
+                    s = self._factory(key)
+                self.created += 1
+            else:
+                self.reused += 1
+            self._ensure_reaper()
+            held[key] = s
+            failed = False
+            try:
+                yield s
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                del held[key]
+                if not (failed and self._discard_on_error) and self._alive(s):
+                    with self._lock:
+                        self._idle[key].append((s, time.time()))
+                else:
+                    self._safe_close(s)
+        finally:
+            slot.release()
+
+    def evict_idle(self) -> int:
+        """ปิด session ที่ว่างเกิน idle_ttl คืนจำนวนที่ปิด"""
+        now = time.time()
+        stale = []
+        with self._lock:
+            for key, dq in self._idle.items():
+                keep = deque((s, t) for s, t in dq if now - t <= self.idle_ttl)
+                stale.extend(s for s, t in dq if now - t > self.idle_ttl)
+                self._idle[key] = keep
+        for s in stale:
+            self._safe_close(s)
+        self.evicted += len(stale)
+        return len(stale)
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is not None or self.idle_ttl <= 0:
+            return
+        with self._lock:
+            if self._reaper is not None:
+                return
+            def _loop():
+                while True:
+                    time.sleep(max(1.0, self.idle_ttl / 2))
+                    self.evict_idle()
+            self._reaper = threading.Thread(target=_loop, name=f"{self.name}-reaper", daemon=True)
+            self._reaper.start()
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = [s for dq in self._idle.values() for s, _ in dq]
+            self._idle.clear()
+        for s in sessions:
+            self._safe_close(s)
+
+    def stats(self) -> dict:
+        with self._lock:
+            idle = {k: len(v) for k, v in self._idle.items() if v}
+        return {"created": self.created, "reused": self.reused, "evicted": self.evicted, "idle": idle}
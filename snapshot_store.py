@@ -0,0 +1,156 @@
+# snapshot_store.py
+# เก็บ running-config แต่ละครั้งแบบ content-addressed (sha256) + gzip, มีประวัติต่อ router และจำกัดจำนวน
+import os
+import io
+import json
+import gzip
+import time
+import difflib
+import hashlib
+import tempfile
+import threading
+
+BASE_DIR      = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_DIR  = os.environ.get("SNAPSHOT_DIR", os.path.join(BASE_DIR, "snapshots"))
+SNAPSHOT_KEEP = int(os.environ.get("SNAPSHOT_KEEP", 20))
+
+# บรรทัดที่เปลี่ยนทุกครั้งแม้ config ไม่เปลี่ยน → ไม่นำมาคิด hash/diff
+_VOLATILE = (
+    b"Building configuration",
+    b"Current configuration :",
+    b"! Last configuration change at",
+    b"! NVRAM config last updated at",
+    b"! No configuration change since last restart",
+)
+
+_lock = threading.Lock()
+
+def _objects_dir() -> str:
+    return os.path.join(SNAPSHOT_DIR, "objects")
+
+def _object_path(digest: str) -> str:
+    return os.path.join(_objects_dir(), f"{digest}.gz")
+
+def _index_path(router: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, "routers", f"{router}.json")
+
+def history(router: str) -> list[dict]:
+    """ประวัติของ router เรียงเก่า → ใหม่: [{"hash", "ts", "size"}, ...]"""
+    try:
+        with open(_index_path(router), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+def _write_index(router: str, entries: list[dict]) -> None:
+    path = _index_path(router)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=1)
+    os.replace(tmp, path)
+
+def _normalized_lines(f):
+    for line in f:
+        if line.startswith(_VOLATILE):
+            continue
+        yield line.rstrip(b"\r\n") + b"\n"
+
+def save(router: str, f) -> tuple[dict, bool]:
+    """
+    อ่าน config จาก binary stream f ทีละบรรทัด (ไม่โหลดทั้งก้อน) → hash + gzip ลง objects/
+    คืน (entry, changed) โดย changed=False ถ้าเหมือน snapshot ล่าสุดของ router นี้
+    """
+    os.makedirs(_objects_dir(), exist_ok=True)
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=_objects_dir(), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+            for line in _normalized_lines(f):
+                h.update(line)
+                gz.write(line)
+                size += len(line)
+        digest = h.hexdigest()
+        with _lock:
+            if os.path.exists(_object_path(digest)):
+                os.remove(tmp)
+            else:
+                os.replace(tmp, _object_path(digest))
+
+            entries = history(router)
+            if entries and entries[-1]["hash"] == digest:
+                return entries[-1], False
+            entry = {"hash": digest, "ts": time.strftime("%Y-%m-%d %H:%M:%S"), "size": size}
+            entries.append(entry)
+            _write_index(router, entries[-SNAPSHOT_KEEP:] if SNAPSHOT_KEEP > 0 else entries)
+            _gc()
+        return entry, True
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _uploads_path() -> str:
+    return os.path.join(SNAPSHOT_DIR, "uploaded.json")
+
+def _read_uploads() -> dict:
+    try:
+        with open(_uploads_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def last_uploaded(room_id: str, router: str):
+    """
+    snapshot ที่ส่งเป็นไฟล์เข้าห้องนี้ล่าสุดของ router นี้ ({"hash", "ts" = เวลาที่ส่ง}) หรือ None
+    แยกต่อห้อง: ประวัติ snapshot ใช้ร่วมกันทุกห้อง แต่ไฟล์ที่ห้องหนึ่งได้รับ อีกห้องไม่ได้เห็น
+    """
+    with _lock:
+        return _read_uploads().get(room_id, {}).get(router)
+
+def mark_uploaded(room_id: str, router: str, entry: dict) -> None:
+    """จำว่า entry นี้ถูกส่งเป็นไฟล์เข้าห้องนี้แล้ว (showrun diff บันทึก snapshot แต่ไม่ได้ส่งไฟล์ → ไม่นับ)"""
+    with _lock:
+        data = _read_uploads()
+        data.setdefault(room_id, {})[router] = {"hash": entry["hash"], "ts": time.strftime("%Y-%m-%d %H:%M:%S")}
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp = f"{_uploads_path()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, _uploads_path())
+
+def load(digest: str) -> str:
+    with gzip.open(_object_path(digest), "rt", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+def _gc() -> None:
+    """ลบ object ที่ไม่มี router ไหนอ้างถึงแล้ว (เรียกภายใต้ _lock)"""
+    routers_dir = os.path.join(SNAPSHOT_DIR, "routers")
+    live = set()
+    if os.path.isdir(routers_dir):
+        for name in os.listdir(routers_dir):
+            if name.endswith(".json"):
+                live.update(e["hash"] for e in history(name[:-len(".json")]))
+    for name in os.listdir(_objects_dir()):
+        if name.endswith(".gz") and name[:-len(".gz")] not in live:
+            os.remove(os.path.join(_objects_dir(), name))
+
+def diff(router: str, f, n: int = 1) -> tuple[str, dict, dict]:
+    """
+    เทียบ config ปัจจุบัน (stream f) กับ snapshot ก่อนหน้าลำดับที่ n (1 = ครั้งล่าสุดที่ต่างจากปัจจุบัน)
+    แล้วบันทึก config ปัจจุบันเป็น snapshot ใหม่ คืน (unified diff, snapshot ที่เทียบ, snapshot ปัจจุบัน)
+    """
+    entry, changed = save(router, f)
+    entries = history(router)
+    # ตำแหน่งของ snapshot ปัจจุบันคือตัวสุดท้ายเสมอ → ตัวก่อนหน้าลำดับที่ n คือ index -1-n
+    if n < 1 or len(entries) < n + 1:
+        raise LookupError(f"only {max(0, len(entries) - 1)} previous snapshot(s) for {router}")
+    base = entries[-1 - n]
+    old = load(base["hash"]).splitlines(keepends=True)
+    new = load(entry["hash"]).splitlines(keepends=True)
+    text = "".join(difflib.unified_diff(old, new, fromfile=f"{router}@{base['ts']}",
+                                        tofile=f"{router}@{entry['ts']}", n=2))
+    return text, base, entry
+
+def as_stream(text: str):
+    return io.BytesIO(text.encode("utf-8"))
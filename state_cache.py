@@ -0,0 +1,109 @@
+# state_cache.py
+# cache สถานะอุปกรณ์ต่อ (router, object) มี TTL + จำกัดขนาด (LRU) ใช้ร่วมกันทุก transport
+import os
+import time
+import threading
+from collections import OrderedDict
+
+STATE_CACHE_TTL  = float(os.environ.get("STATE_CACHE_TTL", 10))
+STATE_CACHE_SIZE = int(os.environ.get("STATE_CACHE_SIZE", 256))
+
+_MISSING = object()
+
+class StateCache:
+    def __init__(self, ttl: float = STATE_CACHE_TTL, max_size: int = STATE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = OrderedDict()   # (router, obj) -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._on_invalidate = []
+
+    def on_invalidate(self, fn) -> None:
+        """fn(router) ถูกเรียกทุกครั้งที่ล้างค่าของ router (เช่น หลังสั่งเขียน) — ให้ข้อมูลที่เก็บไว้ที่อื่นรู้ว่าไม่สดแล้ว"""
+        self._on_invalidate.append(fn)
+
+    def get(self, router: str, obj: str, default=None):
+        key = (router, obj)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, router: str, obj: str, value, ttl: float = None) -> None:
+        if self.ttl <= 0 and ttl is None:
+            return
+        key = (router, obj)
+        with self._lock:
+            self._data[key] = (value, time.time() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, router: str, obj: str = None) -> None:
+        """ลบ object เดียว หรือทุก object ของ router ถ้าไม่ระบุ obj"""
+        with self._lock:
+            if obj is not None:
+                self._data.pop((router, obj), None)
+            else:
+                for key in [k for k in self._data if k[0] == router]:
+                    del self._data[key]
+        for fn in self._on_invalidate:
+            fn(router)
+
+    def contains(self, router: str, obj: str) -> bool:
+        """มีค่าที่ยังไม่หมดอายุอยู่ไหม (ไม่นับเป็น hit/miss)"""
+        with self._lock:
+            entry = self._data.get((router, obj))
+            return entry is not None and entry[1] >= time.time()
+
+    def cached(self, router: str, obj: str, loader, refresh: bool = False, cache_if=lambda v: True):
+        """คืนค่าจาก cache ถ้ายังไม่หมดอายุ ไม่งั้นเรียก loader() แล้วเก็บผล (refresh=True = บังคับอ่านใหม่)"""
+        if not refresh:
+            value = self.get(router, obj, _MISSING)
+            if value is not _MISSING:
+                return value
+        else:
+            with self._lock:
+                self.misses += 1
+        value = loader()
+        if cache_if(value):
+            self.put(router, obj, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+                "ttl": self.ttl,
+            }
+
+CACHE = StateCache()
+
+def after_write(router: str, if_name: str, cmd: str, result: str) -> None:
+    """write-through หลัง create/delete/enable/disable สำเร็จ: อัปเดต exists และล้าง status เดิม"""
+    if cmd not in ("create", "delete", "enable", "disable"):
+        return
+    CACHE.invalidate(router, f"status:{if_name}")
+    if "successfully" not in result:
+        # ทำไม่สำเร็จ → ค่า exists ที่ cache ไว้อาจไม่ตรงกับ router แล้ว อ่านใหม่รอบหน้า
+        CACHE.invalidate(router, f"exists:{if_name}")
+        return
+    if cmd == "create":
+        CACHE.put(router, f"exists:{if_name}", True)
+    elif cmd == "delete":
+        CACHE.put(router, f"exists:{if_name}", False)
@@ -0,0 +1,85 @@
+# tenant.py
+# บริบทของคำสั่ง (student ID + ห้อง Webex) — โปรเซสเดียวรองรับหลายห้อง/หลายนักศึกษาพร้อมกัน
+# transport อ่านชื่อ/IP ของ loopback จาก current() แทนค่าคงที่ตอน import
+import os
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+load_dotenv()
+
+STUDENT_ID    = os.environ.get("STUDENT_ID", "66070315").strip()
+WEBEX_ROOM_ID = os.environ.get("WEBEX_ROOM_ID", "").strip()
+# หลายคน: STUDENT_ROOMS="66070315:<roomId>,66070316:<roomId>" (ห้องเดียวกันหลาย ID ได้)
+STUDENT_ROOMS = os.environ.get("STUDENT_ROOMS", "").strip()
+
+def ip_for_student(student_id: str) -> str:
+    last3 = student_id[-3:]
+    x = int(last3[0])
+    y = int(last3[1:])
+    return f"172.{x}.{y}.1"
+
+class Tenant:
+    __slots__ = ("student_id", "room_id", "if_name_cfg", "if_name_msg", "loopback_ip")
+
+    def __init__(self, student_id: str, room_id: str = ""):
+        self.student_id = student_id
+        self.room_id = room_id
+        self.if_name_cfg = f"Loopback{student_id}"
+        self.if_name_msg = f"loopback {student_id}"
+        self.loopback_ip = ip_for_student(student_id)
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.room_id, self.student_id)
+
+    # loopback แบบ bulk (/SID <ip> create 10-50): Loopback<3 ตัวท้าย SID><NNN> = 10.x.y.N/32
+    # (เลข Loopback ของ IOS ใส่ SID เต็มไม่พอ) SID ที่ 3 ตัวท้ายซ้ำกันจึงได้ชื่อเดียวกัน
+    # → เจ้าของตัวจริงดูจาก description (bulk_description) ไม่ใช่จากชื่ออย่างเดียว
+    @property
+    def bulk_prefix(self) -> str:
+        return f"Loopback{self.student_id[-3:]}"
+
+    def bulk_name(self, n: int) -> str:
+        return f"{self.bulk_prefix}{n:03d}"
+
+    def bulk_ip(self, n: int) -> str:
+        last3 = self.student_id[-3:]
+        return f"10.{int(last3[0])}.{int(last3[1:])}.{n}"
+
+    def bulk_description(self, n: int) -> str:
+        return f"Student {self.student_id} bulk loopback {n}"
+
+    def bulk_index(self, name: str):
+        """เลข N ถ้า name มีรูปแบบ loopback bulk ของคนนี้ ไม่งั้น None (ยังต้องเทียบ description ก่อนแตะ)"""
+        tail = name[len(self.bulk_prefix):] if name.startswith(self.bulk_prefix) else ""
+        return int(tail) if len(tail) == 3 and tail.isdigit() else None
+
+    def __repr__(self) -> str:
+        return f"Tenant({self.student_id!r}, {self.room_id[-8:]!r})"
+
+def load_tenants(spec: str = STUDENT_ROOMS) -> list[Tenant]:
+    """อ่าน STUDENT_ROOMS; ถ้าไม่ได้ตั้ง ใช้ STUDENT_ID + WEBEX_ROOM_ID คู่เดียวแบบเดิม"""
+    tenants = []
+    for item in spec.split(","):
+        sid, _, room = item.strip().partition(":")
+        if sid.strip() and room.strip():
+            tenants.append(Tenant(sid.strip(), room.strip()))
+    if not tenants and STUDENT_ID and WEBEX_ROOM_ID:
+        tenants.append(Tenant(STUDENT_ID, WEBEX_ROOM_ID))
+    return tenants
+
+DEFAULT = Tenant(STUDENT_ID, WEBEX_ROOM_ID)
+_local = threading.local()
+
+def current() -> Tenant:
+    """tenant ของคำสั่งที่กำลังรันใน thread นี้ (สคริปต์/bench ที่ไม่ได้ bind ได้ค่าจาก ENV)"""
+    return getattr(_local, "tenant", None) or DEFAULT
+
+@contextmanager
+def bind(t: Tenant):
+    saved = getattr(_local, "tenant", None)
+    _local.tenant = t
+    try:
+        yield t
+    finally:
+        _local.tenant = saved
@@ -0,0 +1,183 @@
+# webex_client.py
+# client กลางสำหรับ Webex API: session ใช้ซ้ำ, จำกัดอัตรา (token bucket), retry ตาม Retry-After,
+# ตัวช่วยแบ่งหน้า และคิวส่งข้อความเบื้องหลัง (ไม่บล็อกงานของคำสั่ง)
+import os
+import time
+import queue
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from dotenv import load_dotenv
+import metrics
+load_dotenv()
+
+WEBEX_API     = os.environ.get("WEBEX_API", "https://webexapis.com/v1").rstrip("/")
+WEBEX_TOKEN   = os.environ.get("WEBEX_TOKEN", "")
+WEBEX_RATE    = float(os.environ.get("WEBEX_RATE", 5))      # request ต่อวินาที (เฉลี่ย)
+WEBEX_BURST   = int(os.environ.get("WEBEX_BURST", 10))
+WEBEX_RETRIES = int(os.environ.get("WEBEX_RETRIES", 5))
+WEBEX_TIMEOUT = float(os.environ.get("WEBEX_TIMEOUT", 15))
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def _retry_after(r: requests.Response, fallback: float) -> float:
+    try:
+        return max(0.0, float(r.headers.get("Retry-After", "")))
+    except ValueError:
+        return fallback
+
+class WebexClient:
+    def __init__(self, token: str = WEBEX_TOKEN, rate: float = WEBEX_RATE, burst: int = WEBEX_BURST):
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+        self.session.headers["Authorization"] = f"Bearer {token}"
+        self.bucket = TokenBucket(rate, burst)
+        self._outbox = queue.Queue()
+        self._sender = None
+        self._sender_lock = threading.Lock()
+        self.throttled = 0
+
+    # ---------------- low level ----------------
+    def request(self, method: str, path: str, body_factory=None, **kwargs) -> requests.Response:
+        """
+        ส่ง request พร้อม rate limit และ retry: 429 รอตาม Retry-After, 5xx/เน็ตหลุด backoff แบบทวีคูณ
+        body_factory() ใช้กับ body แบบ stream ที่ต้องสร้างใหม่ทุกครั้งที่ retry (คืน (data, headers))
+        """
+        url = path if path.startswith("http") else f"{WEBEX_API}/{path.lstrip('/')}"
+        kwargs.setdefault("timeout", WEBEX_TIMEOUT)
+        delay = 1.0
+        r = None
+        for attempt in range(WEBEX_RETRIES):
+            self.bucket.acquire()
+            if body_factory is not None:
+                data, extra = body_factory()
+                kwargs["data"] = data
+                kwargs["headers"] = {**kwargs.get("headers", {}), **extra}
+            try:
+                r = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException:
+                if attempt == WEBEX_RETRIES - 1:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+                continue
+            if r.status_code == 429:
+                self.throttled += 1
+                time.sleep(_retry_after(r, delay))
+                delay *= 2
+                continue
+            if r.status_code >= 500:
+                time.sleep(_retry_after(r, delay))
+                delay *= 2
+                continue
+            return r
+        return r
+
+    def paginate(self, path: str, params: dict = None, limit: int = None):
+        """ไล่ทุกหน้าตาม Link: <...>; rel="next" คืน item ทีละตัว"""
+        url, count = path, 0
+        while url:
+            r = self.request("GET", url, params=params)
+            if r.status_code != 200:
+                return
+            for item in r.json().get("items", []):
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+            url = r.links.get("next", {}).get("url")
+            params = None   # URL ของหน้าถัดไปมี query ครบแล้ว
+
+    # ---------------- messages / rooms ----------------
+    def list_messages(self, room_id: str, max_items: int = 50) -> list[dict]:
+        """ข้อความล่าสุดของห้อง (ใหม่ → เก่า) หน้าเดียว"""
+        r = self.request("GET", "messages", params={"roomId": room_id, "max": max_items})
+        return r.json().get("items", []) if r.status_code == 200 else []
+
+    def get_message(self, message_id: str) -> dict:
+        r = self.request("GET", f"messages/{message_id}")
+        return r.json() if r.status_code == 200 else {}
+
+    def list_rooms(self, max_items: int = 100):
+        return self.paginate("rooms", params={"max": max_items})
+
+    def post_message(self, room_id: str, text: str) -> requests.Response:
+        with metrics.timed("reply_post", transport="webex"):
+            return self.request("POST", "messages", json={"roomId": room_id, "text": text})
+
+    def post_file(self, room_id: str, text: str, f, filename: str, ctype: str = "text/plain") -> requests.Response:
+        """อัปโหลดไฟล์แบบ streaming multipart; ถ้าต้อง retry จะ seek กลับต้น stream แล้วสร้าง body ใหม่"""
+        start = f.tell()
+        def _body():
+            f.seek(start)
+            enc = MultipartEncoder(fields={"roomId": room_id, "text": text, "files": (filename, f, ctype)})
+            return enc, {"Content-Type": enc.content_type}
+        with metrics.timed("reply_upload", transport="webex"):
+            return self.request("POST", "messages", body_factory=_body)
+
+    # ---------------- async outbound queue ----------------
+    def send_async(self, room_id: str, text: str, on_sent=None, labels: dict = None) -> None:
+        """
+        ใส่ข้อความลงคิว ให้ thread เบื้องหลังส่ง (on_sent(response) เรียกหลังส่งเสร็จ)
+        labels (command, router) ผูกกับ reply_post ตอนส่ง — thread ของ sender ไม่มี metrics.bind ของคำสั่ง
+        """
+        self._ensure_sender()
+        self._outbox.put((room_id, text, on_sent, labels or {}))
+
+    def _ensure_sender(self) -> None:
+        with self._sender_lock:
+            if self._sender is None:
+                self._sender = threading.Thread(target=self._send_loop, name="webex-sender", daemon=True)
+                self._sender.start()
+
+    def _send_loop(self) -> None:
+        while True:
+            room_id, text, on_sent, labels = self._outbox.get()
+            try:
+                with metrics.bind(**labels):
+                    r = self.post_message(room_id, text)
+                if r is None or r.status_code != 200:
+                    print(f"Error sending message: {r.status_code if r is not None else 'no response'}")
+                if on_sent is not None:
+                    on_sent(r)
+            except Exception as e:
+                print(f"Error sending message: {e}")
+            finally:
+                self._outbox.task_done()
+
+    def pending(self) -> int:
+        return self._outbox.qsize()
+
+    def flush(self) -> None:
+        self._outbox.join()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> WebexClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WebexClient()
+        return _client
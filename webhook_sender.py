@@ -0,0 +1,42 @@
+# webhook_sender.py
+# ตัวจำลอง Webex สำหรับทดสอบ webhook mode บนเครื่อง:
+#   python webhook_sender.py "/66070315 10.0.15.61 status"
+# ต้องตั้ง WEBHOOK_SECRET ให้ตรงกับ bot — ไม่งั้น bot ไม่เชื่อ text ที่แนบมา (จะไป GET ข้อความจาก Webex ด้วย id แทน)
+import os
+import sys
+import hmac
+import json
+import uuid
+import hashlib
+import requests
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+load_dotenv()
+
+WEBHOOK_URL    = os.environ.get("WEBHOOK_URL", "http://127.0.0.1:8080/webex")
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")
+WEBEX_ROOM_ID  = os.environ.get("WEBEX_ROOM_ID", "")
+
+def send(text: str) -> int:
+    created = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    body = json.dumps({
+        "resource": "messages",
+        "event": "created",
+        "data": {
+            "id": str(uuid.uuid4()),
+            "roomId": WEBEX_ROOM_ID,
+            "created": created,
+            "text": text,
+        },
+    }).encode()
+    headers = {"Content-Type": "application/json"}
+    if WEBHOOK_SECRET:
+        headers["X-Spark-Signature"] = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha1).hexdigest()
+    r = requests.post(WEBHOOK_URL, data=body, headers=headers, timeout=5)
+    return r.status_code
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print('usage: python webhook_sender.py "/<studentID> <command>"')
+        sys.exit(1)
+    print(send(" ".join(sys.argv[1:])))
@@ -0,0 +1,62 @@
+# webhook_server.py
+# ตัวรับ Webex webhook (messages:created) แบบฝังในโปรเซส แล้วป้อนเข้า COMMANDS queue
+import os
+import hmac
+import time
+import queue
+import hashlib
+import threading
+from flask import Flask, request
+
+WEBHOOK_HOST   = os.environ.get("WEBHOOK_HOST", "127.0.0.1").strip()
+WEBHOOK_PORT   = int(os.environ.get("WEBHOOK_PORT", "8080"))
+WEBHOOK_PATH   = os.environ.get("WEBHOOK_PATH", "/webex").strip()
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")
+
+COMMANDS: "queue.Queue[dict]" = queue.Queue()
+app = Flask(__name__)
+_rooms = set()   # ว่าง = รับทุกห้อง
+
+def _signature_ok(body: bytes, signature: str) -> bool:
+    """ตรวจ X-Spark-Signature (HMAC-SHA1) เมื่อมีการตั้ง WEBHOOK_SECRET"""
+    if not WEBHOOK_SECRET:
+        return True
+    digest = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha1).hexdigest()
+    return hmac.compare_digest(digest, signature or "")
+
+@app.post(WEBHOOK_PATH)
+def webex_webhook():
+    if not _signature_ok(request.get_data(), request.headers.get("X-Spark-Signature", "")):
+        return "", 403
+
+    body = request.get_json(silent=True) or {}
+    if body.get("resource") != "messages" or body.get("event") != "created":
+        return "", 204
+
+    data = body.get("data", {}) or {}
+    if _rooms and data.get("roomId") not in _rooms:
+        return "", 204
+
+    # Webex จริงส่งมาแค่ id; text ที่แนบมา (webhook_sender.py) เชื่อได้เฉพาะเมื่อตั้ง WEBHOOK_SECRET และลายเซ็นผ่าน
+    # ไม่งั้นไม่สนใจ text แล้วให้ฝั่ง bot GET ข้อความจริงจาก Webex ด้วย id
+    COMMANDS.put({
+        "id": data.get("id", ""),
+        "room": data.get("roomId", ""),
+        "text": data.get("text") if WEBHOOK_SECRET else None,
+        "created": data.get("created", ""),
+        "received": time.time(),
+    })
+    return "", 202
+
+def start(rooms=()) -> threading.Thread:
+    """รัน Flask ใน daemon thread เพื่อให้ main thread ดึงงานจาก COMMANDS (rooms = ห้องที่รับ)"""
+    global _rooms
+    _rooms = {rooms} if isinstance(rooms, str) else set(rooms)
+    t = threading.Thread(
+        target=app.run,
+        kwargs={"host": WEBHOOK_HOST, "port": WEBHOOK_PORT, "threaded": True, "use_reloader": False},
+        daemon=True,
+    )
+    t.start()
+    print(f"Webhook receiver listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+    return t